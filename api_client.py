@@ -1,18 +1,56 @@
 # api_client.py
 
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, DefaultHttpxClient, DefaultAsyncHttpxClient
 from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL
+from http_pool import http_client_options, is_shared_loop, register_close
+import asyncio
 import logging
+import threading
+from utils import load_config_section
 
 logger = logging.getLogger(__name__)
 
+_shared_clients = {}
+_shared_clients_lock = threading.Lock()
+
+def _pooled_http_options():
+    from async_translator import DEFAULT_MAX_IN_FLIGHT
+    max_in_flight = load_config_section('translation').get('max_in_flight') or DEFAULT_MAX_IN_FLIGHT
+    return http_client_options(load_config_section('http'), max_in_flight)
+
+def get_shared_client(asynchronous=False, api_key=None, base_url=None):
+    """
+    Returns the process-wide OpenAI client, or AsyncOpenAI client for the shared event
+    loop, creating it on first use with the pooled [http] settings. It is closed when
+    the process exits.
+
+    :param api_key: Key to use instead of the configured one
+    :param base_url: Endpoint to use instead of the configured one, e.g. a mock_server
+    """
+    api_key, base_url = api_key or DEEPSEEK_API_KEY, base_url or DEEPSEEK_API_URL
+    client_key = (asynchronous, api_key, base_url)
+    with _shared_clients_lock:
+        client = _shared_clients.get(client_key)
+        if client is None:
+            if asynchronous:
+                # Retries are left to AsyncTranslationEngine, which backs off and rate limits
+                client = AsyncOpenAI(api_key=api_key, base_url=base_url, max_retries=0,
+                                     http_client=DefaultAsyncHttpxClient(**_pooled_http_options()))
+            else:
+                client = OpenAI(api_key=api_key, base_url=base_url,
+                                http_client=DefaultHttpxClient(**_pooled_http_options()))
+            register_close(client.close)
+            register_close(lambda: _shared_clients.pop(client_key, None))
+            _shared_clients[client_key] = client
+            logger.info(f"Shared {'async ' if asynchronous else ''}OpenAI client initialized with base URL: {base_url}")
+        return client
+
 class APIClient:
-    def __init__(self):
-        if not DEEPSEEK_API_KEY:
+    def __init__(self, api_key=None, base_url=None):
+        if not (api_key or DEEPSEEK_API_KEY):
             logger.error("DEEPSEEK_API_KEY is not set. Please check the configuration file.")
             raise ValueError("DEEPSEEK_API_KEY is not set. Please check the configuration file.")
-        self.client = OpenAI(api_key=DEEPSEEK_API_KEY, base_url=DEEPSEEK_API_URL)
-        logger.info(f"OpenAI client initialized with API key and base URL: {DEEPSEEK_API_URL}")
+        self.client = get_shared_client(api_key=api_key, base_url=base_url)
 
     def create_chat_completion(self, model, messages):
         try:
@@ -24,5 +62,61 @@ class APIClient:
             logger.info("Chat completion created successfully.")
             return response
         except Exception as e:
+            # Re-raised as is, so callers can tell a rate limit from a bad request
             logger.error(f"Error creating chat completion: {e}", exc_info=True)
-            raise Exception(f"Error creating chat completion: {e}")
\ No newline at end of file
+            raise
+
+class AsyncAPIClient:
+    """
+    Asynchronous counterpart of APIClient, used by AsyncTranslationEngine.
+
+    On the shared event loop (see http_pool) every instance uses the same pooled client,
+    so connections stay warm across translators and files. An async client is bound to
+    the loop it is used in, so when called from any other loop a private client is made.
+
+    :param api_key: Key to use instead of the configured one
+    :param base_url: Endpoint to use instead of the configured one, e.g. a mock_server
+    """
+
+    def __init__(self, api_key=None, base_url=None):
+        if not (api_key or DEEPSEEK_API_KEY):
+            logger.error("DEEPSEEK_API_KEY is not set. Please check the configuration file.")
+            raise ValueError("DEEPSEEK_API_KEY is not set. Please check the configuration file.")
+        self.api_key = api_key or DEEPSEEK_API_KEY
+        self.base_url = base_url or DEEPSEEK_API_URL
+        self.client = None
+        self._loop = None
+
+    def _get_client(self):
+        loop = asyncio.get_running_loop()
+        if is_shared_loop(loop):
+            return get_shared_client(asynchronous=True, api_key=self.api_key, base_url=self.base_url)
+        if self.client is None or self._loop is not loop:
+            self.client = AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0)
+            self._loop = loop
+            logger.info(f"Async OpenAI client initialized with base URL: {self.base_url}")
+        return self.client
+
+    async def create_chat_completion(self, model, messages):
+        return await self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=False
+        )
+
+    async def stream_chat_completion(self, model, messages):
+        """
+        Yields the chunks of a streamed chat completion as they arrive. The last chunk
+        carries the token usage and no choices.
+        """
+        stream = await self._get_client().chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            await stream.close()
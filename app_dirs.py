@@ -0,0 +1,44 @@
+# app_dirs.py
+
+import logging
+import os
+import sys
+
+logger = logging.getLogger(__name__)
+
+APP_NAME = 'srt_translatetools'
+
+# Overrides the per-user cache directory, e.g. for portable installs and tests
+CACHE_DIR_ENV = 'SRT_TRANSLATETOOLS_CACHE_DIR'
+
+def user_cache_dir():
+    """
+    Returns the per-user directory for caches that can be rebuilt at any time, creating it
+    if needed: %LOCALAPPDATA%\\srt_translatetools\\Cache on Windows, ~/Library/Caches/srt_translatetools
+    on macOS and $XDG_CACHE_HOME/srt_translatetools (~/.cache) elsewhere.
+    """
+    path = os.environ.get(CACHE_DIR_ENV)
+    if not path:
+        if sys.platform == 'win32':
+            base = os.environ.get('LOCALAPPDATA') or os.path.join(os.path.expanduser('~'), 'AppData', 'Local')
+            path = os.path.join(base, APP_NAME, 'Cache')
+        elif sys.platform == 'darwin':
+            path = os.path.join(os.path.expanduser('~'), 'Library', 'Caches', APP_NAME)
+        else:
+            base = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+            path = os.path.join(base, APP_NAME)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+def resolve_data_path(path, default_name, config_file_path='config.toml'):
+    """
+    Returns the absolute path of a database configured in config.toml, so it does not
+    depend on the working directory: a relative path is taken relative to the config
+    file's directory, and no path at all means default_name in the user cache directory.
+    ':memory:' is returned as is.
+    """
+    if not path:
+        return os.path.join(user_cache_dir(), default_name)
+    if path == ':memory:':
+        return path
+    return os.path.join(os.path.dirname(os.path.abspath(config_file_path)), os.path.expanduser(path))
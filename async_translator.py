@@ -0,0 +1,369 @@
+# async_translator.py
+
+import asyncio
+import contextlib
+from email.utils import parsedate_to_datetime
+import logging
+import random
+import time
+from token_budget import estimate_text_tokens, MESSAGE_OVERHEAD
+import weakref
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the [translation] engine settings; rate limits are off unless configured
+DEFAULT_MAX_IN_FLIGHT = 4
+DEFAULT_MAX_RETRIES = 6
+DEFAULT_BASE_DELAY = 1.0
+DEFAULT_MAX_DELAY = 60.0
+
+# Batches that may finish ahead of the first unfinished one when results must come out in order
+DEFAULT_REORDER_WINDOW = 8
+
+# HTTP statuses worth retrying: timeouts, conflicts, rate limits and server errors
+RETRYABLE_STATUSES = (408, 409, 429)
+
+class TokenBucket:
+    """
+    Token bucket refilled continuously at per_minute tokens per minute.
+
+    Waiters are served first come, first served. A request larger than the bucket waits
+    for a full bucket instead of forever.
+
+    :param capacity: Largest burst, by default a full minute's worth
+    """
+
+    def __init__(self, per_minute, capacity=None):
+        if per_minute <= 0:
+            raise ValueError("per_minute must be positive")
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+        self._loop = None
+
+    async def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+
+    def adjust(self, amount):
+        """
+        Gives back (positive) or takes away (negative) tokens once the real cost of a request is known.
+        """
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def _get_lock(self):
+        # asyncio primitives belong to one event loop, and each translate_texts call runs its own
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._lock = asyncio.Lock()
+            self._loop = loop
+        return self._lock
+
+class ReorderBuffer:
+    """
+    Takes results that finish out of order and releases them in sequence order.
+
+    Only sequences less than window ahead of the next one to release are let through
+    wait_for_turn, so at most window results are ever held back and memory stays bounded
+    however unevenly requests finish. Must be created inside the event loop that uses it.
+    """
+
+    def __init__(self, window=DEFAULT_REORDER_WINDOW):
+        self.window = max(window, 1)
+        self.next_sequence = 0
+        self.pending = {}
+        self._condition = asyncio.Condition()
+
+    async def wait_for_turn(self, sequence):
+        async with self._condition:
+            await self._condition.wait_for(lambda: sequence < self.next_sequence + self.window)
+
+    async def put(self, sequence, item):
+        """
+        Stores the result for sequence and returns the items that are now released, in order.
+        """
+        async with self._condition:
+            self.pending[sequence] = item
+            released = []
+            while self.next_sequence in self.pending:
+                released.append(self.pending.pop(self.next_sequence))
+                self.next_sequence += 1
+            if released:
+                self._condition.notify_all()
+            return released
+
+class AbandonedError(Exception):
+    """
+    Set on a shared in-flight result whose owner stopped (cancelled or failed) before producing it.
+    """
+
+class SingleFlight:
+    """
+    Lets concurrent callers share one in-flight computation per key.
+
+    claim() hands every key to exactly one owner; callers that ask for a key already in
+    flight get the owner's future instead of starting a second request. Owners resolve
+    their keys as results arrive and abandon whatever they did not finish, so waiters
+    can fall back to doing the work themselves. Futures belong to the loop that created
+    them; use get_single_flight() for the instance of the running loop.
+    """
+
+    def __init__(self):
+        self._futures = {}
+
+    def claim(self, keys):
+        """
+        Returns (owned, shared): the keys the caller must compute, in order, and a dict of
+        futures for the keys someone else is already computing.
+        """
+        owned, shared = [], {}
+        loop = asyncio.get_running_loop()
+        for key in keys:
+            future = self._futures.get(key)
+            if future is not None and not future.done():
+                shared[key] = future
+            else:
+                self._futures[key] = loop.create_future()
+                owned.append(key)
+        return owned, shared
+
+    def resolve(self, key, value):
+        future = self._futures.pop(key, None)
+        if future is not None and not future.done():
+            future.set_result(value)
+
+    def abandon(self, keys, error=None):
+        """
+        Fails the futures of owned keys that were not resolved, e.g. after a cancel or an error.
+        """
+        for key in keys:
+            future = self._futures.pop(key, None)
+            if future is not None and not future.done():
+                future.set_exception(error or AbandonedError(key))
+                future.exception()  # Mark as retrieved; nobody may be waiting on it
+
+    def __len__(self):
+        return len(self._futures)
+
+_single_flights = weakref.WeakKeyDictionary()
+
+def get_single_flight():
+    """
+    Returns the SingleFlight of the running event loop.
+    """
+    loop = asyncio.get_running_loop()
+    single_flight = _single_flights.get(loop)
+    if single_flight is None:
+        single_flight = _single_flights[loop] = SingleFlight()
+    return single_flight
+
+def estimate_tokens(messages):
+    """
+    Rough token count of a request and its reply, with the reply assumed as long as the user message.
+    """
+    total = 0
+    for message in messages:
+        tokens = estimate_text_tokens(message['content']) + MESSAGE_OVERHEAD
+        total += tokens * 2 if message['role'] == 'user' else tokens
+    return total
+
+def is_retryable(error):
+    """
+    True for rate limits, timeouts, connection failures and server errors.
+    """
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status in RETRYABLE_STATUSES or status >= 500
+    if isinstance(error, (ConnectionError, TimeoutError, asyncio.TimeoutError)):
+        return True
+    # Matched by name so neither openai nor httpx has to be imported. httpx transport
+    # errors (a reset or cut-off connection) surface unwrapped while a stream is read.
+    return any(cls.__name__ in ('APIConnectionError', 'APITimeoutError', 'TransportError') for cls in type(error).__mro__)
+
+def retry_after(error):
+    """
+    Returns the delay in seconds requested by a Retry-After (or retry-after-ms) header, or None.
+    """
+    response = getattr(error, 'response', None)
+    headers = getattr(response, 'headers', None)
+    if not headers:
+        return None
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if value is None:
+            return None
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+class AsyncTranslationEngine:
+    """
+    Sends chat completions with bounded concurrency, client-side rate limits and retries.
+
+    At most max_in_flight requests are outstanding at once. Before a request is sent it
+    takes one token from the requests-per-minute bucket and its estimated size from the
+    tokens-per-minute bucket; the estimate is corrected from the usage the API reports.
+    Retryable errors are retried with jittered exponential backoff. A Retry-After header
+    is honoured exactly and pauses every request of the engine, not only the one that got
+    the 429, so a rate limit does not turn into a storm of retries.
+
+    :param api_client: Object with a create_chat_completion(model, messages) method, either
+        a coroutine function (AsyncAPIClient) or a blocking one, which then runs in a thread
+    :param requests_per_minute: Request limit, or None for no limit
+    :param tokens_per_minute: Token limit, or None for no limit
+    """
+
+    def __init__(self, api_client, model, max_in_flight=DEFAULT_MAX_IN_FLIGHT, requests_per_minute=None,
+                 tokens_per_minute=None, max_retries=DEFAULT_MAX_RETRIES, base_delay=DEFAULT_BASE_DELAY,
+                 max_delay=DEFAULT_MAX_DELAY):
+        self.api_client = api_client
+        self.model = model
+        self.max_in_flight = max(max_in_flight, 1)
+        self.request_bucket = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.token_bucket = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.requests = 0
+        self.retries = 0
+        self._paused_until = 0.0
+        self._semaphore = None
+        self._loop = None
+
+    @classmethod
+    def from_settings(cls, api_client, model, settings, max_in_flight=None):
+        """
+        Builds an engine from the [translation] section of the configuration file.
+        """
+        return cls(api_client, model,
+                   max_in_flight=max_in_flight or settings.get('max_in_flight') or DEFAULT_MAX_IN_FLIGHT,
+                   requests_per_minute=settings.get('requests_per_minute'),
+                   tokens_per_minute=settings.get('tokens_per_minute'),
+                   max_retries=settings.get('max_retries', DEFAULT_MAX_RETRIES))
+
+    async def complete(self, messages):
+        """
+        Sends one chat completion and returns the response, retrying retryable errors.
+        """
+        estimated_tokens = estimate_tokens(messages)
+        semaphore = self._get_semaphore()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            async with semaphore:
+                await self._acquire(estimated_tokens)
+                try:
+                    self.requests += 1
+                    response = await self._send(messages)
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                else:
+                    self._record_usage(getattr(response, 'usage', None), estimated_tokens)
+                    return response
+            await asyncio.sleep(delay)
+
+    async def stream(self, messages):
+        """
+        Streams one chat completion, yielding pieces of the reply text as they arrive.
+
+        Needs an api_client with a stream_chat_completion(model, messages) async generator
+        of completion chunks. Errors before the first piece of text are retried like in
+        complete(); once text has been yielded a failure is raised, since the reply
+        cannot be resumed. Callers that can use a partial reply (Translator) keep what
+        arrived and send only the rest again.
+        """
+        estimated_tokens = estimate_tokens(messages)
+        semaphore = self._get_semaphore()
+        for attempt in range(self.max_retries + 1):
+            await self._wait_for_pause()
+            async with semaphore:
+                await self._acquire(estimated_tokens)
+                received = False
+                try:
+                    self.requests += 1
+                    async with contextlib.aclosing(self.api_client.stream_chat_completion(model=self.model, messages=messages)) as chunks:
+                        async for chunk in chunks:
+                            if getattr(chunk, 'usage', None):
+                                self._record_usage(chunk.usage, estimated_tokens)
+                            content = chunk.choices[0].delta.content if chunk.choices else None
+                            if content:
+                                received = True
+                                yield content
+                    return
+                except Exception as e:
+                    if received:
+                        raise
+                    delay = self._retry_delay(attempt, e)
+            await asyncio.sleep(delay)
+
+    async def _acquire(self, estimated_tokens):
+        # Checked again inside the semaphore: a Retry-After may have arrived while waiting for a slot
+        await self._wait_for_pause()
+        if self.request_bucket:
+            await self.request_bucket.acquire(1)
+        if self.token_bucket:
+            await self.token_bucket.acquire(estimated_tokens)
+
+    def _retry_delay(self, attempt, error):
+        """
+        Returns how long to wait before retrying after error, or re-raises it if it must not be retried.
+        """
+        if attempt == self.max_retries or not is_retryable(error):
+            raise error
+        delay = self._backoff(attempt, error)
+        self.retries += 1
+        logger.warning(f"Chat completion failed ({error}); retry {attempt + 1} of {self.max_retries} in {delay:.2f}s")
+        return delay
+
+    async def _send(self, messages):
+        create = self.api_client.create_chat_completion
+        if asyncio.iscoroutinefunction(create):
+            return await create(model=self.model, messages=messages)
+        return await asyncio.to_thread(create, model=self.model, messages=messages)
+
+    def _backoff(self, attempt, error):
+        requested = retry_after(error)
+        if requested is not None:
+            # Every request waits out the server's delay, not just this one
+            self._paused_until = max(self._paused_until, time.monotonic() + requested)
+            return requested
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        return delay / 2 + random.uniform(0, delay / 2)
+
+    async def _wait_for_pause(self):
+        remaining = self._paused_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
+
+    def _record_usage(self, usage, estimated_tokens):
+        total_tokens = getattr(usage, 'total_tokens', None)
+        if self.token_bucket and isinstance(total_tokens, int):
+            self.token_bucket.adjust(estimated_tokens - total_tokens)
+
+    def _get_semaphore(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._semaphore = asyncio.Semaphore(self.max_in_flight)
+            self._loop = loop
+        return self._semaphore
+
+    def stats(self):
+        return {'requests': self.requests, 'retries': self.retries}
@@ -0,0 +1,102 @@
+# batch_executor.py
+
+import concurrent.futures
+import logging
+import os
+from utils import load_config_section
+
+logger = logging.getLogger(__name__)
+
+# Number of files handed to a worker process per task
+DEFAULT_CHUNK_SIZE = 4
+
+def run_job_chunk(job, file_paths, args):
+    """
+    Runs job over a chunk of files inside a worker, returning one result dict per file.
+    Errors are caught per file so one bad file does not fail the rest of the chunk.
+    """
+    results = []
+    for file_path in file_paths:
+        try:
+            output_file_path = job(file_path, *args)
+            results.append({'file_path': file_path, 'output_file_path': output_file_path, 'error': None})
+        except Exception as e:
+            logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
+            results.append({'file_path': file_path, 'output_file_path': None, 'error': str(e)})
+    return results
+
+class BatchExecutor:
+    """
+    Fans file jobs out over a process pool.
+
+    Files are submitted in chunks, with at most two chunks per worker in flight, and
+    per-file results are yielded as chunks complete. Small batches, or a single
+    worker, run inline without starting a pool.
+    """
+
+    def __init__(self, max_workers=None, chunk_size=None):
+        settings = load_config_section('batch')
+        self.max_workers = max_workers or settings.get('max_workers') or os.cpu_count() or 1
+        self.chunk_size = max(chunk_size or settings.get('chunk_size') or DEFAULT_CHUNK_SIZE, 1)
+
+    def iter_results(self, job, file_paths, *args, cancel_event=None):
+        """
+        Runs job(file_path, *args) for every file and yields result dicts
+        ({'file_path', 'output_file_path', 'error'}) in completion order.
+
+        :param job: Module-level function returning the output file path
+        :param cancel_event: Optional threading.Event; once set, no further files are started
+        """
+        file_paths = list(file_paths)
+        chunks = [file_paths[i:i + self.chunk_size] for i in range(0, len(file_paths), self.chunk_size)]
+        if self.max_workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                for file_path in chunk:
+                    if cancel_event is not None and cancel_event.is_set():
+                        return
+                    yield from run_job_chunk(job, [file_path], args)
+            return
+
+        workers = min(self.max_workers, len(chunks))
+        logger.info(f"Processing {len(file_paths)} files in {len(chunks)} chunks with {workers} worker processes")
+        with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = {}
+            chunks = iter(chunks)
+            try:
+                while True:
+                    while len(pending) < workers * 2 and not (cancel_event is not None and cancel_event.is_set()):
+                        chunk = next(chunks, None)
+                        if chunk is None:
+                            break
+                        pending[executor.submit(run_job_chunk, job, chunk, args)] = chunk
+                    if not pending:
+                        break
+                    done, _ = concurrent.futures.wait(pending, return_when=concurrent.futures.FIRST_COMPLETED)
+                    for future in done:
+                        chunk = pending.pop(future)
+                        try:
+                            yield from future.result()
+                        except Exception as e:
+                            # The worker itself failed (e.g. it crashed), so the whole chunk is lost
+                            logger.error(f"Worker failed while processing {len(chunk)} files: {e}", exc_info=True)
+                            for file_path in chunk:
+                                yield {'file_path': file_path, 'output_file_path': None, 'error': str(e)}
+            finally:
+                for future in pending:
+                    future.cancel()
+
+    def run(self, job, file_paths, *args, progress_callback=None, cancel_event=None):
+        """
+        Runs a batch to completion and returns the list of result dicts.
+
+        :param progress_callback: Optional callable(done, total, result) invoked after each file
+        """
+        file_paths = list(file_paths)
+        results = []
+        for result in self.iter_results(job, file_paths, *args, cancel_event=cancel_event):
+            results.append(result)
+            if progress_callback:
+                progress_callback(len(results), len(file_paths), result)
+        failed = sum(1 for result in results if result['error'])
+        logger.info(f"Batch finished: {len(results) - failed} succeeded, {failed} failed")
+        return results
@@ -0,0 +1,132 @@
+# batch_jobs.py
+#
+# File jobs run by BatchExecutor. They live at module level so worker processes can
+# unpickle them, and only import what the work needs (no tkinter, no API client).
+# Outputs whose content would not change are left untouched (skip_unchanged), so
+# re-running a batch does not rewrite them or bump their modification times.
+
+import itertools
+import logging
+import os
+from srt_handler import SRTHandler
+from subtitle_text import adjust_speech_rate
+from text_normalizer import default_normalizer
+
+logger = logging.getLogger(__name__)
+
+class OutputLayout:
+    """
+    Output file names for a batch, for jobs whose inputs come from nested directories.
+
+    Jobs accept one in place of an output directory. Files added with a relative output
+    name are written to that path below output_path (creating subdirectories as needed);
+    any other file is written under its base name.
+    """
+
+    def __init__(self, output_path):
+        self.output_path = output_path
+        self.output_names = {}
+        self._claimed = {}
+
+    def add(self, file_path, output_name):
+        """
+        Assigns output_name to file_path. Returns None, or the file that already has that
+        output name, in which case file_path is not added.
+        """
+        claim = os.path.normcase(os.path.normpath(output_name))
+        if claim in self._claimed:
+            return self._claimed[claim]
+        self._claimed[claim] = file_path
+        self.output_names[os.path.abspath(file_path)] = output_name
+        return None
+
+    def output_file_path(self, file_path):
+        output_name = self.output_names.get(os.path.abspath(file_path), os.path.basename(file_path))
+        return os.path.join(self.output_path, output_name)
+
+def _output_file_path(file_path, output_path):
+    if isinstance(output_path, OutputLayout):
+        output_file_path = output_path.output_file_path(file_path)
+        os.makedirs(os.path.dirname(output_file_path), exist_ok=True)
+        return output_file_path
+    return os.path.join(output_path, os.path.basename(file_path))
+
+def remove_punctuation_job(file_path, output_path):
+    srt_handler = SRTHandler(file_path, lazy=True)
+    subtitles = srt_handler.iter_subtitles()
+    output_file_path = _output_file_path(file_path, output_path)
+    srt_handler.save_subtitles(output_file_path, default_normalizer.iter_normalized(subtitles), skip_unchanged=True)
+    return output_file_path
+
+def adjust_timestamps_job(file_path, output_path, speech_rate, shorten_intervals):
+    srt_handler = SRTHandler(file_path, lazy=True)
+    output_file_path = _output_file_path(file_path, output_path)
+    srt_handler.save_subtitles(output_file_path, srt_handler.iter_adjusted_timestamps(speech_rate, shorten_intervals), skip_unchanged=True)
+    return output_file_path
+
+def adjust_speech_rate_job(file_path, output_path, speech_rate):
+    srt_handler = SRTHandler(file_path, lazy=True)
+    subtitles = srt_handler.iter_subtitles()
+    output_file_path = _output_file_path(file_path, output_path)
+    srt_handler.save_subtitles(output_file_path, (_with_text(subtitle, adjust_speech_rate(subtitle['text'], speech_rate)) for subtitle in subtitles), skip_unchanged=True)
+    return output_file_path
+
+def iter_translate_files(file_paths, output_path, target_language, cancel_event=None, translator=None, on_plan=None,
+                         journal=None):
+    """
+    Translates several files in one pass instead of one job per file.
+
+    The cues of all files are translated as one sequence, so a line repeated across
+    files (credits, recurring catchphrases) is sent once and fanned back out to every
+    file. Files are written in order as soon as all of their cues are translated.
+    Yields a result dict ({'file_path', 'output_file_path', 'error'}) per file, like
+    BatchExecutor.iter_results.
+
+    :param translator: Translator to use, by default one with the configured API client
+    :param on_plan: Optional callable(plan), called with the request plan before the
+        first request is sent (see Translator.plan_batches)
+    :param journal: Optional TranslationJournal; cues it holds are not translated again,
+        so an interrupted run can be resumed
+    """
+    if translator is None:
+        from translator import Translator
+        translator = Translator()
+    handlers = []
+    for file_path in file_paths:
+        try:
+            srt_handler = SRTHandler(file_path, lazy=True)
+            srt_handler.parse_srt_file(strict=True)  # An unreadable file fails instead of becoming an empty output
+            handlers.append((srt_handler, srt_handler.get_subtitles()))
+        except Exception as e:
+            logger.error(f"Failed to read {file_path}: {e}", exc_info=True)
+            yield {'file_path': file_path, 'output_file_path': None, 'error': str(e)}
+    texts = [text for _, subtitles in handlers for text in subtitles.get_texts()]
+    translations = translator.iter_translations(texts, target_language, cancel_event=cancel_event, on_plan=on_plan,
+                                                journal=journal)
+    for position, (srt_handler, subtitles) in enumerate(handlers):
+        try:
+            file_translations = list(itertools.islice(translations, len(subtitles)))
+        except Exception as e:
+            logger.error(f"Translation failed: {e}", exc_info=True)
+            # A failed request ends the shared stream, so every file not yet written fails with it
+            for failed_handler, _ in handlers[position:]:
+                yield {'file_path': failed_handler.file_path, 'output_file_path': None, 'error': str(e)}
+            return
+        if len(file_translations) < len(subtitles):
+            return  # Cancelled; the remaining files are left alone
+        try:
+            output_file_path = _output_file_path(srt_handler.file_path, output_path)
+            srt_handler.save_subtitles(output_file_path, subtitles.with_texts(file_translations), skip_unchanged=True)
+            yield {'file_path': srt_handler.file_path, 'output_file_path': output_file_path, 'error': None}
+        except Exception as e:
+            logger.error(f"Failed to write {srt_handler.file_path}: {e}", exc_info=True)
+            yield {'file_path': srt_handler.file_path, 'output_file_path': None, 'error': str(e)}
+
+def pipeline_job(file_path, output_path, stages):
+    # Stages are passed as plain spec dicts so they pickle; compiling them is cheap
+    from pipeline import Pipeline
+    return Pipeline(stages).run_file(file_path, _output_file_path(file_path, output_path))
+
+def _with_text(subtitle, text):
+    subtitle['text'] = text
+    return subtitle
@@ -0,0 +1,199 @@
+# benchmark.py
+#
+# Translation throughput benchmark against the local mock server, so changes to
+# concurrency, batching or caching can be measured offline and repeatably:
+#
+#   python -m benchmark --cues 2000 --latency lognormal:0.8,0.4 --rate-429 0.02
+#
+# Prints one JSON object per scenario run on stdout, like srttools.
+
+import argparse
+import contextlib
+import json
+import logging
+import math
+import random
+import sys
+import threading
+import time
+from mock_server import MockServer
+
+logger = logging.getLogger(__name__)
+
+SCENARIOS = ('subtitles', 'content')
+
+WORDS = ("we", "you", "never", "back", "home", "tonight", "the", "ship", "is", "leaving", "where", "did", "go",
+         "I", "told", "them", "everything", "about", "it", "what", "happened", "to", "your", "brother", "now")
+
+def make_texts(count, seed=0, repeat_ratio=0.1):
+    """
+    Returns count deterministic subtitle lines of 3 to 12 words. About repeat_ratio of
+    them repeat an earlier line, like credits and catchphrases in real subtitles.
+    """
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(count):
+        if texts and rng.random() < repeat_ratio:
+            texts.append(rng.choice(texts))
+        else:
+            line = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+            texts.append(line[0].upper() + line[1:] + rng.choice('.?!'))
+    return texts
+
+def make_subtitles(texts):
+    """
+    Returns one three-second cue per text.
+    """
+    return [{'index': index + 1, 'start_time': _timestamp(index * 3, 0), 'end_time': _timestamp(index * 3, 900), 'text': text}
+            for index, text in enumerate(texts)]
+
+def _timestamp(seconds, milliseconds):
+    return f"{seconds // 3600:02}:{seconds // 60 % 60:02}:{seconds % 60:02},{milliseconds:03}"
+
+def percentile(values, fraction):
+    """
+    Nearest-rank percentile of values, or None if there are none.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(math.ceil(fraction * len(ordered)), 1) - 1]
+
+class TimedAPIClient:
+    """
+    Wraps an async API client and records how long every request takes, from sending it
+    to the last byte of the reply, including requests that fail and are retried.
+    """
+
+    def __init__(self, api_client):
+        self.api_client = api_client
+        self.latencies = []
+        self._lock = threading.Lock()
+
+    async def create_chat_completion(self, model, messages):
+        started = time.perf_counter()
+        try:
+            return await self.api_client.create_chat_completion(model=model, messages=messages)
+        finally:
+            self._record(started)
+
+    async def stream_chat_completion(self, model, messages):
+        started = time.perf_counter()
+        try:
+            async with contextlib.aclosing(self.api_client.stream_chat_completion(model=model, messages=messages)) as chunks:
+                async for chunk in chunks:
+                    yield chunk
+        finally:
+            self._record(started)
+
+    def _record(self, started):
+        with self._lock:
+            self.latencies.append(time.perf_counter() - started)
+
+def make_translator(api_client, batch_size=None, max_in_flight=None, stream=True):
+    """
+    Returns a Translator with an in-memory cache and translation memory, so runs do not
+    touch (or benefit from) the on-disk ones.
+    """
+    from translator import Translator
+    from translation_cache import TranslationCache
+    from translation_memory import TranslationMemory
+    translator = Translator(api_client=api_client, batch_size=batch_size, max_in_flight=max_in_flight,
+                            cache=TranslationCache(':memory:'), memory=TranslationMemory(':memory:'))
+    translator.streaming = translator.streaming and stream
+    return translator
+
+def run_scenario(scenario, translator, texts, target_language='en'):
+    """
+    Translates texts through translate_subtitles (the batch job path) or
+    SubtitleOptimizer.translate_lines (the GUI's translate_content path) and returns
+    (seconds, seconds until the first translated cue, translations).
+    """
+    started = time.perf_counter()
+    first_cue = None
+    if scenario == 'subtitles':
+        translations = [subtitle['text'] for subtitle in translator.translate_subtitles(make_subtitles(texts), target_language)]
+    elif scenario == 'content':
+        from subtitle_optimizer import SubtitleOptimizer  # Deferred: imports tkinter
+
+        def report(done, total, message=None):
+            pass
+
+        def output(line):
+            nonlocal first_cue
+            if first_cue is None:
+                first_cue = time.perf_counter() - started
+
+        report.output = output
+        translations = SubtitleOptimizer.translate_lines(report, threading.Event(), texts, target_language,
+                                                         translator=translator).split('\n')
+    else:
+        raise ValueError(f"Unknown scenario: {scenario}")
+    return time.perf_counter() - started, first_cue, translations
+
+def run_benchmark(scenarios=SCENARIOS, cues=1000, repeat=1, batch_size=None, max_in_flight=None, stream=True, seed=0,
+                  **server_options):
+    """
+    Starts a MockServer with server_options, runs every scenario repeat times and
+    returns a list of result dicts. Repeats reuse the translator, so the second run
+    shows the effect of the translation cache.
+    """
+    from api_client import AsyncAPIClient
+    texts = make_texts(cues, seed)
+    results = []
+    with MockServer(seed=seed, **server_options) as server:
+        for scenario in scenarios:
+            api_client = TimedAPIClient(AsyncAPIClient(api_key='mock', base_url=server.url))
+            translator = make_translator(api_client, batch_size, max_in_flight, stream)
+            for run in range(1, repeat + 1):
+                stats_before = dict(server.stats)
+                api_client.latencies.clear()
+                seconds, first_cue, translations = run_scenario(scenario, translator, texts)
+                if translations != [f"en:{text}" for text in texts]:
+                    raise AssertionError(f"{scenario} returned wrong or misordered translations")
+                stats = {key: server.stats[key] - stats_before[key] for key in server.stats}
+                results.append({
+                    'scenario': scenario, 'run': run, 'cues': len(texts), 'seconds': round(seconds, 3),
+                    'cues_per_second': round(len(texts) / seconds, 1) if seconds else None,
+                    'first_cue_seconds': round(first_cue, 3) if first_cue is not None else None,
+                    'requests': stats['requests'], 'rate_limited': stats['rate_limited'],
+                    'server_errors': stats['server_errors'],
+                    'latency_p50': _rounded(percentile(api_client.latencies, 0.50)),
+                    'latency_p99': _rounded(percentile(api_client.latencies, 0.99)),
+                })
+    return results
+
+def _rounded(value):
+    return round(value, 4) if value is not None else None
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='benchmark', description="Translation throughput against a local mock server.")
+    parser.add_argument('--scenario', choices=SCENARIOS, action='append', help="scenario to run (default: all)")
+    parser.add_argument('--cues', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=1, help="runs per scenario; later runs are served from the cache")
+    parser.add_argument('--batch-size', type=int, default=None, help="most cues per request (default: [translation] batch_size)")
+    parser.add_argument('--max-in-flight', type=int, default=None, help="concurrent requests (default: [translation] max_in_flight)")
+    parser.add_argument('--no-stream', action='store_true', help="wait for whole replies instead of streaming them")
+    parser.add_argument('--latency', default='lognormal:0.5,0.4', help="request latency distribution, see mock_server")
+    parser.add_argument('--token-delay', type=float, default=0.002, help="seconds between streamed chunks")
+    parser.add_argument('--rate-429', type=float, default=0.0)
+    parser.add_argument('--rate-500', type=float, default=0.0)
+    parser.add_argument('--retry-after', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress details to stderr")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    results = run_benchmark(args.scenario or SCENARIOS, cues=args.cues, repeat=args.repeat, batch_size=args.batch_size,
+                            max_in_flight=args.max_in_flight, stream=not args.no_stream, seed=args.seed,
+                            latency=args.latency, token_delay=args.token_delay, rate_429=args.rate_429,
+                            rate_500=args.rate_500, retry_after=args.retry_after)
+    for result in results:
+        print(json.dumps(result), flush=True)
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,221 @@
+# cue_table.py
+
+from array import array
+from collections.abc import MutableMapping
+import logging
+import sys
+from timecode import parse_ms, format_ms
+
+logger = logging.getLogger(__name__)
+
+CUE_FIELDS = ('index', 'start_time', 'end_time', 'text')
+
+def _to_ms(value):
+    return parse_ms(value) if isinstance(value, str) else int(value)
+
+class Cue(MutableMapping):
+    """
+    Dict-like view of one row of a CueTable.
+
+    Reads and writes go straight to the table, so code written against the old
+    {'index', 'start_time', 'end_time', 'text'} dicts keeps working unchanged.
+    """
+    __slots__ = ('table', 'position')
+
+    def __init__(self, table, position):
+        self.table = table
+        self.position = position
+
+    @property
+    def start_ms(self):
+        return self.table.starts[self.position]
+
+    @property
+    def end_ms(self):
+        return self.table.ends[self.position]
+
+    def __getitem__(self, key):
+        table, position = self.table, self.position
+        if key == 'text':
+            return table.texts[table.text_refs[position]]
+        if key == 'start_time':
+            return format_ms(table.starts[position])
+        if key == 'end_time':
+            return format_ms(table.ends[position])
+        if key == 'index':
+            return table.indices[position]
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        table, position = self.table, self.position
+        if key == 'text':
+            table.text_refs[position] = table.intern_text(value)
+        elif key == 'start_time':
+            table.starts[position] = _to_ms(value)
+        elif key == 'end_time':
+            table.ends[position] = _to_ms(value)
+        elif key == 'index':
+            table.indices[position] = int(value)
+        else:
+            raise KeyError(key)
+
+    def __delitem__(self, key):
+        raise TypeError("Cue fields cannot be deleted")
+
+    def __iter__(self):
+        return iter(CUE_FIELDS)
+
+    def __len__(self):
+        return len(CUE_FIELDS)
+
+    def __repr__(self):
+        return f"Cue({dict(self)!r})"
+
+class CueTable:
+    """
+    Columnar store for parsed subtitles.
+
+    Indices and start/end times (in milliseconds) live in array('q') columns and
+    cue texts are interned in a single string pool, with each cue holding a
+    reference into the pool. Iterating or indexing the table yields Cue views
+    that behave like the dicts the rest of the application expects.
+    """
+
+    def __init__(self):
+        self.indices = array('q')
+        self.starts = array('q')
+        self.ends = array('q')
+        self.text_refs = array('i')
+        self.texts = []
+        self._text_ids = {}
+
+    @classmethod
+    def from_cues(cls, subtitles):
+        """
+        Builds a table from an iterable of subtitle dicts (or Cue views).
+        """
+        if isinstance(subtitles, CueTable):
+            return subtitles.copy()
+        table = cls()
+        for subtitle in subtitles:
+            table.append(subtitle['index'], subtitle['start_time'], subtitle['end_time'], subtitle['text'])
+        return table
+
+    def intern_text(self, text):
+        text_id = self._text_ids.get(text)
+        if text_id is None:
+            text_id = len(self.texts)
+            self.texts.append(sys.intern(text))
+            self._text_ids[text] = text_id
+        return text_id
+
+    def append(self, index, start_time, end_time, text):
+        """
+        Appends a cue. Times may be SRT timestamp strings or integer milliseconds.
+        """
+        self.indices.append(int(index))
+        self.starts.append(_to_ms(start_time))
+        self.ends.append(_to_ms(end_time))
+        self.text_refs.append(self.intern_text(text))
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return self._take(range(len(self))[position])
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("cue index out of range")
+        return Cue(self, position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield Cue(self, position)
+
+    def __eq__(self, other):
+        if isinstance(other, CueTable):
+            return (self.indices == other.indices and self.starts == other.starts and self.ends == other.ends
+                    and self.get_texts() == other.get_texts())
+        if isinstance(other, list):
+            return self.to_dicts() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return f"CueTable({len(self)} cues, {len(self.texts)} unique texts)"
+
+    def _take(self, positions):
+        table = CueTable()
+        for position in positions:
+            table.append(self.indices[position], self.starts[position], self.ends[position], self.texts[self.text_refs[position]])
+        return table
+
+    def get_texts(self):
+        texts = self.texts
+        return [texts[text_id] for text_id in self.text_refs]
+
+    def to_dicts(self):
+        return [dict(cue) for cue in self]
+
+    def copy(self):
+        return self.with_times(self.starts, self.ends)
+
+    def with_times(self, starts, ends):
+        """
+        Returns a new table with the given start/end columns and this table's indices and texts.
+        """
+        if len(starts) != len(self) or len(ends) != len(self):
+            raise ValueError("Timing columns must have one entry per cue")
+        table = CueTable()
+        table.indices = array('q', self.indices)
+        table.starts = array('q', starts)
+        table.ends = array('q', ends)
+        table.text_refs = array('i', self.text_refs)
+        table.texts = list(self.texts)
+        table._text_ids = dict(self._text_ids)
+        return table
+
+    def with_texts(self, texts):
+        """
+        Returns a new table with the same indices and timing and the given per-cue texts.
+        """
+        texts = list(texts)
+        if len(texts) != len(self):
+            raise ValueError("Expected one text per cue")
+        table = CueTable()
+        table.indices = array('q', self.indices)
+        table.starts = array('q', self.starts)
+        table.ends = array('q', self.ends)
+        table.text_refs = array('i', (table.intern_text(text) for text in texts))
+        return table
+
+    def map_texts(self, func):
+        """
+        Applies func to the cue texts in place. Each unique text is processed only once.
+        """
+        return self.map_text_pool(lambda texts: [func(text) for text in texts])
+
+    def map_text_pool(self, func):
+        """
+        Replaces the text pool in place with func(texts), where func maps the list of
+        unique texts to a list of the same length. Lets batch text engines process a
+        whole file in one call.
+        """
+        mapped = CueTable()
+        remap = array('i', (mapped.intern_text(text) for text in func(list(self.texts))))
+        if len(remap) != len(self.texts):
+            raise ValueError("Expected one result per text")
+        self.text_refs = array('i', (remap[text_id] for text_id in self.text_refs))
+        self.texts = mapped.texts
+        self._text_ids = mapped._text_ids
+        return self
+
+    def nbytes(self):
+        """
+        Approximate memory held by the table, in bytes.
+        """
+        columns = (self.indices, self.starts, self.ends, self.text_refs)
+        size = sum(column.buffer_info()[1] * column.itemsize for column in columns)
+        size += sys.getsizeof(self.texts) + sys.getsizeof(self._text_ids)
+        return size + sum(sys.getsizeof(text) for text in self.texts)
@@ -0,0 +1,219 @@
+# cue_viewer.py
+
+import tkinter as tk
+from tkinter import ttk
+import logging
+import os
+from localization import get_translation
+from srt_index import MappedSRTReader
+
+logger = logging.getLogger(__name__)
+
+# Cues rendered at once; everything else stays on disk until it is scrolled into view
+PAGE_SIZE = 40
+
+def parse_jump_time(time_text):
+    """
+    Converts HH:MM:SS,mmm, MM:SS or plain seconds to milliseconds. Raises ValueError for anything else.
+    """
+    parts = time_text.strip().replace(',', '.').split(':')
+    if len(parts) > 3:
+        raise ValueError(f"Invalid time: {time_text}")
+    seconds = 0.0
+    for part in parts:
+        seconds = seconds * 60 + float(part)
+    return round(seconds * 1000)
+
+class ParsedCueSource:
+    """
+    In-memory stand-in for MappedSRTReader, for files that cannot be memory-mapped (UTF-16).
+    """
+
+    def __init__(self, file_path):
+        from srt_handler import SRTHandler
+        self.table = SRTHandler(file_path).get_subtitles()
+
+    def __len__(self):
+        return len(self.table)
+
+    def window(self, first, count):
+        first = max(first, 0)
+        return self.table[first:first + count].to_dicts()
+
+    def position_at_time(self, time_ms):
+        for position, start_ms in enumerate(self.table.starts):
+            if start_ms > time_ms:
+                return max(position - 1, 0)
+        return max(len(self.table) - 1, 0)
+
+    def close(self):
+        self.table = None
+
+def open_cue_source(file_path):
+    try:
+        return MappedSRTReader(file_path)
+    except ValueError:
+        return ParsedCueSource(file_path)
+
+class CuePager:
+    """
+    Keeps track of the visible window of cues in one file. Only the file's cue index is
+    loaded when it is opened; cue text is decoded one page at a time.
+    """
+
+    def __init__(self, page_size=PAGE_SIZE):
+        self.page_size = page_size
+        self.source = None
+        self.file_path = None
+        self.first = 0
+
+    def open(self, file_path):
+        self.close()
+        self.source = open_cue_source(file_path)
+        self.file_path = file_path
+        self.first = 0
+
+    def close(self):
+        if self.source is not None:
+            self.source.close()
+        self.source = None
+        self.file_path = None
+        self.first = 0
+
+    def __len__(self):
+        return len(self.source) if self.source is not None else 0
+
+    def last_first(self):
+        return max(len(self) - self.page_size, 0)
+
+    def scroll_to(self, position):
+        self.first = min(max(int(position), 0), self.last_first())
+        return self.first
+
+    def scroll(self, count):
+        return self.scroll_to(self.first + count)
+
+    def moveto(self, fraction):
+        return self.scroll_to(round(float(fraction) * len(self)))
+
+    def jump_to_time(self, time_text):
+        """
+        Scrolls to the cue shown at a time given as HH:MM:SS,mmm, MM:SS or seconds.
+        """
+        time_ms = parse_jump_time(time_text)
+        if self.source is None:
+            return self.first
+        return self.scroll_to(self.source.position_at_time(time_ms))
+
+    def visible(self):
+        if self.source is None:
+            return []
+        return self.source.window(self.first, self.page_size)
+
+    def fractions(self):
+        if not len(self):
+            return 0.0, 1.0
+        return self.first / len(self), min(self.first + self.page_size, len(self)) / len(self)
+
+class CueViewer:
+    """
+    Paged subtitle viewer. Selecting files only records their paths; a file is indexed
+    when it is shown, and the text widget only ever holds one page of cues.
+    """
+
+    def __init__(self, parent, language='en', page_size=PAGE_SIZE):
+        self.parent = parent
+        self.language = language
+        self.file_paths = []
+        self.pager = CuePager(page_size)
+        self.create_ui()
+
+    def create_ui(self):
+        self.frame = tk.Frame(self.parent)
+
+        # Jump to file and jump to time
+        self.file_combobox = ttk.Combobox(self.frame, state='readonly', width=40)
+        self.file_combobox.grid(row=0, column=0, padx=5, pady=5, sticky='we')
+        self.file_combobox.bind('<<ComboboxSelected>>', lambda event: self.show_file(self.file_combobox.current()))
+
+        self.time_entry = tk.Entry(self.frame, width=12)
+        self.time_entry.insert(0, '00:00:00,000')
+        self.time_entry.grid(row=0, column=1, padx=5, pady=5)
+        self.time_entry.bind('<Return>', lambda event: self.jump_to_time())
+
+        self.jump_button = tk.Button(self.frame, text=get_translation("Jump to Time", self.language), command=self.jump_to_time)
+        self.jump_button.grid(row=0, column=2, padx=5, pady=5)
+
+        # One page of cues with a scrollbar driven by the cue position rather than the text
+        self.text = tk.Text(self.frame, wrap=tk.WORD, width=60, height=20)
+        self.text.grid(row=1, column=0, columnspan=3, sticky='nsew')
+        self.scrollbar = ttk.Scrollbar(self.frame, orient='vertical', command=self.yview)
+        self.scrollbar.grid(row=1, column=3, sticky='ns')
+        for sequence in ('<MouseWheel>', '<Button-4>', '<Button-5>'):
+            self.text.bind(sequence, self.on_mouse_wheel)
+
+        self.position_label = tk.Label(self.frame, text="")
+        self.position_label.grid(row=2, column=0, columnspan=3, sticky='w')
+
+    def grid(self, **kwargs):
+        self.frame.grid(**kwargs)
+
+    def set_files(self, file_paths):
+        self.file_paths = list(file_paths)
+        self.file_combobox['values'] = [os.path.basename(file_path) for file_path in self.file_paths]
+        if self.file_paths:
+            self.show_file(0)
+        else:
+            self.pager.close()
+            self.render()
+
+    def show_file(self, position):
+        if not 0 <= position < len(self.file_paths):
+            return
+        file_path = self.file_paths[position]
+        self.file_combobox.current(position)
+        try:
+            self.pager.open(file_path)
+            logger.info(f"Showing {len(self.pager)} cues from {file_path}")
+        except Exception as e:
+            logger.error(f"Error opening file for viewing: {file_path}. Error: {e}", exc_info=True)
+            self.pager.close()
+        self.render()
+
+    def jump_to_time(self):
+        try:
+            self.pager.jump_to_time(self.time_entry.get())
+        except ValueError:
+            logger.error(f"Invalid time: {self.time_entry.get()}")
+            return
+        self.render()
+
+    def yview(self, *args):
+        if args[0] == 'moveto':
+            self.pager.moveto(args[1])
+        elif args[0] == 'scroll':
+            count = int(args[1])
+            self.pager.scroll(count * self.pager.page_size if args[2] == 'pages' else count)
+        self.render()
+
+    def on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, 'delta', 0) > 0:
+            self.pager.scroll(-3)
+        else:
+            self.pager.scroll(3)
+        self.render()
+        return 'break'
+
+    def render(self):
+        self.text.config(state=tk.NORMAL)
+        self.text.delete('1.0', tk.END)
+        content = "\n\n".join(f"{subtitle['index']}\n{subtitle['start_time']} --> {subtitle['end_time']}\n{subtitle['text']}"
+                              for subtitle in self.pager.visible())
+        self.text.insert(tk.END, content)
+        self.text.config(state=tk.DISABLED)
+        self.scrollbar.set(*self.pager.fractions())
+        if len(self.pager):
+            last = min(self.pager.first + self.pager.page_size, len(self.pager))
+            self.position_label.config(text=f"{self.pager.first + 1}-{last} / {len(self.pager)}")
+        else:
+            self.position_label.config(text="")
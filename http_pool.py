@@ -0,0 +1,133 @@
+# http_pool.py
+
+import asyncio
+import atexit
+import logging
+import threading
+from utils import load_config_section
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the [http] settings. Connections default to the translation concurrency
+# ([translation] max_in_flight), since a streamed reply holds its connection throughout.
+DEFAULT_KEEPALIVE_EXPIRY = 90.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_READ_TIMEOUT = 120.0
+DEFAULT_WRITE_TIMEOUT = 30.0
+DEFAULT_POOL_TIMEOUT = 60.0
+
+def http_client_options(settings, max_in_flight):
+    """
+    Returns the keyword arguments for openai's Default(Async)HttpxClient built from the
+    [http] settings: connection limits, keep-alive, timeouts and, if the h2 package is
+    installed, HTTP/2.
+
+    The limit and timeout types are taken from the openai package, so they belong to
+    whichever HTTP library it was installed with (httpx, or httpx2 in newer releases).
+    """
+    import openai  # Deferred: only translation needs the HTTP stack
+    limits_type = type(openai.DEFAULT_CONNECTION_LIMITS)
+    max_connections = settings.get('max_connections') or max_in_flight
+    options = {
+        'limits': limits_type(max_connections=max_connections, max_keepalive_connections=max_connections,
+                              keepalive_expiry=settings.get('keepalive_expiry', DEFAULT_KEEPALIVE_EXPIRY)),
+        'timeout': openai.Timeout(connect=settings.get('connect_timeout', DEFAULT_CONNECT_TIMEOUT),
+                                  read=settings.get('read_timeout', DEFAULT_READ_TIMEOUT),
+                                  write=settings.get('write_timeout', DEFAULT_WRITE_TIMEOUT),
+                                  pool=settings.get('pool_timeout', DEFAULT_POOL_TIMEOUT)),
+    }
+    if settings.get('http2', False):
+        try:
+            import h2  # noqa: F401
+            options['http2'] = True
+        except ImportError:  # HTTP/2 is optional, keep-alive HTTP/1.1 works without it
+            logger.warning("http2 is enabled but the h2 package is not installed; using HTTP/1.1")
+    return options
+
+class LoopThread:
+    """
+    One event loop running on a daemon thread for the whole process.
+
+    Async HTTP clients belong to the loop they were first used in. Running every
+    translation on this loop lets one pooled client, with its warm connections, serve
+    all translators and all calling threads.
+    """
+
+    def __init__(self):
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name='http-loop', daemon=True)
+        self.thread.start()
+
+    def submit(self, coroutine):
+        """
+        Schedules a coroutine on the loop and returns a concurrent.futures.Future for its result.
+        """
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def run(self, coroutine):
+        """
+        Runs a coroutine on the loop and blocks the calling thread until it finishes.
+        """
+        future = self.submit(coroutine)
+        try:
+            return future.result()
+        except BaseException:
+            future.cancel()
+            raise
+
+    def stop(self):
+        if self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+            self.thread.join(5)
+
+_loop_thread = None
+_close_callbacks = []
+_lock = threading.Lock()
+
+def get_loop_thread():
+    global _loop_thread
+    if _loop_thread is None:
+        with _lock:
+            if _loop_thread is None:
+                _loop_thread = LoopThread()
+    return _loop_thread
+
+def run_coroutine(coroutine):
+    """
+    Runs a coroutine on the shared loop from any thread that is not the loop itself.
+    """
+    return get_loop_thread().run(coroutine)
+
+def is_shared_loop(loop):
+    return _loop_thread is not None and _loop_thread.loop is loop
+
+def register_close(callback):
+    """
+    Registers a function or coroutine function that closes a shared client when the process exits.
+    """
+    with _lock:
+        _close_callbacks.append(callback)
+
+def close_all():
+    """
+    Closes every registered client on the shared loop, then stops the loop. Registered with atexit.
+    """
+    global _loop_thread
+    with _lock:
+        callbacks = list(_close_callbacks)
+        _close_callbacks.clear()
+        loop_thread, _loop_thread = _loop_thread, None
+    for callback in callbacks:
+        try:
+            if not asyncio.iscoroutinefunction(callback):
+                callback()
+            elif loop_thread is not None:
+                loop_thread.run(callback())
+        except Exception as e:
+            logger.warning(f"Failed to close an HTTP client: {e}")
+    if loop_thread is not None:
+        loop_thread.stop()
+    if callbacks:
+        logger.info("Shared HTTP clients closed")
+
+atexit.register(close_all)
@@ -0,0 +1,115 @@
+# job_runner.py
+
+import logging
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Progress is applied to the widgets at most once per frame (about 30 times a second)
+FRAME_INTERVAL_MS = 33
+
+class JobRunner:
+    """
+    Runs one long task at a time on a background thread so the Tk event loop keeps running.
+
+    The task never touches widgets. It reports progress through report(done, total, message)
+    and checks cancel_event between units of work. Events go through a queue that the Tk
+    thread drains with root.after once per frame, so bursts of progress updates collapse
+    into the latest one and the callbacks always run on the Tk thread.
+
+    A task can also pass partial results to the Tk thread with report.output(item).
+    Unlike progress, every item is delivered, in the order it was sent.
+    """
+
+    def __init__(self, root, frame_interval_ms=FRAME_INTERVAL_MS):
+        self.root = root
+        self.frame_interval_ms = frame_interval_ms
+        self.cancel_event = threading.Event()
+        self.thread = None
+        self._events = None
+        self._callbacks = None
+
+    def is_running(self):
+        return self.thread is not None
+
+    def start(self, task, *args, on_progress=None, on_done=None, on_error=None, on_output=None):
+        """
+        Starts task(report, cancel_event, *args) on a worker thread.
+
+        :param on_progress: Optional callable(done, total, message), called on the Tk thread
+        :param on_done: Optional callable(result, cancelled), called on the Tk thread with the task's return value
+        :param on_error: Optional callable(exception), called on the Tk thread if the task raises
+        :param on_output: Optional callable(item), called on the Tk thread for every report.output(item)
+        """
+        if self.is_running():
+            raise RuntimeError("A job is already running")
+        # Every job gets its own queue and event, so nothing from a previous job can leak into it
+        self._events = queue.Queue()
+        self.cancel_event = threading.Event()
+        self._callbacks = (on_progress, on_done, on_error, on_output)
+        self.thread = threading.Thread(target=self._run, args=(task, args, self._events, self.cancel_event),
+                                       name=f"job-{getattr(task, '__name__', 'task')}", daemon=True)
+        self.thread.start()
+        self.root.after(self.frame_interval_ms, self._poll)
+
+    def cancel(self):
+        if self.is_running():
+            logger.info("Cancelling the running job")
+            self.cancel_event.set()
+
+    def _run(self, task, args, events, cancel_event):
+        def report(done, total, message=None):
+            events.put(('progress', (done, total, message)))
+
+        report.output = lambda item: events.put(('output', item))
+        try:
+            events.put(('done', task(report, cancel_event, *args)))
+        except Exception as e:
+            logger.error(f"Background job failed: {e}", exc_info=True)
+            events.put(('error', e))
+
+    def _poll(self):
+        progress = finished = None
+        outputs = []
+        while True:
+            try:
+                kind, payload = self._events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                progress = payload
+            elif kind == 'output':
+                outputs.append(payload)
+            else:
+                finished = (kind, payload)
+
+        on_progress, on_done, on_error, on_output = self._callbacks
+        if on_output:
+            for item in outputs:
+                on_output(item)
+        if progress is not None and on_progress:
+            on_progress(*progress)
+        if finished is None:
+            self.root.after(self.frame_interval_ms, self._poll)
+            return
+
+        self.thread = None
+        kind, payload = finished
+        if kind == 'done':
+            if on_done:
+                on_done(payload, self.cancel_event.is_set())
+        elif on_error:
+            on_error(payload)
+
+def batch_task(job, file_paths, *args):
+    """
+    Wraps a BatchExecutor run as a JobRunner task that reports one progress step per file
+    and returns the list of result dicts.
+    """
+    def task(report, cancel_event):
+        from batch_executor import BatchExecutor
+        return BatchExecutor().run(job, file_paths, *args, cancel_event=cancel_event,
+                                   progress_callback=lambda done, total, result: report(done, total, result['file_path']))
+    task.__name__ = getattr(job, '__name__', 'batch')
+    return task
@@ -26,7 +26,12 @@ translations = {
         'Error': 'Error',
         'No files uploaded for processing.': 'No files uploaded for processing.',
         'No output path selected.': 'No output path selected.',
-        'An error occurred while processing the file': 'An error occurred while processing the file'
+        'An error occurred while processing the file': 'An error occurred while processing the file',
+        'Cancel': 'Cancel',
+        'Processing Cancelled': 'Processing Cancelled',
+        'Jump to Time': 'Jump to Time',
+        'Run Pipeline': 'Run Pipeline',
+        'No pipeline selected.': 'No pipeline selected.'
     },
     'zh': {
         'Import SRT File': '导入SRT文件',
@@ -53,7 +58,12 @@ translations = {
         'Error': '错误',
         'No files uploaded for processing.': '没有文件上传进行处理。',
         'No output path selected.': '未选择输出路径。',
-        'An error occurred while processing the file': '处理文件时发生错误'
+        'An error occurred while processing the file': '处理文件时发生错误',
+        'Cancel': '取消',
+        'Processing Cancelled': '处理已取消',
+        'Jump to Time': '跳转到时间',
+        'Run Pipeline': '运行流水线',
+        'No pipeline selected.': '未选择流水线。'
     }
 }
 
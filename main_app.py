@@ -2,20 +2,30 @@ import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from tkinter import TclError
-from subtitle_toolbox import SubtitleToolbox
-from timestamp_optimizer import TimestampOptimizer
-from subtitle_optimizer import SubtitleOptimizer
-from standard_mode import StandardMode
-from config_ui import ConfigUI  # Add this import at the top
+import importlib
 import logging
 from logging_config import setup_logging
-import re
+from subtitle_text import adjust_speech_rate
+from text_normalizer import default_normalizer
 from utils import load_config  # Import the utility function for loading configuration
 
 # Setup logging
 setup_logging()
 logger = logging.getLogger(__name__)
 
+# Tabs in display order: (tab name, module, class). Modules are imported and tabs
+# are built the first time they are selected, so startup does not pay for the
+# translation stack (openai, httpx, pydantic) unless it is used.
+TABS = [
+    ('字幕内容格式处理工具箱', 'subtitle_toolbox', 'SubtitleToolbox'),
+    ('标准模式', 'standard_mode', 'StandardMode'),
+    ('字幕时间戳优化工具箱', 'timestamp_optimizer', 'TimestampOptimizer'),
+    ('srt字幕优化神器', 'subtitle_optimizer', 'SubtitleOptimizer'),
+]
+
+def load_class(module_name, class_name):
+    return getattr(importlib.import_module(module_name), class_name)
+
 class SRTTranslateTools:
     def __init__(self, root):
         self.root = root
@@ -66,23 +76,15 @@ class SRTTranslateTools:
         self.notebook = ttk.Notebook(self.root)
         self.notebook.pack(expand=1, fill='both')
 
-        # Create a frame for Subtitle Toolbox directly in the main content area
-        self.subtitle_toolbox_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.subtitle_toolbox_frame, text='字幕内容格式处理工具箱')
-        SubtitleToolbox(self.subtitle_toolbox_frame, self.language)
-
-        # Create a frame for Standard Mode directly in the main content area
-        self.standard_mode_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.standard_mode_frame, text='标准模式')
-        StandardMode(self.standard_mode_frame, self.language)
-
-        # Add Timestamp Optimizer tab using add_tab method
-        self.add_tab('字幕时间戳优化工具箱', TimestampOptimizer)
-
-        # Create a frame for Subtitle Optimizer directly in the main content area
-        self.subtitle_optimizer_frame = tk.Frame(self.notebook)
-        self.notebook.add(self.subtitle_optimizer_frame, text='srt字幕优化神器')
-        SubtitleOptimizer(self.subtitle_optimizer_frame, self.language)
+        # Register every tab with an empty frame; the content is built on first selection
+        self.tab_frames = {}
+        self.tab_widgets = {}
+        for tab_name, module_name, class_name in TABS:
+            self.add_tab(tab_name, module_name, class_name)
+        self.subtitle_toolbox_frame = self.tab_frames['字幕内容格式处理工具箱']
+        self.standard_mode_frame = self.tab_frames['标准模式']
+        self.subtitle_optimizer_frame = self.tab_frames['srt字幕优化神器']
+        self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
 
         # Add a button to open the configuration UI
         config_button = tk.Button(self.root, text="配置设置", command=self.open_config_ui)
@@ -101,26 +103,42 @@ class SRTTranslateTools:
         standard_mode_button = tk.Button(self.root, text="标准模式", command=lambda: self.switch_to_tab('标准模式'))
         standard_mode_button.pack(side=tk.LEFT, padx=5)
 
+        # Build the initially selected tab
+        self.build_tab(self.notebook.tab(self.notebook.select(), 'text'))
+
     def open_config_ui(self):
         config_window = tk.Toplevel(self.root)
         config_window.title("配置设置")
-        ConfigUI(config_window, language=self.language)
+        load_class('config_ui', 'ConfigUI')(config_window, language=self.language)
 
     def switch_to_tab(self, tab_name):
         try:
-            tab_index = self.notebook.index(tab_name)
+            tab_index = self.notebook.index(self.tab_frames[tab_name])
             logger.info(f"Switching to tab: {tab_name} (index: {tab_index})")
+            self.build_tab(tab_name)
             self.notebook.select(tab_index)
-        except TclError:
+        except (TclError, KeyError):
             logger.error(f"Tab '{tab_name}' not found. Unable to switch.")
             messagebox.showerror("错误", f"无法切换到标签: {tab_name}，标签未找到。")
 
-    def add_tab(self, tab_name, widget_class):
+    def add_tab(self, tab_name, module_name, class_name):
         frame = tk.Frame(self.notebook)
         self.notebook.add(frame, text=tab_name)
-
-        # Initialize the corresponding UI component for the tab
-        widget_class(frame, self.language)
+        self.tab_frames[tab_name] = frame
+        self.tab_widgets[tab_name] = (module_name, class_name)
+        return frame
+
+    def build_tab(self, tab_name):
+        # Initialize the corresponding UI component the first time the tab is shown
+        widget = self.tab_widgets.get(tab_name)
+        if isinstance(widget, tuple):
+            module_name, class_name = widget
+            logger.info(f"Building tab: {tab_name}")
+            self.tab_widgets[tab_name] = load_class(module_name, class_name)(self.tab_frames[tab_name], self.language)
+        return self.tab_widgets.get(tab_name)
+
+    def on_tab_changed(self, event):
+        self.build_tab(self.notebook.tab(self.notebook.select(), 'text'))
 
     def import_files(self):
         file_paths = filedialog.askopenfilenames(filetypes=[("SRT files", "*.srt")])
@@ -149,23 +167,20 @@ class SRTTranslateTools:
             messagebox.showerror("错误", "请输入有效的语速值")
             return
 
-        # Process uploaded SRT files
+        # Process uploaded SRT files, touching only the cue text so timestamps survive
+        from srt_handler import SRTHandler
         for file_path in self.file_paths:
             try:
-                with open(file_path, 'r', encoding='utf-8') as file:
-                    content = file.read()
-
-                # Apply speech rate
-                adjusted_content = self.adjust_speech_rate(content, speech_rate)
+                srt_handler = SRTHandler(file_path, lazy=True)
+                subtitles = ({**subtitle, 'text': self.adjust_speech_rate(subtitle['text'], speech_rate)} for subtitle in srt_handler.iter_subtitles())
 
                 # Remove punctuation if selected
                 if hasattr(self, 'punctuation_var') and self.punctuation_var.get():
-                    adjusted_content = self.remove_punctuation(adjusted_content)
+                    subtitles = default_normalizer.iter_normalized(subtitles)
 
                 # Save the processed file
-                output_file_path = f"{self.save_path}/{file_path.split('/')[-1]}"
-                with open(output_file_path, 'w', encoding='utf-8') as output_file:
-                    output_file.write(adjusted_content)
+                output_file_path = os.path.join(self.save_path, os.path.basename(file_path))
+                srt_handler.save_subtitles(output_file_path, subtitles)
 
             except Exception as e:
                 logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
@@ -176,132 +191,25 @@ class SRTTranslateTools:
         logger.info("File processing completed")
 
     def adjust_speech_rate(self, content, speech_rate):
-        logger.info("Adjusting speech rate")
-        lines = content.split('\n')
-        adjusted_lines = []
-        for line in lines:
-            words = line.split()
-            adjusted_words = []
-            for word in words:
-                adjusted_words.append(word)
-                if len(adjusted_words) >= speech_rate:
-                    adjusted_lines.append(' '.join(adjusted_words))
-                    adjusted_words = []
-            if adjusted_words:
-                adjusted_lines.append(' '.join(adjusted_words))
-        logger.info("Speech rate adjustment completed")
-        return '\n'.join(adjusted_lines)
+        return adjust_speech_rate(content, speech_rate)
 
     def remove_punctuation(self, content):
         logger.info("Removing punctuation from content")
-        return re.sub(r'[^\w\s]', '', content)
+        return default_normalizer.normalize(content)
 
     def start_timestamp_optimization(self):
         logger.info("Starting timestamp optimization...")
-        optimizer = TimestampOptimizer(self.root, self.language)
+        optimizer = load_class('timestamp_optimizer', 'TimestampOptimizer')(self.root, self.language)
         optimizer.process_files()  # Call the process method from TimestampOptimizer
 
     def start_subtitle_optimization(self):
         logger.info("Starting subtitle optimization...")
-        optimizer = SubtitleOptimizer(self.root, self.language)
+        optimizer = load_class('subtitle_optimizer', 'SubtitleOptimizer')(self.root, self.language)
         optimizer.process_files()  # Call the process method from SubtitleOptimizer
 
-# Define the StandardMode class with implemented functionality
-class StandardMode:
-    def __init__(self, frame, language):
-        self.frame = frame
-        self.language = language
-        self.output_path = None  # Initialize output path
-        self.create_ui()
-
-    def create_ui(self):
-        label = tk.Label(self.frame, text="这是标准模式的功能区", font=('Helvetica', 16))
-        label.pack(padx=10, pady=10)
-
-        # Input field for speech rate
-        self.speech_rate_label = tk.Label(self.frame, text="请输入语速（汉字/秒）", font=('Helvetica', 12))
-        self.speech_rate_label.pack(padx=10, pady=5)
-
-        self.speech_rate_entry = tk.Entry(self.frame)
-        self.speech_rate_entry.pack(padx=10, pady=5)
-
-        # Button to select output path
-        self.output_path_button = tk.Button(self.frame, text="选择输出路径", command=self.select_output_path)
-        self.output_path_button.pack(padx=10, pady=5)
-
-        # Button to start processing
-        self.process_button = tk.Button(self.frame, text="开始处理", command=self.start_processing)
-        self.process_button.pack(padx=10, pady=10)
-
-        # Button to clear input
-        self.clear_button = tk.Button(self.frame, text="清除输入", command=self.clear_input)
-        self.clear_button.pack(padx=10, pady=5)
-
-        logger.info("Standard Mode initialized")
-
-    def select_output_path(self):
-        self.output_path = filedialog.askdirectory()  # Open a dialog to select a directory
-        if self.output_path:
-            messagebox.showinfo("输出路径已选择", f"输出路径: {self.output_path}")
-            logger.info(f"Output path selected: {self.output_path}")
-
-    def start_processing(self):
-        try:
-            speech_rate = float(self.speech_rate_entry.get())
-            logger.info(f"Processing started with speech rate: {speech_rate}")
-
-            # Process uploaded SRT files
-            file_paths = self.get_srt_file_paths()
-            if not file_paths:
-                logger.error("No SRT files provided for processing")
-                messagebox.showerror("错误", "未提供SRT文件进行处理")
-                return
-
-            if not self.output_path:
-                logger.error("No output path selected")
-                messagebox.showerror("错误", "未选择输出路径")
-                return
-
-            for file_path in file_paths:
-                try:
-                    self.process_srt_file(file_path, speech_rate)
-                except Exception as e:
-                    logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
-                    messagebox.showerror("错误", f"处理文件时发生错误: {file_path}. Error: {e}")
-
-            messagebox.showinfo("处理完成", "处理成功完成。")
-            logger.info("Processing completed successfully in Standard Mode")
-        except ValueError as e:
-            logger.error("Invalid speech rate input", exc_info=True)
-            messagebox.showerror("错误", "请输入有效的语速值")
-        except Exception as e:
-            logger.error(f"Error during processing in Standard Mode: {e}", exc_info=True)
-            messagebox.showerror("错误", f"处理过程中发生错误: {e}")
-
-    def clear_input(self):
-        self.speech_rate_entry.delete(0, tk.END)
-        logger.info("Input cleared in Standard Mode")
-
-    def get_srt_file_paths(self):
-        file_paths = filedialog.askopenfilenames(filetypes=[("SRT files", "*.srt")])
-        return list(file_paths)
-
-    def process_srt_file(self, file_path, speech_rate):
-        logger.info(f"Processing SRT file: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-
-        # Remove punctuation from the content
-        processed_content = self.remove_punctuation(content)
-
-        # Save the modified file to the selected output path
-        output_file_path = os.path.join(self.output_path, os.path.splitext(os.path.basename(file_path))[0] + "_processed.srt")
-        with open(output_file_path, 'w', encoding='utf-8') as output_file:
-            output_file.write(processed_content)
-
-        logger.info(f"Processed SRT file saved to: {output_file_path}")
-
 if __name__ == "__main__":
+    import multiprocessing  # Only needed here, kept out of the import-time budget
+    multiprocessing.freeze_support()  # Batch worker processes in the frozen executable
     root = tk.Tk()
     app = SRTTranslateTools(root)
     root.mainloop()
\ No newline at end of file
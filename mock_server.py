@@ -0,0 +1,252 @@
+# mock_server.py
+#
+# Local stand-in for the DeepSeek (OpenAI-compatible) chat completions API, for tests
+# and benchmarks that must not depend on the real service:
+#
+#   python -m mock_server --port 8765 --latency lognormal:0.8,0.4 --rate-429 0.05
+#
+# Point a client at http://127.0.0.1:8765/v1 with any API key.
+
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import math
+import random
+import re
+import threading
+import time
+import uuid
+from token_budget import estimate_message_tokens, estimate_text_tokens
+
+logger = logging.getLogger(__name__)
+
+BATCH_LINE_PATTERN = re.compile(r'^(\d+)\|(.*)$')
+TARGET_LANGUAGE_PATTERN = re.compile(r'翻译成(.+?)[。，]')
+
+# Characters per streamed chunk, roughly one token
+STREAM_CHUNK_CHARS = 4
+
+def parse_latency(spec):
+    """
+    Parses a latency distribution into a callable(rng) returning seconds:
+    'fixed:S', 'uniform:LOW,HIGH', 'normal:MEAN,STDDEV', 'lognormal:MEDIAN,SIGMA' or
+    'exponential:MEAN'. Negative samples are clamped to zero.
+    """
+    kind, _, arguments = spec.partition(':')
+    try:
+        values = [float(value) for value in arguments.split(',')] if arguments else []
+    except ValueError:
+        raise ValueError(f"Invalid latency parameters: {spec}")
+    samplers = {
+        'fixed': (1, lambda rng, seconds: seconds),
+        'uniform': (2, lambda rng, low, high: rng.uniform(low, high)),
+        'normal': (2, lambda rng, mean, stddev: rng.gauss(mean, stddev)),
+        'lognormal': (2, lambda rng, median, sigma: rng.lognormvariate(math.log(median), sigma) if median > 0 else 0.0),
+        'exponential': (1, lambda rng, mean: rng.expovariate(1 / mean) if mean > 0 else 0.0),
+    }
+    if kind not in samplers or len(values) != samplers[kind][0]:
+        raise ValueError(f"Unknown latency distribution: {spec}")
+    sampler = samplers[kind][1]
+    return lambda rng: max(sampler(rng, *values), 0.0)
+
+def fake_translation(messages):
+    """
+    Deterministic stand-in for a translation: every cue becomes "<language>:<text>".
+    Numbered batch lines ("1|text") keep their numbers, like the real prompt asks for.
+    """
+    system = next((message['content'] for message in messages if message['role'] == 'system'), '')
+    match = TARGET_LANGUAGE_PATTERN.search(system)
+    target_language = match.group(1) if match else 'xx'
+    content = messages[-1]['content']
+    lines = content.splitlines()
+    if lines and all(BATCH_LINE_PATTERN.match(line) for line in lines):
+        return '\n'.join(f"{cue_id}|{target_language}:{text}" for cue_id, text in
+                         (BATCH_LINE_PATTERN.match(line).groups() for line in lines))
+    return f"{target_language}:{content}"
+
+class MockServer:
+    """
+    Threaded HTTP server implementing POST /v1/chat/completions, streamed and not.
+
+    Every request first waits for a latency drawn from the configured distribution,
+    then fails with a 429 (with a Retry-After header) or a 500 at the configured rates,
+    or answers with fake_translation. Streamed replies arrive in small chunks, token_delay
+    seconds apart. All randomness comes from one seeded generator, so a run can be
+    repeated. Connections are kept alive, as with the real API.
+
+    :param port: Port to listen on, 0 for any free port (see url)
+    :param latency: Distribution spec, see parse_latency
+    :param rate_429: Fraction of requests rejected as rate limited
+    :param rate_500: Fraction of requests failing with a server error
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, latency='fixed:0', token_delay=0.0, rate_429=0.0, rate_500=0.0,
+                 retry_after=0.5, seed=0):
+        self.sample_latency = parse_latency(latency)
+        self.token_delay = token_delay
+        self.rate_429 = rate_429
+        self.rate_500 = rate_500
+        self.retry_after = retry_after
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {'requests': 0, 'streamed': 0, 'rate_limited': 0, 'server_errors': 0}
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.mock = self
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name='mock-server', daemon=True)
+        self.thread.start()
+        logger.info(f"Mock chat completions server listening on {self.url}")
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def _draw(self):
+        """
+        Returns (latency, status) for the next request.
+        """
+        with self._lock:
+            self.stats['requests'] += 1
+            latency = self.sample_latency(self._random)
+            roll = self._random.random()
+            if roll < self.rate_429:
+                self.stats['rate_limited'] += 1
+                return latency, 429
+            if roll < self.rate_429 + self.rate_500:
+                self.stats['server_errors'] += 1
+                return latency, 500
+            return latency, 200
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            self._send_json(404, {'error': {'message': f"Unknown path {self.path}", 'type': 'invalid_request_error'}})
+            return
+        try:
+            request = json.loads(body)
+            messages = request['messages']
+        except (ValueError, KeyError, TypeError):
+            self._send_json(400, {'error': {'message': "Invalid request body", 'type': 'invalid_request_error'}})
+            return
+        mock = self.server.mock
+        latency, status = mock._draw()
+        time.sleep(latency)
+        if status == 429:
+            self._send_json(429, {'error': {'message': "Rate limit reached", 'type': 'rate_limit_error'}},
+                            {'Retry-After': str(mock.retry_after)})
+            return
+        if status == 500:
+            self._send_json(500, {'error': {'message': "Internal server error", 'type': 'server_error'}})
+            return
+        content = fake_translation(messages)
+        model = request.get('model', 'deepseek-chat')
+        prompt_tokens = estimate_message_tokens(messages)
+        completion_tokens = estimate_text_tokens(content)
+        usage = {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                 'total_tokens': prompt_tokens + completion_tokens}
+        if request.get('stream'):
+            with mock._lock:
+                mock.stats['streamed'] += 1
+            include_usage = (request.get('stream_options') or {}).get('include_usage', False)
+            self._stream(model, content, usage if include_usage else None, mock.token_delay)
+            return
+        self._send_json(200, {
+            'id': f"chatcmpl-{uuid.uuid4().hex}", 'object': 'chat.completion', 'created': int(time.time()), 'model': model,
+            'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+            'usage': usage,
+        })
+
+    def _stream(self, model, content, usage, token_delay):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        completion_id = f"chatcmpl-{uuid.uuid4().hex}"
+
+        def chunk(choices, **fields):
+            return {'id': completion_id, 'object': 'chat.completion.chunk', 'created': int(time.time()), 'model': model,
+                    'choices': choices, **fields}
+
+        try:
+            self._write_event(chunk([{'index': 0, 'delta': {'role': 'assistant', 'content': ''}, 'finish_reason': None}]))
+            for start in range(0, len(content), STREAM_CHUNK_CHARS):
+                if token_delay:
+                    time.sleep(token_delay)
+                piece = content[start:start + STREAM_CHUNK_CHARS]
+                self._write_event(chunk([{'index': 0, 'delta': {'content': piece}, 'finish_reason': None}]))
+            self._write_event(chunk([{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]))
+            if usage:
+                self._write_event(chunk([], usage=usage))
+            self._write_chunk(b'data: [DONE]\n\n')
+            self._write_chunk(b'')
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # The client stopped reading, e.g. after a cancel
+
+    def _write_event(self, data):
+        self._write_chunk(f"data: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8'))
+
+    def _write_chunk(self, data):
+        self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b'\r\n')
+        self.wfile.flush()
+
+    def _send_json(self, status, payload, headers=None):
+        data = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='mock_server', description="Local mock of the chat completions API.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', default='fixed:0', help="latency per request, e.g. fixed:0.2, uniform:0.1,0.5, lognormal:0.8,0.4")
+    parser.add_argument('--token-delay', type=float, default=0.0, help="seconds between streamed chunks")
+    parser.add_argument('--rate-429', type=float, default=0.0, help="fraction of requests rejected with 429")
+    parser.add_argument('--rate-500', type=float, default=0.0, help="fraction of requests failing with 500")
+    parser.add_argument('--retry-after', type=float, default=0.5, help="Retry-After seconds sent with a 429")
+    parser.add_argument('--seed', type=int, default=0)
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    server = MockServer(args.host, args.port, latency=args.latency, token_delay=args.token_delay, rate_429=args.rate_429,
+                        rate_500=args.rate_500, retry_after=args.retry_after, seed=args.seed)
+    print(f"Serving chat completions on {server.url}", flush=True)
+    try:
+        server.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.httpd.server_close()
+        logger.info(f"Mock server stopped: {server.stats}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+# parse_cache.py
+
+from collections import OrderedDict
+import logging
+import os
+import threading
+from utils import load_config_section
+
+logger = logging.getLogger(__name__)
+
+# Memory allowed for cached cue tables unless [cache] max_megabytes says otherwise
+DEFAULT_MAX_MEGABYTES = 256
+
+class ParseCache:
+    """
+    Process-wide cache of parsed subtitle files.
+
+    It lives in the memory of one process and is not shared between processes: the GUI
+    and batches BatchExecutor runs inline share it, but every worker process of a
+    parallel batch starts with an empty cache of its own.
+
+    Entries are keyed on the absolute path and validated against the file's size, mtime
+    and inode, so an edited or atomically replaced file is parsed again. The cue tables' memory is accounted with
+    CueTable.nbytes and the least recently used files are evicted once the total goes
+    over max_bytes. Callers always get their own copy of a cached table.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_MEGABYTES * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # abspath -> (signature, encoding, table, nbytes)
+        self._lock = threading.Lock()
+
+    def get_or_parse(self, file_path, encoding, parse):
+        """
+        Returns (table, encoding) for file_path, calling parse(file_path, encoding) on a miss.
+
+        :param encoding: Requested encoding, or None to accept whatever the cached parse detected
+        :param parse: Callable returning (CueTable, encoding)
+        """
+        key = os.path.abspath(file_path)
+        stat = os.stat(file_path)
+        cached = self._lookup(key, stat, encoding)
+        if cached is not None:
+            return cached
+        # Parse outside the lock so other threads are not held up by a large file
+        table, detected_encoding = parse(file_path, encoding)
+        self._store(key, stat, detected_encoding, table)
+        return table.copy(), detected_encoding
+
+    def peek(self, file_path):
+        """
+        Returns (table, encoding) if file_path is cached and unchanged on disk, otherwise None.
+        Never parses the file. A peek that finds nothing is not counted as a miss, since
+        no parse follows it.
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return self._lookup(os.path.abspath(file_path), stat, None, count_miss=False)
+
+    def _lookup(self, key, stat, encoding, count_miss=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                signature, cached_encoding, table, _ = entry
+                if signature == _signature(stat) and encoding in (None, cached_encoding):
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return table.copy(), cached_encoding
+            if count_miss:
+                self.misses += 1
+            return None
+
+    def _store(self, key, stat, encoding, table):
+        nbytes = table.nbytes()
+        if nbytes > self.max_bytes:
+            logger.info(f"Not caching {key}: {nbytes} bytes exceeds the parse cache limit")
+            return
+        with self._lock:
+            self._remove(key)
+            # The caller only ever receives copies, so its edits never reach the cached table
+            self._entries[key] = (_signature(stat), encoding, table, nbytes)
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                evicted_key = next(iter(self._entries))
+                self._remove(evicted_key)
+                logger.info(f"Evicted {evicted_key} from the parse cache")
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[3]
+
+    def invalidate(self, file_path=None):
+        """
+        Drops one file from the cache, or everything when no path is given.
+        """
+        with self._lock:
+            if file_path is None:
+                self._entries.clear()
+                self.current_bytes = 0
+            else:
+                self._remove(os.path.abspath(file_path))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {'entries': len(self), 'bytes': self.current_bytes, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses}
+
+def _signature(stat):
+    return (stat.st_size, stat.st_mtime_ns, stat.st_ino)
+
+_parse_cache = None
+_parse_cache_lock = threading.Lock()
+
+def get_parse_cache():
+    """
+    Returns the process-wide ParseCache, sized from [cache] max_megabytes on first use.
+    """
+    global _parse_cache
+    if _parse_cache is None:
+        with _parse_cache_lock:
+            if _parse_cache is None:
+                max_megabytes = load_config_section('cache').get('max_megabytes', DEFAULT_MAX_MEGABYTES)
+                _parse_cache = ParseCache(max_bytes=int(max_megabytes * 1024 * 1024))
+    return _parse_cache
@@ -0,0 +1,225 @@
+# pipeline.py
+#
+# Declarative transform pipelines. A pipeline is a list of stage specs such as
+#
+#   [{stage = "remove_punctuation"},
+#    {stage = "adjust_timestamps", speech_rate = 2.0, shorten_intervals = false},
+#    {stage = "speech_rate", speech_rate = 4.0}]
+#
+# compiled into one read, one pass over the cues and one write per file. Named
+# pipelines are stored in config.toml under [pipelines.<name>].
+
+from array import array
+import logging
+import os
+import toml
+from srt_handler import SRTHandler, write_text_atomic
+from subtitle_text import adjust_speech_rate
+from text_normalizer import TextNormalizer
+from timecode import parse_ms, format_ms, retime
+
+logger = logging.getLogger(__name__)
+
+# Cues transformed together; text stages see one list of this many texts at a time
+BATCH_SIZE = 2048
+
+def remove_punctuation_stage(punctuation='space', collapse_spaces=True):
+    return 'text', TextNormalizer(punctuation, collapse_spaces).normalize_many
+
+def adjust_timestamps_stage(speech_rate, shorten_intervals=False):
+    if speech_rate <= 0:
+        raise ValueError("speech_rate must be positive")
+
+    def apply(starts, ends):
+        return retime(starts, ends, speech_rate=speech_rate, min_duration=0 if shorten_intervals else None)
+    return 'timing', apply
+
+def speech_rate_stage(speech_rate):
+    if speech_rate <= 0:
+        raise ValueError("speech_rate must be positive")
+
+    def apply(texts):
+        return [adjust_speech_rate(text, speech_rate) for text in texts]
+    return 'text', apply
+
+STAGES = {
+    'remove_punctuation': remove_punctuation_stage,
+    'adjust_timestamps': adjust_timestamps_stage,
+    'speech_rate': speech_rate_stage,
+}
+
+class Pipeline:
+    """
+    A compiled list of stages.
+
+    Consecutive text stages are fused into one function over a batch of texts and
+    consecutive timing stages into one function over the start/end columns, so every
+    cue is read once, goes through all stages in a single pass and is written once.
+    """
+
+    def __init__(self, stages, name=None):
+        self.name = name
+        self.stages = [dict(stage) for stage in stages]
+        if not self.stages:
+            raise ValueError("A pipeline needs at least one stage")
+        self.steps = []
+        for spec in self.stages:
+            options = dict(spec)
+            stage_name = options.pop('stage', None)
+            if stage_name not in STAGES:
+                raise ValueError(f"Unknown pipeline stage: {stage_name}")
+            try:
+                kind, func = STAGES[stage_name](**options)
+            except TypeError as e:
+                raise ValueError(f"Invalid options for stage {stage_name}: {e}")
+            if self.steps and self.steps[-1][0] == kind:
+                self.steps[-1] = (kind, _compose(kind, self.steps[-1][1], func))
+            else:
+                self.steps.append((kind, func))
+        self.retimes = any(kind == 'timing' for kind, _ in self.steps)
+
+    def iter_cues(self, subtitles, batch_size=BATCH_SIZE):
+        """
+        Transforms an iterable of subtitles, yielding new subtitle dicts in order.
+        """
+        batch = []
+        for subtitle in subtitles:
+            batch.append(subtitle)
+            if len(batch) >= batch_size:
+                yield from self._apply(batch)
+                batch = []
+        if batch:
+            yield from self._apply(batch)
+
+    def _apply(self, subtitles):
+        texts = [subtitle['text'] for subtitle in subtitles]
+        if self.retimes:
+            starts = array('q', (parse_ms(subtitle['start_time']) for subtitle in subtitles))
+            ends = array('q', (parse_ms(subtitle['end_time']) for subtitle in subtitles))
+        for kind, func in self.steps:
+            if kind == 'text':
+                texts = func(texts)
+            else:
+                starts, ends = func(starts, ends)
+        for position, subtitle in enumerate(subtitles):
+            yield {
+                'index': subtitle['index'],
+                'start_time': format_ms(starts[position]) if self.retimes else subtitle['start_time'],
+                'end_time': format_ms(ends[position]) if self.retimes else subtitle['end_time'],
+                'text': texts[position]
+            }
+
+    def run_file(self, file_path, output_file_path):
+        """
+        Runs the pipeline over one file: cues are streamed from the source (or the parse
+        cache), transformed and written with a single atomic write. An output that
+        would not change is left untouched.
+        """
+        srt_handler = SRTHandler(file_path, lazy=True)
+        srt_handler.save_subtitles(output_file_path, self.iter_cues(srt_handler.iter_subtitles()), skip_unchanged=True)
+        return output_file_path
+
+def _compose(kind, first, second):
+    if kind == 'text':
+        return lambda texts: second(first(texts))
+    return lambda starts, ends: second(*first(starts, ends))
+
+def load_pipelines(config_file_path='config.toml'):
+    """
+    Returns the stage lists of the pipelines saved in the configuration file, by name.
+    """
+    try:
+        if os.path.exists(config_file_path):
+            pipelines = toml.load(config_file_path).get('pipelines', {})
+            return {name: pipeline.get('stages', []) for name, pipeline in pipelines.items()}
+    except Exception as e:
+        logger.error(f"Failed to load pipelines: {e}", exc_info=True)
+    return {}
+
+def load_pipeline(name, config_file_path='config.toml'):
+    pipelines = load_pipelines(config_file_path)
+    if name not in pipelines:
+        raise KeyError(f"No pipeline named '{name}' in {config_file_path}")
+    return Pipeline(pipelines[name], name=name)
+
+def save_pipeline(name, stages, config_file_path='config.toml'):
+    """
+    Validates a stage list and stores it as [pipelines.<name>] in the configuration file.
+
+    Only that table is replaced (or appended); the rest of the file, comments and order
+    included, is written back as it was.
+    """
+    Pipeline(stages, name=name)
+    stages = [dict(stage) for stage in stages]
+    text = ''
+    if os.path.exists(config_file_path):
+        with open(config_file_path, encoding='utf-8') as f:
+            text = f.read()
+    config = toml.loads(text)
+    updated = _replace_table(text.splitlines(keepends=True), ['pipelines', name], _format_pipeline(name, stages))
+    # Pipelines written in a form other than their own table (e.g. inline under
+    # [pipelines]) cannot be replaced line by line; refuse rather than corrupt the file
+    expected = dict(config, pipelines=dict(config.get('pipelines', {}), **{name: {'stages': stages}}))
+    if toml.loads(updated) != expected:
+        raise ValueError(f"Cannot update pipeline '{name}' in {config_file_path}; edit its [pipelines.{name}] table by hand")
+    write_text_atomic(config_file_path, [updated])
+    logger.info(f"Saved pipeline '{name}' to {config_file_path}")
+
+def _format_pipeline(name, stages):
+    encoder = toml.TomlEncoder()
+    lines = [toml.dumps({'pipelines': {name: {}}}), 'stages = [\n']
+    lines += [f"    {encoder.dump_inline_table(stage).strip()},\n" for stage in stages]
+    lines.append(']\n')
+    return ''.join(lines)
+
+def _replace_table(lines, path, table_text):
+    """
+    Returns the TOML text with the table at path (and its subtables) replaced by
+    table_text, or with table_text appended if there is no such table. Comments and
+    blank lines just before the next table are left to that table.
+    """
+    kept, position, inside, pending = [], None, False, []
+    for line in lines:
+        header = _table_path(line)
+        if header is not None:
+            inside = header[:len(path)] == path
+            if inside:
+                if position is None:
+                    position = len(kept)
+                pending = []
+                continue
+            kept += pending
+            pending = []
+        if not inside:
+            kept.append(line)
+        elif not line.strip() or line.lstrip().startswith('#'):
+            pending.append(line)
+        else:
+            pending = []
+    kept += pending
+    if position is None:
+        if kept and not kept[-1].endswith('\n'):
+            kept[-1] += '\n'
+        if kept and kept[-1].strip():
+            kept.append('\n')
+        return ''.join(kept) + table_text
+    return ''.join(kept[:position]) + table_text + ''.join(kept[position:])
+
+def _table_path(line):
+    """
+    Returns the key path of a [table] or [[array]] header line, or None for other lines.
+    """
+    stripped = line.strip()
+    if not stripped.startswith('['):
+        return None
+    try:
+        node = toml.loads(stripped)
+    except toml.TomlDecodeError:
+        return None  # e.g. a line of a multi-line array
+    path = []
+    while isinstance(node, dict) and len(node) == 1:
+        key, node = next(iter(node.items()))
+        path.append(key)
+        if isinstance(node, list):
+            node = node[0] if node else {}
+    return path
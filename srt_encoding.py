@@ -0,0 +1,73 @@
+# srt_encoding.py
+
+import codecs
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Only this many bytes from the start of a file are inspected when sniffing its encoding
+SNIFF_SIZE = 64 * 1024
+
+# Legacy Chinese encodings, in order of preference when both decode cleanly.
+# gb18030 is a superset of GBK/GB2312 and cp950 is the Windows superset of Big5.
+LEGACY_ENCODINGS = ('gb18030', 'cp950')
+
+# Very frequent simplified and traditional characters. Text decoded with the wrong
+# legacy codec turns into rare characters, so counting these picks the right one.
+COMMON_CHARACTERS = frozenset(
+    "的一是不了在人有我他这个们中来上大为和国地到以说时要就出会可也你对生能而子那得于着下自之年过发后作里用道行所然家种事成方多经么去法学如都同现当没动面起看定天分还进好小部其些主样理心她本前开但因只从想实日"
+    "這個們來為國說時會對於著發後裡種經麼學現當沒動還進樣開從實聽讓嗎啊呢吧"
+)
+
+BOMS = (
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16'),
+    (codecs.BOM_UTF16_BE, 'utf-16'),
+)
+
+def detect_encoding(file_path, sniff_size=SNIFF_SIZE):
+    """
+    Guesses the encoding of a subtitle file from a bounded prefix of its bytes.
+
+    Recognises UTF-8 and UTF-16 byte order marks, plain UTF-8, and GBK/GB18030 or Big5
+    encoded Chinese text. Falls back to UTF-8.
+    """
+    with open(file_path, 'rb') as file:
+        prefix = file.read(sniff_size)
+    encoding = detect_encoding_from_bytes(prefix, complete=len(prefix) < sniff_size)
+    logger.info(f"Detected encoding {encoding} for {file_path}")
+    return encoding
+
+def detect_encoding_from_bytes(prefix, complete=True):
+    """
+    Guesses the encoding of a byte string. When complete is False the prefix may end
+    in the middle of a multi-byte character.
+    """
+    for bom, encoding in BOMS:
+        if prefix.startswith(bom):
+            return encoding
+    if _decodes(prefix, 'utf-8', complete) is not None:
+        return 'utf-8'
+    scores = {}
+    for encoding in LEGACY_ENCODINGS:
+        text = _decodes(prefix, encoding, complete)
+        if text is not None:
+            scores[encoding] = sum(1 for char in text if char in COMMON_CHARACTERS)
+    if scores:
+        return max(LEGACY_ENCODINGS, key=lambda encoding: scores.get(encoding, -1))
+    return 'utf-8'
+
+def _decodes(data, encoding, complete):
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        # An incremental decoder tolerates a character cut off at the end of the prefix
+        return decoder.decode(data, final=complete)
+    except UnicodeDecodeError:
+        return None
+
+def is_ascii_compatible(encoding):
+    """
+    True if line feeds and ASCII digits are single bytes in this encoding, so lines
+    can be split at the byte level before decoding.
+    """
+    return not codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
@@ -3,42 +3,168 @@
 import re
 import logging
 import os
+import secrets
+from cue_table import CueTable
+from timecode import parse_ms, format_ms, retime, retime_cue
+from srt_encoding import detect_encoding, is_ascii_compatible
+from parse_cache import get_parse_cache
 
 logger = logging.getLogger(__name__)
 
+# Number of bytes read from disk per block when streaming cues
+BLOCK_SIZE = 64 * 1024
+
+# Output is encoded and handed to the OS in chunks of about this many characters
+WRITE_CHUNK_SIZE = 1024 * 1024
+
+TIMING_PATTERN = re.compile(r'(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})')
+
 class SRTHandler:
-    def __init__(self, file_path):
+    def __init__(self, file_path, lazy=False, encoding=None):
         self.file_path = file_path
-        self.subtitles = []
-        self.parse_srt_file()
+        self.lazy = lazy
+        self.encoding = encoding  # Detected from the file when not given
+        self.subtitles = CueTable()
+        if not lazy:
+            self.parse_srt_file()
 
-    def parse_srt_file(self):
+    def parse_srt_file(self, strict=False):
+        """
+        Parses the file into self.subtitles. Errors are logged and leave the table empty,
+        unless strict is set: then they are raised, and so is finding no cues in a
+        non-empty file, so batch jobs can report the file as failed.
+        """
         try:
-            with open(self.file_path, 'r', encoding='utf-8') as file:
-                content = file.read()
-            pattern = re.compile(r'(\d+)\n(\d{2}:\d{2}:\d{2},\d{3}) --> (\d{2}:\d{2}:\d{2},\d{3})\n([\s\S]*?)(?=\n\n|\Z)', re.MULTILINE)
-            matches = pattern.findall(content)
-            self.subtitles = [{
-                'index': int(match[0]),
-                'start_time': match[1],
-                'end_time': match[2],
-                'text': match[3].strip()
-            } for match in matches]
+            # Files parsed earlier in this process (and unchanged since) come from the shared cache
+            self.subtitles, self.encoding = get_parse_cache().get_or_parse(self.file_path, self.encoding, self._parse_file)
+            if not self.subtitles and os.path.getsize(self.file_path) > 0:
+                message = f"No subtitles found in non-empty SRT file: {self.file_path} (encoding: {self.encoding})"
+                if strict:
+                    raise ValueError(message)
+                logger.warning(message)
             logger.info(f"Parsed SRT file: {self.file_path}")
         except Exception as e:
             logger.error(f"Error parsing SRT file: {e}", exc_info=True)
+            if strict:
+                raise
+
+    @staticmethod
+    def _parse_file(file_path, encoding=None):
+        if encoding is None:
+            encoding = detect_encoding(file_path)
+        return CueTable.from_cues(SRTHandler.iter_cues(file_path, encoding=encoding)), encoding
+
+    @staticmethod
+    def iter_cues(file_path, block_size=BLOCK_SIZE, encoding=None):
+        """
+        Parses an SRT file incrementally, yielding one subtitle at a time.
+
+        The file is read in fixed-size binary blocks and split into lines at the byte
+        level (LF or CRLF), so memory use does not grow with the file size and no
+        normalized copy of the content is made. Each line is decoded on its own.
+
+        :param file_path: Path to the SRT file
+        :param block_size: Number of bytes read per block
+        :param encoding: Text encoding, sniffed from the start of the file when not given
+        """
+        if encoding is None:
+            encoding = detect_encoding(file_path)
+        if not is_ascii_compatible(encoding):
+            # UTF-16 cannot be split on single bytes; let the text layer handle newlines
+            with open(file_path, 'r', encoding=encoding, errors='replace') as file:
+                yield from SRTHandler._parse_lines(SRTHandler._iter_lines(file, block_size, '\n'))
+            return
+        with open(file_path, 'rb') as file:
+            lines = SRTHandler._iter_lines(file, block_size, b'\n')
+            yield from SRTHandler._parse_lines(SRTHandler._decode_lines(lines, encoding))
+
+    @staticmethod
+    def _iter_lines(file, block_size, separator):
+        pending = separator[:0]
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            lines = (pending + block).split(separator)
+            pending = lines.pop()  # The last line may continue in the next block
+            yield from lines
+        if pending:
+            yield pending
+
+    @staticmethod
+    def _decode_lines(lines, encoding):
+        if encoding == 'utf-8-sig':
+            # The BOM only appears on the first line; the rest is plain UTF-8
+            first_line = next(lines, None)
+            if first_line is None:
+                return
+            yield first_line.decode(encoding, errors='replace').rstrip('\r')
+            encoding = 'utf-8'
+        for line in lines:
+            yield line.decode(encoding, errors='replace').rstrip('\r')
+
+    @staticmethod
+    def _parse_lines(lines):
+        subtitle = None
+        text_lines = []
+        previous_line = None
+        for line in lines:
+            if subtitle is None:
+                # Looking for the timing line; the line before it must be the cue index
+                match = TIMING_PATTERN.match(line)
+                if match and previous_line is not None and previous_line.strip().isdecimal():
+                    subtitle = {
+                        'index': int(previous_line),
+                        'start_time': match.group(1),
+                        'end_time': match.group(2),
+                    }
+                previous_line = line
+            elif line.strip():
+                text_lines.append(line)
+            else:
+                # A blank line terminates the cue text
+                subtitle['text'] = '\n'.join(text_lines).strip()
+                yield subtitle
+                subtitle = None
+                text_lines = []
+                previous_line = None
+        if subtitle is not None:
+            subtitle['text'] = '\n'.join(text_lines).strip()
+            yield subtitle
+
+    @staticmethod
+    def open_mapped(file_path, **kwargs):
+        """
+        Opens an SRT file for random access without parsing it as a whole.
+
+        Returns a MappedSRTReader backed by a memory map and a cached cue offset index,
+        for previews and spot edits that only need a window of cues.
+        """
+        from srt_index import MappedSRTReader
+        return MappedSRTReader(file_path, **kwargs)
 
     def get_subtitles(self):
         return self.subtitles
 
+    def iter_subtitles(self):
+        """
+        Returns an iterator over the subtitles, streaming them from disk for lazy handlers.
+        """
+        if self.lazy:
+            # Reuse a table another tab already parsed; otherwise stream without filling the cache
+            cached = get_parse_cache().peek(self.file_path)
+            if cached is not None and self.encoding in (None, cached[1]):
+                self.encoding = cached[1]
+                return iter(cached[0])
+            return self.iter_cues(self.file_path, encoding=self.encoding)
+        return iter(self.subtitles)
+
     def extract_subtitle_text(self):
         try:
             base_name = os.path.basename(self.file_path)
             file_name, _ = os.path.splitext(base_name)
             output_file_path = os.path.join(os.path.dirname(self.file_path), f"{file_name}.txt")
-            with open(output_file_path, 'w', encoding='utf-8') as file:
-                for subtitle in self.subtitles:
-                    file.write(f"{subtitle['text']}\n")
+            write_text_atomic(output_file_path, self._iter_text_chunks(self.iter_subtitles()))
             logger.info(f"Extracted subtitle text to: {output_file_path}")
             return output_file_path
         except Exception as e:
@@ -56,53 +182,182 @@ class SRTHandler:
                 logger.error(f"Error merging subtitle text from file: {file_path}. Error: {e}", exc_info=True)
         return merged_text.strip()
 
-    def save_subtitles(self, output_file_path):
+    def save_subtitles(self, output_file_path, subtitles=None, skip_unchanged=False):
         """
         Saves the subtitles to an SRT file format at the specified path.
 
+        The output is built in large chunks and written to a temporary file that is then
+        atomically renamed over the target, so a crash never leaves a half-written file.
+        This also makes it safe to stream cues from the file being overwritten.
+
         :param output_file_path: Path to save the SRT file
+        :param subtitles: Optional iterable of subtitles to write instead of the parsed ones,
+            e.g. a generator from iter_cues, which is consumed as it is written
+        :param skip_unchanged: Leave the target untouched if its content would not change
+        :return: True if the file was written, False if it was skipped as unchanged
         """
+        if subtitles is None:
+            subtitles = self.iter_subtitles()
         try:
-            with open(output_file_path, 'w', encoding='utf-8') as file:
-                for subtitle in self.subtitles:
-                    file.write(f"{subtitle['index']}\n")
-                    file.write(f"{subtitle['start_time']} --> {subtitle['end_time']}\n")
-                    file.write(f"{subtitle['text']}\n\n")
-            logger.info(f"Subtitles saved to: {output_file_path}")
+            written = write_text_atomic(output_file_path, self._iter_srt_chunks(subtitles), skip_unchanged=skip_unchanged)
+            if written:
+                logger.info(f"Subtitles saved to: {output_file_path}")
+            else:
+                logger.info(f"Subtitles unchanged, skipped writing: {output_file_path}")
+            return written
         except Exception as e:
             logger.error(f"Error saving subtitles: {e}", exc_info=True)
+            raise
+
+    @staticmethod
+    def _iter_srt_chunks(subtitles, chunk_size=WRITE_CHUNK_SIZE):
+        if isinstance(subtitles, CueTable):
+            # Format straight from the columns instead of going through Cue views
+            texts = subtitles.texts
+            blocks = (f"{index}\n{format_ms(start)} --> {format_ms(end)}\n{texts[text_id]}\n\n"
+                      for index, start, end, text_id in zip(subtitles.indices, subtitles.starts, subtitles.ends, subtitles.text_refs))
+        else:
+            blocks = (f"{subtitle['index']}\n{subtitle['start_time']} --> {subtitle['end_time']}\n{subtitle['text']}\n\n"
+                      for subtitle in subtitles)
+        return _join_chunks(blocks, chunk_size)
+
+    @staticmethod
+    def _iter_text_chunks(subtitles, chunk_size=WRITE_CHUNK_SIZE):
+        return _join_chunks((f"{subtitle['text']}\n" for subtitle in subtitles), chunk_size)
 
     def adjust_timestamps(self, speech_rate, shorten_intervals, preview=False):
-        adjusted_subtitles = []
-        for subtitle in self.subtitles:
+        subtitles = CueTable.from_cues(self.iter_subtitles()) if self.lazy else self.subtitles
+        # Retime the whole file in one pass over the start/end columns
+        starts, ends = retime(subtitles.starts, subtitles.ends, speech_rate=speech_rate,
+                              min_duration=0 if shorten_intervals else None)
+        adjusted_subtitles = subtitles.with_times(starts, ends)
+
+        # The source file is left untouched; callers save the result where they need it
+        if not preview:
+            self.subtitles = adjusted_subtitles
+        return adjusted_subtitles
+
+    def iter_adjusted_timestamps(self, speech_rate, shorten_intervals, subtitles=None):
+        """
+        Yields the subtitles with timestamps adjusted for the speech rate, one at a time.
+        Produces exactly the same timings as adjust_timestamps.
+
+        :param subtitles: Optional iterable of subtitles, defaults to this handler's subtitles
+        """
+        if subtitles is None:
+            subtitles = self.iter_subtitles()
+        for subtitle in subtitles:
             # Adjust subtitle timestamps based on speech_rate and shorten_intervals
-            start_time = self.parse_time(subtitle['start_time'])
-            end_time = self.parse_time(subtitle['end_time'])
-            duration = end_time - start_time
-            adjusted_duration = duration / speech_rate
-            if shorten_intervals:
-                adjusted_duration = max(adjusted_duration, 0)
-            adjusted_end_time = start_time + adjusted_duration
-            adjusted_subtitle = {
+            start_time, adjusted_end_time = retime_cue(
+                self.parse_time(subtitle['start_time']), self.parse_time(subtitle['end_time']),
+                speech_rate=speech_rate, min_duration=0 if shorten_intervals else None)
+            yield {
                 'index': subtitle['index'],
                 'start_time': self.format_time(start_time),
                 'end_time': self.format_time(adjusted_end_time),
                 'text': subtitle['text']
             }
-            adjusted_subtitles.append(adjusted_subtitle)
-
-        if not preview:
-            self.subtitles = adjusted_subtitles
-            self.save_subtitles(self.file_path)
-        else:
-            return adjusted_subtitles
 
     def parse_time(self, time_str):
-        hours, minutes, seconds = map(float, time_str.split(':'))
-        return hours * 3600 + minutes * 60 + seconds
+        """
+        Parses an SRT timestamp into integer milliseconds.
+        """
+        return parse_ms(time_str)
 
     def format_time(self, time_value):
-        hours = int(time_value // 3600)
-        minutes = int((time_value % 3600) // 60)
-        seconds = time_value % 60
-        return f"{hours:02d}:{minutes:02d}:{seconds:06.3f}".replace('.', ',')
\ No newline at end of file
+        """
+        Formats integer milliseconds as an SRT timestamp.
+        """
+        return format_ms(time_value)
+
+def _join_chunks(parts, chunk_size):
+    buffer = []
+    size = 0
+    for part in parts:
+        buffer.append(part)
+        size += len(part)
+        if size >= chunk_size:
+            yield ''.join(buffer)
+            buffer = []
+            size = 0
+    if buffer:
+        yield ''.join(buffer)
+
+def _open_temp_file(file_path, prefix_file=None, prefix_size=0):
+    """
+    Creates a temporary file next to file_path and copies the first prefix_size bytes of
+    prefix_file into it. Returns (file, temp_path).
+
+    Unlike mkstemp's private 0600 files, the file gets the usual permissions (0666 less
+    the umask), so a new output is readable like any other file the user creates.
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{secrets.token_hex(4)}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, 'O_BINARY', 0), 0o666)
+            break
+        except FileExistsError:
+            continue
+    file = os.fdopen(fd, 'wb')
+    try:
+        if prefix_size:
+            prefix_file.seek(0)
+            while prefix_size:
+                block = prefix_file.read(min(prefix_size, WRITE_CHUNK_SIZE))
+                file.write(block)
+                prefix_size -= len(block)
+        return file, temp_path
+    except BaseException:
+        file.close()
+        os.remove(temp_path)
+        raise
+
+def write_text_atomic(file_path, chunks, encoding='utf-8', skip_unchanged=False):
+    """
+    Writes text chunks to a temporary file next to file_path and atomically renames it into place.
+
+    With skip_unchanged, the encoded chunks are compared with the existing file as they
+    come. No temporary file is created until they differ; the matching prefix is then
+    copied from the existing file, so nothing has to be buffered.
+
+    :param chunks: Iterable of strings, each written with a single write call
+    :param skip_unchanged: Keep the existing file if its content is the same
+    :return: True if the file was replaced, False if it was unchanged and skipped
+    """
+    existing = open(file_path, 'rb') if skip_unchanged and os.path.isfile(file_path) else None
+    file = temp_path = None
+    matched = 0
+    try:
+        for chunk in chunks:
+            data = chunk.encode(encoding)
+            if file is None and existing is not None and existing.read(len(data)) == data:
+                matched += len(data)
+                continue
+            if file is None:
+                file, temp_path = _open_temp_file(file_path, existing, matched)
+            file.write(data)
+        if file is None:
+            if existing is not None and not existing.read(1):
+                return False
+            file, temp_path = _open_temp_file(file_path, existing, matched)
+        if existing is not None:
+            existing.close()
+        with file:
+            file.flush()
+            os.fsync(file.fileno())
+        try:
+            os.chmod(temp_path, os.stat(file_path).st_mode)
+        except FileNotFoundError:
+            pass  # A new file keeps the permissions it was created with
+        os.replace(temp_path, file_path)
+        return True
+    except BaseException:
+        if file is not None:
+            file.close()
+        if temp_path is not None and os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    finally:
+        if existing is not None:
+            existing.close()
@@ -0,0 +1,222 @@
+# srt_index.py
+
+from app_dirs import user_cache_dir
+from array import array
+from bisect import bisect_right
+import hashlib
+import logging
+import mmap
+import os
+import re
+import struct
+import sys
+from timecode import parse_ms, format_ms
+from srt_encoding import detect_encoding, is_ascii_compatible
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.srtidx'
+
+# Subdirectory of the user cache directory holding the cue indexes
+INDEX_CACHE_DIR = 'cue_index'
+
+# Magic (format version and byte order), source size, source mtime_ns, cue count, sorted-by-start flag
+_INDEX_MAGIC = b'SRTIDX1' + (b'L' if sys.byteorder == 'little' else b'B')
+_INDEX_HEADER = struct.Struct('<8sQqQ?7x')
+
+def index_cache_path(file_path):
+    """
+    Returns where the cue index of file_path is cached: a file in the user cache
+    directory named by a hash of the file's absolute path, never next to the file itself.
+    """
+    digest = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8', 'surrogatepass'), digest_size=16).hexdigest()
+    return os.path.join(user_cache_dir(), INDEX_CACHE_DIR, digest + INDEX_SUFFIX)
+
+CUE_HEADER_PATTERN = re.compile(
+    rb'^(?:\xef\xbb\xbf)?(\d+)[ \t]*\r?\n(\d{2}:\d{2}:\d{2}[,.]\d{3}) --> (\d{2}:\d{2}:\d{2}[,.]\d{3})', re.MULTILINE)
+
+class MappedSRTReader:
+    """
+    Random-access reader for large SRT files.
+
+    The file is memory-mapped and scanned once to build an offset index holding the
+    byte position and timing of every cue. The index is cached in the user cache
+    directory (see index_cache_path; validated against the source size and mtime),
+    and is itself memory-mapped on reopen, so only the cues that are actually
+    requested are ever decoded.
+
+    :param index_path: Where to cache the index instead of the user cache directory
+    """
+
+    def __init__(self, file_path, encoding=None, index_path=None, use_index_cache=True):
+        self.file_path = file_path
+        self.encoding = encoding or detect_encoding(file_path)
+        if not is_ascii_compatible(self.encoding):
+            raise ValueError(f"Memory-mapped reading does not support {self.encoding} files: {file_path}")
+        self.index_path = index_path
+        if use_index_cache and index_path is None:
+            try:
+                self.index_path = index_cache_path(file_path)
+            except OSError as e:
+                logger.warning(f"Not caching the cue index of {file_path}: {e}")
+                use_index_cache = False
+        self.use_index_cache = use_index_cache
+        self.index_loaded_from_cache = False
+        self._file = open(file_path, 'rb')
+        stat = os.fstat(self._file.fileno())
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._index_file = None
+        self._index_map = None
+        if not (use_index_cache and self._load_index()):
+            self._build_index()
+            if use_index_cache:
+                self._save_index()
+
+    def _load_index(self):
+        try:
+            if not os.path.exists(self.index_path):
+                return False
+            index_file = open(self.index_path, 'rb')
+            try:
+                header = index_file.read(_INDEX_HEADER.size)
+                if len(header) < _INDEX_HEADER.size:
+                    raise ValueError("truncated header")
+                magic, size, mtime_ns, count, is_sorted = _INDEX_HEADER.unpack(header)
+                if magic != _INDEX_MAGIC or size != self.size or mtime_ns != self.mtime_ns:
+                    index_file.close()
+                    return False
+                expected_size = _INDEX_HEADER.size + 3 * 8 * count
+                if os.fstat(index_file.fileno()).st_size != expected_size:
+                    raise ValueError(f"{count} cues need {expected_size} bytes")
+                if count == 0:
+                    index_file.close()
+                    self.offsets = self.starts = self.ends = array('q')
+                else:
+                    index_map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+                    columns = memoryview(index_map)[_INDEX_HEADER.size:_INDEX_HEADER.size + 3 * 8 * count].cast('q')
+                    self.offsets = columns[0:count]
+                    self.starts = columns[count:2 * count]
+                    self.ends = columns[2 * count:3 * count]
+                    self._index_file, self._index_map = index_file, index_map
+            except Exception:
+                index_file.close()
+                raise
+            self.is_sorted = is_sorted
+            self.index_loaded_from_cache = True
+            logger.info(f"Loaded cue index for {self.file_path} from {self.index_path}")
+            return True
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable cue index {self.index_path}: {e}")
+            return False
+
+    def _build_index(self):
+        self.offsets, self.starts, self.ends = array('q'), array('q'), array('q')
+        if self._map is not None:
+            for match in CUE_HEADER_PATTERN.finditer(self._map):
+                self.offsets.append(match.start(1))
+                self.starts.append(parse_ms(match.group(2).decode('ascii')))
+                self.ends.append(parse_ms(match.group(3).decode('ascii')))
+        self.is_sorted = all(self.starts[i] <= self.starts[i + 1] for i in range(len(self.starts) - 1))
+        logger.info(f"Indexed {len(self.offsets)} cues in {self.file_path}")
+
+    def _save_index(self):
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+            with open(temp_path, 'wb') as index_file:
+                index_file.write(_INDEX_HEADER.pack(_INDEX_MAGIC, self.size, self.mtime_ns, len(self.offsets), self.is_sorted))
+                for column in (self.offsets, self.starts, self.ends):
+                    column.tofile(index_file)
+            os.replace(temp_path, self.index_path)
+        except OSError as e:
+            logger.warning(f"Could not write cue index {self.index_path}: {e}")
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self.cue(i) for i in range(len(self))[position]]
+        if position < 0:
+            position += len(self)
+        return self.cue(position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.cue(position)
+
+    def cue(self, position):
+        """
+        Decodes a single cue by its position in the file.
+        """
+        if not 0 <= position < len(self):
+            raise IndexError("cue index out of range")
+        end_offset = self.offsets[position + 1] if position + 1 < len(self) else self.size
+        lines = self._map[self.offsets[position]:end_offset].decode(self.encoding, errors='replace').splitlines()
+        text_lines = []
+        for line in lines[2:]:
+            if not line.strip():
+                break
+            text_lines.append(line)
+        return {
+            'index': int(lines[0]),
+            'start_time': format_ms(self.starts[position]),
+            'end_time': format_ms(self.ends[position]),
+            'text': '\n'.join(text_lines).strip()
+        }
+
+    def window(self, first, count):
+        """
+        Decodes count cues starting at position first.
+        """
+        first = max(first, 0)
+        return [self.cue(position) for position in range(first, min(first + count, len(self)))]
+
+    def position_at_time(self, time_ms):
+        """
+        Returns the position of the cue shown at time_ms, or of the last cue starting before it.
+        """
+        if not len(self):
+            return 0
+        if self.is_sorted:
+            return max(bisect_right(self.starts, time_ms) - 1, 0)
+        for position in range(len(self)):
+            if self.starts[position] <= time_ms < self.ends[position]:
+                return position
+        return 0
+
+    def cues_between(self, start_ms, end_ms):
+        """
+        Decodes the cues that overlap the interval [start_ms, end_ms).
+        """
+        if self.is_sorted:
+            first = self.position_at_time(start_ms)
+            last = bisect_right(self.starts, end_ms - 1)
+            positions = range(first, last)
+        else:
+            positions = range(len(self))
+        return [self.cue(position) for position in positions
+                if self.starts[position] < end_ms and self.ends[position] > start_ms]
+
+    def close(self):
+        if isinstance(self.offsets, memoryview):
+            for column in (self.offsets, self.starts, self.ends):
+                column.release()
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_file.close()
+            self._index_map = self._index_file = None
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,166 @@
+# srttools.py
+#
+# Headless command-line entry point for batch pipelines:
+#
+#   python -m srttools process episodes/*.srt -o out --operation remove-punctuation --jobs 8
+#
+# Progress is reported as one JSON object per line on stdout; logs go to stderr.
+# Nothing here imports tkinter, and the API client is only imported by translation jobs.
+
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+from batch_executor import BatchExecutor
+import batch_jobs
+
+logger = logging.getLogger(__name__)
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+OPERATIONS = {
+    'remove-punctuation': batch_jobs.remove_punctuation_job,
+    'adjust-timestamps': batch_jobs.adjust_timestamps_job,
+    'speech-rate': batch_jobs.adjust_speech_rate_job,
+}
+
+def expand_inputs(inputs):
+    """
+    Expands files, directories (searched recursively for .srt files) and glob patterns
+    into a de-duplicated list of (file_path, output_name) pairs, sorted per input.
+
+    A file found in a directory keeps its path relative to that directory as its output
+    name, so season1/e01.srt and season2/e01.srt do not overwrite each other. Files and
+    glob matches are named by their base name.
+    """
+    entries = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            matches = glob.glob(os.path.join(glob.escape(pattern), '**', '*.srt'), recursive=True)
+            entries.extend((path, os.path.relpath(path, pattern)) for path in sorted(matches))
+        elif os.path.isfile(pattern):
+            entries.append((pattern, os.path.basename(pattern)))
+        else:
+            matches = [path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path)]
+            entries.extend((path, os.path.basename(path)) for path in sorted(matches))
+    unique_entries = {}
+    for path, output_name in entries:
+        unique_entries.setdefault(os.path.abspath(path), (path, output_name))
+    return list(unique_entries.values())
+
+def emit(event, **fields):
+    print(json.dumps(dict(event=event, **fields), ensure_ascii=False), flush=True)
+
+def job_arguments(args):
+    if args.operation == 'adjust-timestamps':
+        return (args.speech_rate, args.shorten_intervals)
+    if args.operation == 'speech-rate':
+        return (args.speech_rate,)
+    if args.operation == 'translate':
+        return (args.target_language,)
+    return ()
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='srttools', description="Batch processing for SRT subtitle files.")
+    parser.add_argument('-v', '--verbose', action='store_true', help="log progress details to stderr")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    process = subparsers.add_parser('process', help="process SRT files, directories or glob patterns")
+    process.add_argument('inputs', nargs='+', help="SRT files, directories or glob patterns")
+    process.add_argument('-o', '--output', required=True, help="directory for the processed files")
+    process.add_argument('--operation', choices=sorted([*OPERATIONS, 'translate']), default='remove-punctuation')
+    process.add_argument('--pipeline', metavar='NAME', help="run the stages of [pipelines.NAME] in config.toml in one pass, instead of --operation")
+    process.add_argument('--speech-rate', type=float, default=2.0, help="speech rate for adjust-timestamps and speech-rate")
+    process.add_argument('--shorten-intervals', action='store_true', help="allow adjust-timestamps to shorten intervals")
+    process.add_argument('--target-language', help="target language for translate, e.g. en")
+    process.add_argument('--resume', action='store_true', help="continue an interrupted translate run into the same output directory, "
+                                                               "skipping the cues its journal records as done")
+    process.add_argument('--config', default='config.toml', help="configuration file holding the pipelines (default: config.toml)")
+    process.add_argument('-j', '--jobs', type=int, default=None, help="number of worker processes (default: [batch] max_workers or CPU count)")
+    process.add_argument('--chunk-size', type=int, default=None, help="files handed to a worker per task")
+    return parser
+
+def run_process(args):
+    if args.operation == 'translate' and not args.target_language and not args.pipeline:
+        emit('error', message="--target-language is required for translate")
+        return EXIT_USAGE
+    if args.speech_rate <= 0:
+        emit('error', message="--speech-rate must be positive")
+        return EXIT_USAGE
+
+    job, job_args, operation = OPERATIONS.get(args.operation), job_arguments(args), args.operation
+    if args.pipeline:
+        from pipeline import load_pipeline
+        try:
+            pipeline = load_pipeline(args.pipeline, args.config)
+        except (KeyError, ValueError) as e:
+            emit('error', message=e.args[0])
+            return EXIT_USAGE
+        job, job_args, operation = batch_jobs.pipeline_job, (pipeline.stages,), f"pipeline:{args.pipeline}"
+
+    entries = expand_inputs(args.inputs)
+    if not entries:
+        emit('error', message="No SRT files matched the given inputs")
+        return EXIT_USAGE
+    os.makedirs(args.output, exist_ok=True)
+    total = len(entries)
+    layout = batch_jobs.OutputLayout(args.output)
+    file_paths, collisions = [], []
+    for path, output_name in entries:
+        claimed_by = layout.add(path, output_name)
+        if claimed_by is None:
+            file_paths.append(path)
+        else:
+            collisions.append((path, claimed_by))
+
+    emit('start', operation=operation, total=total, output=args.output)
+    done = failed = 0
+    for path, claimed_by in collisions:
+        # Two inputs with the same output name: the first one keeps it, the others fail
+        # instead of silently overwriting it
+        done += 1
+        failed += 1
+        emit('file', done=done, total=total, file=path, output=None, ok=False,
+             error=f"Output {layout.output_file_path(claimed_by)} is already written for {claimed_by}")
+    journal = None
+    if args.operation == 'translate' and not args.pipeline:
+        from translation_journal import TranslationJournal, journal_path
+        # Every finished cue is journaled in the output directory until the run succeeds,
+        # so a run that dies halfway can be continued with --resume
+        journal = TranslationJournal(journal_path(args.output, args.target_language), resume=args.resume)
+        # Translation waits on the network, not the CPU: one pass over all files in this
+        # process lets lines repeated across files be translated once
+        results = batch_jobs.iter_translate_files(file_paths, layout, *job_args,
+                                                  on_plan=lambda plan: emit('plan', **plan), journal=journal)
+    else:
+        results = BatchExecutor(max_workers=args.jobs, chunk_size=args.chunk_size).iter_results(job, file_paths, layout, *job_args)
+    try:
+        for result in results:
+            done += 1
+            failed += bool(result['error'])
+            emit('file', done=done, total=total, file=result['file_path'], output=result['output_file_path'],
+                 ok=not result['error'], error=result['error'])
+    finally:
+        if journal is not None:
+            if done == total and not failed:
+                journal.remove()
+            else:
+                journal.close()
+    fields = {'journal': journal.path} if journal is not None and failed else {}
+    emit('finish', total=total, succeeded=done - failed, failed=failed, **fields)
+    return EXIT_FAILED if failed else EXIT_OK
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    logging.basicConfig(stream=sys.stderr, level=logging.INFO if args.verbose else logging.WARNING,
+                        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if args.command == 'process':
+        return run_process(args)
+    return EXIT_USAGE
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -3,8 +3,9 @@
 import tkinter as tk
 import logging
 from tkinter import messagebox, filedialog
-import re
 import os
+from srt_handler import SRTHandler
+from text_normalizer import default_normalizer
 
 logger = logging.getLogger(__name__)
 
@@ -89,19 +90,15 @@ class StandardMode:
 
     def process_srt_file(self, file_path, speech_rate):
         logger.info(f"Processing SRT file: {file_path}")
-        with open(file_path, 'r', encoding='utf-8') as file:
-            content = file.read()
-
-        # Remove punctuation from the content
-        processed_content = self.remove_punctuation(content)
+        # Only the cue text is normalized; indices and timestamps are written back untouched
+        srt_handler = SRTHandler(file_path)
+        subtitles = default_normalizer.normalize_table(srt_handler.get_subtitles())
 
         # Save the modified file to the selected output path
         output_file_path = os.path.join(self.output_path, os.path.splitext(os.path.basename(file_path))[0] + "_processed.srt")
-        with open(output_file_path, 'w', encoding='utf-8') as output_file:
-            output_file.write(processed_content)
+        srt_handler.save_subtitles(output_file_path, subtitles)
 
         logger.info(f"Processed SRT file saved to: {output_file_path}")
 
     def remove_punctuation(self, content):
-        # Remove punctuation using regex
-        return re.sub(r'[^\w\s]', '', content)
\ No newline at end of file
+        return default_normalizer.normalize(content)
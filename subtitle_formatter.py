@@ -1,10 +1,14 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, ttk
 import os
-import re
 import logging
-from srt_handler import SRTHandler
 from localization import get_translation
+from cue_viewer import CueViewer
+from batch_jobs import remove_punctuation_job
+from job_runner import JobRunner, batch_task
+from utils import show_batch_summary
+from subtitle_text import process_text
+from text_normalizer import default_normalizer
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +20,7 @@ class SubtitleFormatter:
 
         self.file_paths = []
         self.output_path = None
-        self.srt_handlers = []
+        self.job_runner = JobRunner(root)
 
         self.create_ui()
 
@@ -37,32 +41,36 @@ class SubtitleFormatter:
         # Listbox for file paths
         self.file_listbox = tk.Listbox(self.frame, width=60, height=10)
         self.file_listbox.grid(row=1, column=0, columnspan=3, padx=5, pady=5)
+        self.file_listbox.bind('<<ListboxSelect>>', self.on_file_selected)
 
-        # Text widget to display SRT content
-        self.subtitle_text = scrolledtext.ScrolledText(self.frame, wrap=tk.WORD, width=60, height=20)
-        self.subtitle_text.grid(row=2, column=0, columnspan=3, padx=5, pady=5)
+        # Paged viewer for the selected file's cues
+        self.cue_viewer = CueViewer(self.frame, self.language)
+        self.cue_viewer.grid(row=2, column=0, columnspan=3, padx=5, pady=5)
 
         # Progress bar
         self.progress = ttk.Progressbar(self.frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
+        self.progress.grid(row=3, column=0, columnspan=2, padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.frame, text=get_translation("Cancel", self.language), command=self.job_runner.cancel, state=tk.DISABLED)
+        self.cancel_button.grid(row=3, column=2, padx=5, pady=5)
 
     def upload_files(self):
         file_paths = filedialog.askopenfilenames(filetypes=[("SRT files", "*.srt")])
         if file_paths:
-            self.file_paths = file_paths
-            self.srt_handlers = [SRTHandler(file_path) for file_path in file_paths]
+            self.file_paths = file_paths  # Files are only opened when they are shown or processed
             self.file_listbox.delete(0, tk.END)
-            for file_path in file_paths:
-                self.file_listbox.insert(tk.END, file_path)
-                self.display_srt_content(file_path)
-            messagebox.showinfo(get_translation("Files Uploaded", self.language), f"{get_translation('Files Uploaded', self.language)}: {', '.join(file_paths)}")
+            self.file_listbox.insert(tk.END, *file_paths)
+            self.cue_viewer.set_files(file_paths)
+            messagebox.showinfo(get_translation("Files Uploaded", self.language), f"{get_translation('Files Uploaded', self.language)}: {len(file_paths)}")
             logger.info(f"Files uploaded: {', '.join(file_paths)}")
 
+    def on_file_selected(self, event):
+        selection = self.file_listbox.curselection()
+        if selection:
+            self.display_srt_content(self.file_paths[selection[0]])
+
     def display_srt_content(self, file_path):
-        srt_handler = SRTHandler(file_path)
-        subtitles = srt_handler.get_subtitles()
-        content = "\n\n".join([f"{subtitle['index']}\n{subtitle['start_time']} --> {subtitle['end_time']}\n{subtitle['text']}" for subtitle in subtitles])
-        self.subtitle_text.insert(tk.END, content + "\n\n")
+        self.cue_viewer.show_file(self.file_paths.index(file_path))
 
     def select_output_path(self):
         output_path = filedialog.askdirectory()
@@ -72,6 +80,9 @@ class SubtitleFormatter:
             logger.info(f"Output path selected: {output_path}")
 
     def remove_punctuation(self):
+        if self.job_runner.is_running():
+            return
+
         if not self.file_paths:
             messagebox.showerror(get_translation("Error", self.language), get_translation("No files uploaded for processing.", self.language))
             return
@@ -82,31 +93,35 @@ class SubtitleFormatter:
 
         self.progress["value"] = 0
         self.progress["maximum"] = len(self.file_paths)
+        self.set_running(True)
+        self.job_runner.start(batch_task(remove_punctuation_job, self.file_paths, self.output_path),
+                              on_progress=self.update_progress, on_done=self.on_batch_done, on_error=self.on_batch_error)
+
+    def set_running(self, running):
+        state = tk.DISABLED if running else tk.NORMAL
+        for button in (self.upload_button, self.remove_punctuation_button):
+            button.config(state=state)
+        self.cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
+
+    def update_progress(self, done, total, file_path):
+        self.progress["value"] = done
+
+    def on_batch_done(self, results, cancelled):
+        self.set_running(False)
+        show_batch_summary(results, self.language, cancelled=cancelled)
+        logger.info("Processing cancelled." if cancelled else "Processing completed successfully.")
+        if not cancelled:
+            self.open_file_location()
+
+    def on_batch_error(self, error):
+        self.set_running(False)
+        messagebox.showerror(get_translation("Error", self.language), f"{get_translation('An error occurred while processing the file', self.language)}: {error}")
 
-        for i, srt_handler in enumerate(self.srt_handlers):
-            try:
-                subtitles = srt_handler.get_subtitles()
-                for subtitle in subtitles:
-                    subtitle['text'] = self.process_text(subtitle['text'])
-                output_file_path = os.path.join(self.output_path, os.path.basename(srt_handler.file_path))
-                srt_handler.save_subtitles(output_file_path)
-                self.progress["value"] = i + 1
-                self.root.update_idletasks()
-                logger.info(f"Processed file: {output_file_path}")
-            except Exception as e:
-                logger.error(f"Error processing file: {e}", exc_info=True)
-                messagebox.showerror(get_translation("Error", self.language), f"{get_translation('An error occurred while processing the file', self.language)}: {e}")
-
-        messagebox.showinfo(get_translation("Processing Complete", self.language), get_translation("Processing completed successfully.", self.language))
-        logger.info("Processing completed successfully.")
-        self.open_file_location()
+    def process_subtitles(self, subtitles):
+        return default_normalizer.iter_normalized(subtitles)
 
     def process_text(self, text):
-        # Remove punctuation at the beginning and end of lines
-        text = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', text)
-        # Replace punctuation within lines with spaces
-        text = re.sub(r'[^\w\s]', ' ', text)
-        return text
+        return process_text(text)
 
     def open_file_location(self):
         if self.output_path:
@@ -3,12 +3,10 @@ from tkinter import filedialog, messagebox, scrolledtext, ttk, simpledialog
 from localization import get_translation
 import logging
 from srt_handler import SRTHandler
-import os
-from translator import Translator
 import re
-import concurrent.futures
-from utils import upload_files, select_output_path, show_error, adjust_speech_rate  # Consolidated utility functions
-from config import DEEPSEEK_API_KEY, DEEPSEEK_API_URL  # Import configuration settings
+from utils import upload_files, select_output_path, show_error, show_batch_summary  # Consolidated utility functions
+from batch_jobs import adjust_speech_rate_job
+from job_runner import JobRunner, batch_task
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +17,7 @@ class SubtitleOptimizer:
 
         self.file_paths = []
         self.output_path = None
+        self.job_runner = JobRunner(root)
 
         self.create_ui()
 
@@ -48,7 +47,10 @@ class SubtitleOptimizer:
 
         # Progress bar
         self.progress = ttk.Progressbar(self.frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.grid(row=3, column=0, columnspan=4, padx=5, pady=5)
+        self.progress.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.frame, text=get_translation("Cancel", self.language), command=self.job_runner.cancel, state=tk.DISABLED)
+        self.cancel_button.grid(row=3, column=3, padx=5, pady=5)
 
         # Speech rate input field
         self.speech_rate_label = tk.Label(self.frame, text=get_translation("请输入语速（汉字/秒）", self.language))
@@ -65,6 +67,13 @@ class SubtitleOptimizer:
         self.clear_input_button = tk.Button(self.frame, text=get_translation("清除输入", self.language), command=self.clear_input)
         self.clear_input_button.grid(row=4, column=3, padx=5, pady=5)
 
+        # Output path for the speech rate batch
+        self.output_path_button = tk.Button(self.frame, text=get_translation("选择文件输出路径", self.language), command=self.select_output_path)
+        self.output_path_button.grid(row=5, column=0, padx=5, pady=5)
+
+        self.output_path_label = tk.Label(self.frame, text="", wraplength=400)
+        self.output_path_label.grid(row=5, column=1, columnspan=3, padx=5, pady=5)
+
     def upload_files(self):
         file_paths = filedialog.askopenfilenames(filetypes=[("SRT files", "*.srt")])
         if file_paths:
@@ -75,44 +84,60 @@ class SubtitleOptimizer:
             messagebox.showinfo(get_translation("文件已上传", self.language), f"{get_translation('文件已上传', self.language)}: {', '.join(file_paths)}")
             logger.info(f"Files uploaded: {', '.join(file_paths)}")
 
+    def select_output_path(self):
+        output_path = select_output_path()  # Use utility function
+        if output_path:
+            self.output_path = output_path
+            self.output_path_label.config(text=f"{get_translation('输出路径', self.language)}: {output_path}")
+            logger.info(f"Output path selected: {output_path}")
+
     def extract_content(self):
+        if self.job_runner.is_running():
+            return
+
         if not self.file_paths:
             messagebox.showerror(get_translation("错误", self.language), get_translation("没有文件上传进行处理。", self.language))
             return
 
         self.progress["value"] = 0
         self.progress["maximum"] = len(self.file_paths)
+        self.set_running(True)
+        self.job_runner.start(self.extract_files, list(self.file_paths),
+                              on_progress=self.update_progress, on_done=self.on_extract_done, on_error=self.on_job_error)
 
+    @staticmethod
+    def extract_files(report, cancel_event, file_paths):
+        # Runs on the job thread: extracts every file to text and merges the results
         extracted_files = []
-        for i, file_path in enumerate(self.file_paths):
-            try:
-                srt_handler = SRTHandler(file_path)
-                content = srt_handler.extract_subtitle_text()
-                if content:
-                    extracted_files.append(content)
-                self.progress["value"] = i + 1
-                self.root.update_idletasks()
+        results = []
+        for i, file_path in enumerate(file_paths):
+            if cancel_event.is_set():
+                break
+            content = SRTHandler(file_path, lazy=True).extract_subtitle_text()
+            if content:
+                extracted_files.append(content)
                 logger.info(f"Extracted content from file: {file_path}")
-            except Exception as e:
-                logger.error(f"Error extracting content from file: {file_path}. Error: {e}", exc_info=True)
-                messagebox.showerror(get_translation("错误", self.language), f"{get_translation('处理文件时发生错误', self.language)}: {file_path}. Error: {e}")
-
-        if extracted_files:
-            try:
-                merged_content = SRTHandler.merge_subtitle_texts(extracted_files)
-                self.display_extracted_content(merged_content)
-            except Exception as e:
-                logger.error(f"Error merging subtitle texts: {e}", exc_info=True)
-                messagebox.showerror(get_translation("错误", self.language), f"{get_translation('合并字幕内容时发生错误', self.language)}: {e}")
-
-        messagebox.showinfo(get_translation("处理完成", self.language), get_translation("处理成功完成。", self.language))
-        logger.info("Content extraction completed successfully.")
+            results.append({'file_path': file_path, 'output_file_path': content, 'error': None if content else "extraction failed"})
+            report(i + 1, len(file_paths), file_path)
+        merged_content = SRTHandler.merge_subtitle_texts(extracted_files) if extracted_files else ""
+        return results, merged_content
+
+    def on_extract_done(self, outcome, cancelled):
+        self.set_running(False)
+        results, merged_content = outcome
+        if merged_content:
+            self.display_extracted_content(merged_content)
+        show_batch_summary(results, self.language, cancelled=cancelled)
+        logger.info("Content extraction cancelled." if cancelled else "Content extraction completed successfully.")
 
     def display_extracted_content(self, content):
         self.subtitle_text.insert(tk.END, content + "\n\n")
         self.merged_content = content
 
     def translate_content(self):
+        if self.job_runner.is_running():
+            return
+
         if not hasattr(self, 'merged_content') or not self.merged_content:
             messagebox.showerror(get_translation("错误", self.language), get_translation("没有提取的内容进行翻译。", self.language))
             return
@@ -121,27 +146,53 @@ class SubtitleOptimizer:
         if not target_language:
             return
 
+        # Every non-empty line is one cue; lines are translated in numbered batches and shown
+        # in order as soon as every line before them is done
+        lines = [line for line in self.merged_content.splitlines() if line.strip()]
         self.progress["value"] = 0
-        self.progress["maximum"] = 100  # Set a fixed maximum for the progress bar
-
-        try:
+        self.set_running(True)
+        self.job_runner.start(self.translate_lines, lines, target_language,
+                              on_progress=self.update_progress, on_done=self.on_translate_done,
+                              on_error=self.on_translate_error, on_output=self.display_translated_line)
+
+    @staticmethod
+    def translate_lines(report, cancel_event, lines, target_language, translator=None):
+        # Runs on the job thread, so the network calls never block the Tk event loop
+        if translator is None:
+            from translator import Translator  # Deferred: pulls in the OpenAI client stack
             translator = Translator()
-            with concurrent.futures.ThreadPoolExecutor() as executor:
-                chunks = self.split_translated_text(self.merged_content, 10)
-                future_to_text = {executor.submit(translator.translate_text, chunk, target_language): chunk for chunk in chunks}
-                translated_chunks = []
-                for future in concurrent.futures.as_completed(future_to_text):
-                    translated_chunks.append(future.result())
-            translated_content = ' '.join(translated_chunks)
-            self.display_translated_content(translated_content)
+        translated_lines = []
+
+        def on_plan(plan):
+            report(0, max(plan['requests'], 1), f"{plan['requests']} requests, ~{plan['input_tokens'] + plan['output_tokens']} tokens")
+
+        for translation in translator.iter_translations(lines, target_language, progress_callback=report,
+                                                        cancel_event=cancel_event, on_plan=on_plan):
+            translated_lines.append(translation)
+            report.output(translation)
+        return '\n'.join(translated_lines)
+
+    def on_translate_done(self, translated_content, cancelled):
+        self.set_running(False)
+        self.subtitle_text.insert(tk.END, "\n")
+        if cancelled:
+            messagebox.showinfo(get_translation("翻译完成", self.language), get_translation("Processing Cancelled", self.language))
+            logger.info("Translation cancelled.")
+        else:
             messagebox.showinfo(get_translation("翻译完成", self.language), get_translation("翻译成功完成。", self.language))
             logger.info("Translation completed successfully.")
-        except Exception as e:
-            logger.error(f"Error translating content: {e}", exc_info=True)
-            messagebox.showerror(get_translation("错误", self.language), f"{get_translation('翻译内容时发生错误', self.language)}: {e}")
 
-    def display_translated_content(self, content):
-        self.subtitle_text.insert(tk.END, content + "\n\n")
+    def on_translate_error(self, error):
+        self.set_running(False)
+        messagebox.showerror(get_translation("错误", self.language), f"{get_translation('翻译内容时发生错误', self.language)}: {error}")
+
+    def on_job_error(self, error):
+        self.set_running(False)
+        messagebox.showerror(get_translation("错误", self.language), f"{get_translation('处理文件时发生错误', self.language)}: {error}")
+
+    def display_translated_line(self, line):
+        self.subtitle_text.insert(tk.END, line + "\n")
+        self.subtitle_text.see(tk.END)
 
     def preview_subtitles(self):
         if not hasattr(self, 'merged_content') or not self.merged_content:
@@ -158,6 +209,9 @@ class SubtitleOptimizer:
         preview_text.config(state=tk.DISABLED)
 
     def start_processing(self):
+        if self.job_runner.is_running():
+            return
+
         if not self.file_paths:
             messagebox.showerror(get_translation("错误", self.language), get_translation("没有文件上传进行处理。", self.language))
             return
@@ -168,27 +222,30 @@ class SubtitleOptimizer:
             messagebox.showerror(get_translation("错误", self.language), get_translation("请输入有效的语速值。", self.language))
             return
 
+        if not self.output_path:
+            messagebox.showerror(get_translation("错误", self.language), get_translation("No output path selected.", self.language))
+            return
+
         self.progress["value"] = 0
         self.progress["maximum"] = len(self.file_paths)
-
-        for i, file_path in enumerate(self.file_paths):
-            try:
-                srt_handler = SRTHandler(file_path)
-                subtitles = srt_handler.get_subtitles()
-                for subtitle in subtitles:
-                    subtitle['text'] = adjust_speech_rate(subtitle['text'], speech_rate)  # Use utility function
-
-                output_file_path = os.path.join(self.output_path, os.path.basename(file_path))
-                srt_handler.save_subtitles(output_file_path)
-                self.progress["value"] = i + 1
-                self.root.update_idletasks()
-                logger.info(f"Processed file: {output_file_path}")
-            except Exception as e:
-                logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
-                messagebox.showerror(get_translation("错误", self.language), f"{get_translation('处理文件时发生错误', self.language)}: {file_path}. Error: {e}")
-
-        messagebox.showinfo(get_translation("处理完成", self.language), get_translation("文件处理完成。", self.language))
-        logger.info("File processing completed")
+        self.set_running(True)
+        self.job_runner.start(batch_task(adjust_speech_rate_job, self.file_paths, self.output_path, speech_rate),
+                              on_progress=self.update_progress, on_done=self.on_batch_done, on_error=self.on_job_error)
+
+    def set_running(self, running):
+        state = tk.DISABLED if running else tk.NORMAL
+        for button in (self.upload_button, self.extract_button, self.translate_button, self.start_processing_button):
+            button.config(state=state)
+        self.cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
+
+    def update_progress(self, done, total, message=None):
+        self.progress["maximum"] = total
+        self.progress["value"] = done
+
+    def on_batch_done(self, results, cancelled):
+        self.set_running(False)
+        show_batch_summary(results, self.language, cancelled=cancelled)
+        logger.info("File processing cancelled" if cancelled else "File processing completed")
 
     def clear_input(self):
         self.speech_rate_entry.delete(0, tk.END)
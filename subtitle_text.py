@@ -0,0 +1,27 @@
+# subtitle_text.py
+
+import logging
+from text_normalizer import default_normalizer
+
+logger = logging.getLogger(__name__)
+
+def process_text(text):
+    # Punctuation at the ends of a line is dropped, punctuation inside it becomes a space
+    return default_normalizer.normalize(text)
+
+def adjust_speech_rate(content, speech_rate):
+    logger.info("Adjusting speech rate")
+    lines = content.split('\n')
+    adjusted_lines = []
+    for line in lines:
+        words = line.split()
+        adjusted_words = []
+        for word in words:
+            adjusted_words.append(word)
+            if len(adjusted_words) >= speech_rate:
+                adjusted_lines.append(' '.join(adjusted_words))
+                adjusted_words = []
+        if adjusted_words:
+            adjusted_lines.append(' '.join(adjusted_words))
+    logger.info("Speech rate adjustment completed")
+    return '\n'.join(adjusted_lines)
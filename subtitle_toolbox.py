@@ -1,11 +1,14 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox, scrolledtext, ttk
+from tkinter import filedialog, messagebox, ttk
 from localization import get_translation
+from cue_viewer import CueViewer
 import logging
-from srt_handler import SRTHandler
 import os
-import re
-from utils import upload_files, select_output_path, show_error
+from utils import upload_files, select_output_path, show_error, show_batch_summary
+from batch_jobs import remove_punctuation_job, pipeline_job
+from pipeline import load_pipelines, load_pipeline
+from subtitle_text import process_text
+from job_runner import JobRunner, batch_task
 
 logger = logging.getLogger(__name__)
 
@@ -16,7 +19,7 @@ class SubtitleToolbox:
 
         self.file_paths = []  # Initialize an empty list to store file paths
         self.output_path = None
-        self.srt_handlers = []
+        self.job_runner = JobRunner(root)
 
         self.create_ui()
 
@@ -41,14 +44,18 @@ class SubtitleToolbox:
         # Listbox for file paths
         self.file_listbox = tk.Listbox(self.frame, width=60, height=10)
         self.file_listbox.grid(row=1, column=0, columnspan=4, padx=5, pady=5)
+        self.file_listbox.bind('<<ListboxSelect>>', self.on_file_selected)
 
-        # Text widget to display SRT content
-        self.subtitle_text = scrolledtext.ScrolledText(self.frame, wrap=tk.WORD, width=60, height=20)
-        self.subtitle_text.grid(row=2, column=0, columnspan=4, padx=5, pady=5)
+        # Paged viewer for the selected file's cues
+        self.cue_viewer = CueViewer(self.frame, self.language)
+        self.cue_viewer.grid(row=2, column=0, columnspan=4, padx=5, pady=5)
 
         # Progress bar
         self.progress = ttk.Progressbar(self.frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.grid(row=3, column=0, columnspan=4, padx=5, pady=5)
+        self.progress.grid(row=3, column=0, columnspan=3, padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.frame, text=get_translation("Cancel", self.language), command=self.job_runner.cancel, state=tk.DISABLED)
+        self.cancel_button.grid(row=3, column=3, padx=5, pady=5)
 
         # Status label
         self.status_label = tk.Label(self.frame, text="", wraplength=400)
@@ -56,7 +63,13 @@ class SubtitleToolbox:
 
         # Standard Mode button
         self.standard_mode_button = tk.Button(self.frame, text=get_translation("标准模式", self.language), command=self.open_standard_mode)
-        self.standard_mode_button.grid(row=5, column=0, columnspan=4, padx=5, pady=5)
+        self.standard_mode_button.grid(row=5, column=0, columnspan=2, padx=5, pady=5)
+
+        # Saved pipelines from config.toml, run as one pass per file
+        self.pipeline_combobox = ttk.Combobox(self.frame, state='readonly', values=sorted(load_pipelines()))
+        self.pipeline_combobox.grid(row=5, column=2, padx=5, pady=5)
+        self.pipeline_button = tk.Button(self.frame, text=get_translation("Run Pipeline", self.language), command=self.run_pipeline)
+        self.pipeline_button.grid(row=5, column=3, padx=5, pady=5)
 
     def open_standard_mode(self):
         logger.info("Opening Standard Mode")
@@ -66,20 +79,20 @@ class SubtitleToolbox:
     def upload_files(self):
         file_paths = filedialog.askopenfilenames(filetypes=[("SRT files", "*.srt")])  # Open file dialog to select SRT files
         if file_paths:
-            self.file_paths = file_paths  # Store the selected file paths
-            self.srt_handlers = [SRTHandler(file_path) for file_path in file_paths]  # Initialize SRT handlers
-            self.file_listbox.delete(0, tk.END)  # Clear the listbox
-            for file_path in file_paths:
-                self.file_listbox.insert(tk.END, file_path)  # Insert each file path into the listbox
-                self.display_srt_content(file_path)  # Display the content of the SRT file
-            messagebox.showinfo(get_translation("Files Uploaded", self.language), f"{get_translation('Files Uploaded', self.language)}: {', '.join(file_paths)}")
+            self.file_paths = file_paths  # Files are only opened when they are shown or processed
+            self.file_listbox.delete(0, tk.END)
+            self.file_listbox.insert(tk.END, *file_paths)
+            self.cue_viewer.set_files(file_paths)
+            messagebox.showinfo(get_translation("Files Uploaded", self.language), f"{get_translation('Files Uploaded', self.language)}: {len(file_paths)}")
             logger.info(f"Files uploaded: {', '.join(file_paths)}")
 
+    def on_file_selected(self, event):
+        selection = self.file_listbox.curselection()
+        if selection:
+            self.display_srt_content(self.file_paths[selection[0]])
+
     def display_srt_content(self, file_path):
-        srt_handler = SRTHandler(file_path)
-        subtitles = srt_handler.get_subtitles()
-        content = "\n\n".join([f"{subtitle['index']}\n{subtitle['start_time']} --> {subtitle['end_time']}\n{subtitle['text']}" for subtitle in subtitles])
-        self.subtitle_text.insert(tk.END, content + "\n\n")
+        self.cue_viewer.show_file(self.file_paths.index(file_path))
 
     def select_output_path(self):
         self.output_path = select_output_path()  # Use utility function
@@ -100,68 +113,63 @@ class SubtitleToolbox:
         return True
 
     def process_files(self):
-        if not self.validate_paths():
-            return
+        self.run_batch(remove_punctuation_job)
 
-        self.progress["value"] = 0
-        self.progress["maximum"] = len(self.file_paths)
-        self.status_label.config(text="Processing files...")
-
-        for i, file_path in enumerate(self.file_paths):
-            try:
-                srt_handler = SRTHandler(file_path)
-                subtitles = srt_handler.get_subtitles()
-                for subtitle in subtitles:
-                    subtitle['text'] = self.process_text(subtitle['text'])  # Remove punctuation from subtitle text
-                output_file_path = os.path.join(self.output_path, os.path.basename(srt_handler.file_path))
-                srt_handler.save_subtitles(output_file_path)  # Save the modified subtitles
-                self.progress["value"] = i + 1
-                self.status_label.config(text=f"Processed {i + 1} of {len(self.file_paths)} files")
-                self.root.update_idletasks()
-                logger.info(f"Processed file: {output_file_path}")
-            except Exception as e:
-                logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
-                show_error(f"{get_translation('An error occurred while processing the file', self.language)}: {file_path}. Error: {e}")
+    def remove_punctuation(self):
+        self.run_batch(remove_punctuation_job)
 
-        self.status_label.config(text="Processing completed successfully.")
-        messagebox.showinfo(get_translation("Processing Complete", self.language), get_translation("Processing completed successfully.", self.language))
-        logger.info("Processing completed successfully.")
-        self.open_file_location()
+    def run_pipeline(self):
+        name = self.pipeline_combobox.get()
+        if not name:
+            show_error(get_translation("No pipeline selected.", self.language))
+            return
+        try:
+            pipeline = load_pipeline(name)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Invalid pipeline {name}: {e}")
+            show_error(f"{name}: {e.args[0]}")
+            return
+        logger.info(f"Running pipeline {name}: {pipeline.stages}")
+        self.run_batch(pipeline_job, pipeline.stages)
 
-    def remove_punctuation(self):
-        if not self.validate_paths():
+    def run_batch(self, job, *args):
+        if not self.validate_paths() or self.job_runner.is_running():
             return
 
         self.progress["value"] = 0
         self.progress["maximum"] = len(self.file_paths)
         self.status_label.config(text="Processing files...")
-
-        for i, srt_handler in enumerate(self.srt_handlers):
-            try:
-                subtitles = srt_handler.get_subtitles()
-                for subtitle in subtitles:
-                    subtitle['text'] = self.process_text(subtitle['text'])  # Remove punctuation from subtitle text
-                output_file_path = os.path.join(self.output_path, os.path.basename(srt_handler.file_path))
-                srt_handler.save_subtitles(output_file_path)  # Save the modified subtitles
-                self.progress["value"] = i + 1
-                self.status_label.config(text=f"Processed {i + 1} of {len(self.file_paths)} files")
-                self.root.update_idletasks()
-                logger.info(f"Processed file: {output_file_path}")
-            except Exception as e:
-                logger.error(f"Error processing file: {srt_handler.file_path}. Error: {e}", exc_info=True)
-                show_error(f"{get_translation('An error occurred while processing the file', self.language)}: {srt_handler.file_path}. Error: {e}")
-
-        self.status_label.config(text="Processing completed successfully.")
-        messagebox.showinfo(get_translation("Processing Complete", self.language), get_translation("Processing completed successfully.", self.language))
-        logger.info("Processing completed successfully.")
-        self.open_file_location()
+        self.set_running(True)
+        self.job_runner.start(batch_task(job, self.file_paths, self.output_path, *args),
+                              on_progress=self.update_progress, on_done=self.on_batch_done, on_error=self.on_batch_error)
+
+    def set_running(self, running):
+        state = tk.DISABLED if running else tk.NORMAL
+        for button in (self.upload_button, self.remove_punctuation_button, self.process_button, self.pipeline_button):
+            button.config(state=state)
+        self.cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
+
+    def update_progress(self, done, total, file_path):
+        self.progress["value"] = done
+        self.status_label.config(text=f"Processed {done} of {total} files")
+
+    def on_batch_done(self, results, cancelled):
+        self.set_running(False)
+        failed = sum(1 for result in results if result['error'])
+        status = f"Processed {len(results) - failed} of {len(self.file_paths)} files, {failed} failed"
+        self.status_label.config(text=f"{status} ({get_translation('Processing Cancelled', self.language)})" if cancelled else status)
+        show_batch_summary(results, self.language, cancelled=cancelled)
+        logger.info("Processing cancelled." if cancelled else "Processing completed.")
+        if not cancelled:
+            self.open_file_location()
+
+    def on_batch_error(self, error):
+        self.set_running(False)
+        self.status_label.config(text="")
+        show_error(f"{get_translation('An error occurred while processing the file', self.language)}: {error}")
 
     def process_text(self, text):
-        # Remove punctuation at the beginning and end of lines
-        text = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', text)
-        # Replace punctuation within lines with spaces
-        text = re.sub(r'[^\w\s]', ' ', text)
-        return text
+        return process_text(text)
 
     def open_file_location(self):
         if self.output_path:
@@ -0,0 +1,161 @@
+# test_async_translator.py
+
+import unittest
+from async_translator import AsyncTranslationEngine, TokenBucket, SingleFlight, AbandonedError, retry_after
+from types import SimpleNamespace
+import asyncio
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+class FakeStatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        self.response = SimpleNamespace(headers=headers or {})
+
+class FlakyAsyncClient:
+    """
+    Fails the first len(errors) requests with the given errors, then echoes the last message.
+    """
+
+    def __init__(self, errors=(), delay=0.01):
+        self.errors = list(errors)
+        self.delay = delay
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def create_chat_completion(self, model, messages):
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            if self.errors:
+                raise self.errors.pop(0)
+            return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=messages[-1]['content']))],
+                                   usage=SimpleNamespace(total_tokens=10))
+        finally:
+            self.in_flight -= 1
+
+class FlakyStreamingClient:
+    """
+    Fails to open the first stream, then streams 'ab' and fails mid-reply if asked to.
+    """
+
+    def __init__(self, fail_midway=False):
+        self.fail_midway = fail_midway
+        self.calls = 0
+
+    async def stream_chat_completion(self, model, messages):
+        self.calls += 1
+        if self.calls == 1:
+            raise FakeStatusError(503)
+        for piece in 'ab':
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+            if self.fail_midway:
+                raise FakeStatusError(503)
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(total_tokens=5))
+
+def user_message(text):
+    return [{'role': 'user', 'content': text}]
+
+class TestAsyncTranslationEngine(unittest.TestCase):
+    def test_token_bucket(self):
+        logger.info("Testing the token bucket.")
+
+        async def drain():
+            bucket = TokenBucket(per_minute=6000, capacity=10)  # 100 tokens per second
+            start = time.monotonic()
+            for _ in range(30):
+                await bucket.acquire(1)
+            return time.monotonic() - start
+
+        self.assertGreaterEqual(asyncio.run(drain()), 0.19, "20 tokens beyond the burst need 0.2s at 100/s")
+        logger.info("Token bucket test completed successfully.")
+
+    def test_concurrency_and_rate_limit(self):
+        logger.info("Testing the in-flight limit and request rate.")
+        client = FlakyAsyncClient()
+        engine = AsyncTranslationEngine(client, 'model', max_in_flight=3, requests_per_minute=1200)
+        engine.request_bucket.tokens = 0  # Start empty: 20 requests per second
+
+        async def run():
+            start = time.monotonic()
+            responses = await asyncio.gather(*(engine.complete(user_message(str(i))) for i in range(10)))
+            return responses, time.monotonic() - start
+
+        responses, elapsed = asyncio.run(run())
+        self.assertEqual([response.choices[0].message.content for response in responses], [str(i) for i in range(10)])
+        self.assertLessEqual(client.max_in_flight, 3)
+        self.assertGreaterEqual(elapsed, 0.45)
+        logger.info("In-flight and rate limit test completed successfully.")
+
+    def test_retries(self):
+        logger.info("Testing retries with Retry-After and backoff.")
+        self.assertEqual(retry_after(FakeStatusError(429, {'retry-after': '2'})), 2.0)
+        self.assertEqual(retry_after(FakeStatusError(429, {'retry-after-ms': '250'})), 0.25)
+        self.assertIsNone(retry_after(FakeStatusError(500)))
+
+        client = FlakyAsyncClient([FakeStatusError(429, {'retry-after': '0.1'}), FakeStatusError(503)])
+        engine = AsyncTranslationEngine(client, 'model', base_delay=0.05)
+        start = time.monotonic()
+        response = asyncio.run(engine.complete(user_message('ok')))
+        self.assertEqual(response.choices[0].message.content, 'ok')
+        self.assertEqual(client.calls, 3)
+        self.assertGreaterEqual(time.monotonic() - start, 0.1)
+        self.assertEqual(engine.stats(), {'requests': 3, 'retries': 2})
+
+        client = FlakyAsyncClient([FakeStatusError(400)])
+        with self.assertRaises(FakeStatusError):
+            asyncio.run(AsyncTranslationEngine(client, 'model').complete(user_message('bad')))
+        self.assertEqual(client.calls, 1, "A bad request must not be retried")
+
+        client = FlakyAsyncClient([FakeStatusError(500)] * 3)
+        with self.assertRaises(FakeStatusError):
+            asyncio.run(AsyncTranslationEngine(client, 'model', max_retries=2, base_delay=0.01).complete(user_message('x')))
+        self.assertEqual(client.calls, 3)
+        logger.info("Retry test completed successfully.")
+
+    def test_stream(self):
+        logger.info("Testing streamed completions.")
+
+        async def collect(engine):
+            return [piece async for piece in engine.stream(user_message('x'))]
+
+        client = FlakyStreamingClient()
+        engine = AsyncTranslationEngine(client, 'model', base_delay=0.01, tokens_per_minute=1000)
+        self.assertEqual(asyncio.run(collect(engine)), ['a', 'b'])
+        self.assertEqual(client.calls, 2, "A stream that fails before any text should be retried")
+
+        client = FlakyStreamingClient(fail_midway=True)
+        with self.assertRaises(FakeStatusError):
+            asyncio.run(collect(AsyncTranslationEngine(client, 'model', base_delay=0.01)))
+        self.assertEqual(client.calls, 2, "A stream that fails after text was yielded cannot be retried")
+        logger.info("Streamed completion test completed successfully.")
+
+    def test_single_flight(self):
+        logger.info("Testing in-flight request coalescing.")
+
+        async def run():
+            single_flight = SingleFlight()
+            owned, shared = single_flight.claim(['a', 'b'])
+            self.assertEqual((owned, shared), (['a', 'b'], {}))
+            owned, shared = single_flight.claim(['b', 'c'])
+            self.assertEqual(owned, ['c'])
+            single_flight.resolve('b', 'B')
+            self.assertEqual(await shared['b'], 'B')
+            _, shared = single_flight.claim(['a'])
+            single_flight.abandon(['a', 'c'])
+            with self.assertRaises(AbandonedError):
+                await shared['a']
+            self.assertEqual(len(single_flight), 0)
+            self.assertEqual(single_flight.claim(['a'])[0], ['a'], "An abandoned key can be claimed again")
+
+        asyncio.run(run())
+        logger.info("In-flight coalescing test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+# test_batch_executor.py
+
+import unittest
+from batch_executor import BatchExecutor
+from batch_jobs import remove_punctuation_job, adjust_timestamps_job
+from srt_handler import SRTHandler
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+class TestBatchExecutor(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'input')
+        self.output_dir = os.path.join(self.temp_dir.name, 'output')
+        os.makedirs(self.input_dir)
+        os.makedirs(self.output_dir)
+        self.file_paths = []
+        for i in range(5):
+            file_path = os.path.join(self.input_dir, f'episode{i}.srt')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(f"1\n00:00:01,000 --> 00:00:03,000\nHello, World {i}!\n\n")
+            self.file_paths.append(file_path)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_process_pool_collects_results_and_errors(self):
+        logger.info("Testing batch processing over a process pool.")
+        missing_file_path = os.path.join(self.input_dir, 'missing.srt')
+        progress = []
+        results = BatchExecutor(max_workers=2, chunk_size=2).run(
+            remove_punctuation_job, self.file_paths + [missing_file_path], self.output_dir,
+            progress_callback=lambda done, total, result: progress.append((done, total)))
+        self.assertEqual(len(results), 6)
+        self.assertEqual(progress[-1], (6, 6))
+        errors = {result['file_path']: result['error'] for result in results}
+        self.assertIsNotNone(errors.pop(missing_file_path))
+        self.assertEqual(set(errors.values()), {None})
+        subtitles = SRTHandler(os.path.join(self.output_dir, 'episode3.srt')).get_subtitles()
+        self.assertEqual(subtitles[0]['text'], 'Hello World 3')
+        logger.info("Process pool batch test completed successfully.")
+
+    def test_inline_and_cancel(self):
+        logger.info("Testing inline batches and cancellation.")
+        results = BatchExecutor(max_workers=1).run(adjust_timestamps_job, self.file_paths, self.output_dir, 2.0, True)
+        self.assertTrue(all(result['error'] is None for result in results))
+        subtitles = SRTHandler(os.path.join(self.output_dir, 'episode0.srt')).get_subtitles()
+        self.assertEqual(subtitles[0]['end_time'], '00:00:02,000')
+
+        cancel_event = threading.Event()
+        cancel_event.set()
+        self.assertEqual(BatchExecutor(max_workers=1).run(remove_punctuation_job, self.file_paths, self.output_dir, cancel_event=cancel_event), [])
+        logger.info("Inline batch test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_cue_table.py
+
+import unittest
+from cue_table import CueTable
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUBTITLES = [
+    {'index': 1, 'start_time': '00:00:01,000', 'end_time': '00:00:02,000', 'text': 'Hello World'},
+    {'index': 2, 'start_time': '00:00:02,500', 'end_time': '00:00:04,000', 'text': '[音乐]'},
+    {'index': 3, 'start_time': '01:02:03,004', 'end_time': '01:02:05,000', 'text': '[音乐]'},
+]
+
+class TestCueTable(unittest.TestCase):
+    def test_round_trip(self):
+        logger.info("Testing CueTable round trip.")
+        table = CueTable.from_cues(SUBTITLES)
+        self.assertEqual(len(table), 3)
+        self.assertEqual(table.to_dicts(), SUBTITLES)
+        self.assertEqual(table, SUBTITLES)
+        self.assertEqual(table.starts[2], 3723004)
+        self.assertEqual(len(table.texts), 2, "Repeated texts should share one pool entry")
+        logger.info("CueTable round trip test completed successfully.")
+
+    def test_cue_view_writes_through(self):
+        logger.info("Testing Cue view assignment.")
+        table = CueTable.from_cues(SUBTITLES)
+        for subtitle in table:
+            subtitle['text'] = subtitle['text'].upper()
+        table[0]['end_time'] = '00:00:03,000'
+        self.assertEqual(table.get_texts(), ['HELLO WORLD', '[音乐]', '[音乐]'])
+        self.assertEqual(table[0].end_ms, 3000)
+        self.assertEqual(table[-1]['index'], 3)
+        logger.info("Cue view assignment test completed successfully.")
+
+    def test_map_texts_and_with_texts(self):
+        logger.info("Testing bulk text operations.")
+        calls = []
+        table = CueTable.from_cues(SUBTITLES)
+        table.map_texts(lambda text: calls.append(text) or text.strip('[]'))
+        self.assertEqual(calls, ['Hello World', '[音乐]'], "Each unique text should be processed once")
+        self.assertEqual(table.get_texts(), ['Hello World', '音乐', '音乐'])
+        translated = table.with_texts(['a', 'b', 'c'])
+        self.assertEqual(translated.get_texts(), ['a', 'b', 'c'])
+        self.assertEqual(translated.starts, table.starts)
+        with self.assertRaises(ValueError):
+            table.with_texts(['a'])
+        logger.info("Bulk text operations test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+# test_cue_viewer.py
+
+import unittest
+from cue_viewer import CuePager, parse_jump_time, ParsedCueSource
+from app_dirs import CACHE_DIR_ENV
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+def make_srt(count):
+    return ''.join(f"{i + 1}\n00:{i // 60:02d}:{i % 60:02d},000 --> 00:{i // 60:02d}:{i % 60:02d},800\nLine {i + 1}\n\n" for i in range(count))
+
+class TestCuePager(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # Cue indexes go to a cache directory of the test's own
+        self.saved_cache_dir = os.environ.get(CACHE_DIR_ENV)
+        os.environ[CACHE_DIR_ENV] = os.path.join(self.temp_dir.name, 'cache')
+        self.file_paths = []
+        for encoding in ('utf-8', 'utf-16'):
+            file_path = os.path.join(self.temp_dir.name, f'{encoding}.srt')
+            with open(file_path, 'w', encoding=encoding) as f:
+                f.write(make_srt(200))
+            self.file_paths.append(file_path)
+
+    def tearDown(self):
+        if self.saved_cache_dir is None:
+            os.environ.pop(CACHE_DIR_ENV, None)
+        else:
+            os.environ[CACHE_DIR_ENV] = self.saved_cache_dir
+        self.temp_dir.cleanup()
+
+    def test_parse_jump_time(self):
+        logger.info("Testing jump time parsing.")
+        self.assertEqual(parse_jump_time('01:02:03,004'), 3723004)
+        self.assertEqual(parse_jump_time('2:30'), 150000)
+        self.assertEqual(parse_jump_time('1.5'), 1500)
+        for invalid in ('', 'abc', '1:2:3:4'):
+            with self.assertRaises(ValueError):
+                parse_jump_time(invalid)
+        logger.info("Jump time parsing test completed successfully.")
+
+    def test_paging_and_jumps(self):
+        logger.info("Testing paged windows over mapped and in-memory sources.")
+        for file_path in self.file_paths:
+            pager = CuePager(page_size=10)
+            pager.open(file_path)
+            if file_path.endswith('utf-16.srt'):
+                self.assertIsInstance(pager.source, ParsedCueSource)
+            self.assertEqual(len(pager), 200)
+            self.assertEqual([cue['index'] for cue in pager.visible()], list(range(1, 11)))
+            pager.scroll(25)
+            self.assertEqual(pager.visible()[0]['text'], 'Line 26')
+            self.assertEqual(pager.moveto(1.0), 190, "The last page should stay full")
+            self.assertEqual(pager.scroll(-500), 0)
+            self.assertEqual(pager.jump_to_time('00:01:30,500'), 90)
+            self.assertEqual(pager.fractions(), (0.45, 0.5))
+            pager.close()
+            self.assertEqual(pager.visible(), [])
+        logger.info("Paging test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
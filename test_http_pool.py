@@ -0,0 +1,61 @@
+# test_http_pool.py
+
+import unittest
+from http_pool import get_loop_thread, run_coroutine, register_close, close_all, is_shared_loop, http_client_options
+import asyncio
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+class TestHTTPPool(unittest.TestCase):
+    def tearDown(self):
+        close_all()
+
+    def test_one_loop_for_all_threads(self):
+        logger.info("Testing the shared event loop.")
+
+        async def current_loop():
+            return asyncio.get_running_loop()
+
+        loops = []
+        threads = [threading.Thread(target=lambda: loops.append(run_coroutine(current_loop()))) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(set(map(id, loops))), 1, "Every thread should run on the same loop")
+        self.assertTrue(is_shared_loop(loops[0]))
+        self.assertFalse(is_shared_loop(asyncio.new_event_loop()))
+        logger.info("Shared event loop test completed successfully.")
+
+    def test_close_all(self):
+        logger.info("Testing shutdown of shared clients.")
+        closed = []
+        loop_thread = get_loop_thread()
+
+        async def close_async_client():
+            closed.append(('async', asyncio.get_running_loop() is loop_thread.loop))
+
+        register_close(close_async_client)
+        register_close(lambda: closed.append(('sync', True)))
+        close_all()
+        self.assertEqual(closed, [('async', True), ('sync', True)])
+        self.assertFalse(loop_thread.thread.is_alive())
+        self.assertIsNot(get_loop_thread(), loop_thread, "A new loop should be started after a shutdown")
+        logger.info("Shutdown test completed successfully.")
+
+    def test_client_options(self):
+        logger.info("Testing pooled client options.")
+        from openai import DefaultAsyncHttpxClient
+        options = http_client_options({'connect_timeout': 5, 'keepalive_expiry': 30}, max_in_flight=3)
+        self.assertEqual(options['limits'].max_connections, 3)
+        self.assertEqual(options['limits'].keepalive_expiry, 30)
+        self.assertEqual(options['timeout'].connect, 5)
+        # The options must fit the HTTP library openai was installed with
+        client = DefaultAsyncHttpxClient(**options)
+        asyncio.run(client.aclose())
+        logger.info("Pooled client options test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# test_job_runner.py
+
+import unittest
+from job_runner import JobRunner, batch_task
+from batch_jobs import remove_punctuation_job
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+class FakeRoot:
+    """
+    Stands in for the Tk root: after() only records callbacks, which the test runs as frames.
+    """
+
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, delay_ms, callback):
+        self.scheduled.append(callback)
+
+    def run_frames(self, runner, limit=1000):
+        for _ in range(limit):
+            if not self.scheduled:
+                return
+            if runner.thread is not None:
+                runner.thread.join(0.01)
+            self.scheduled.pop(0)()
+        raise AssertionError("Job did not finish")
+
+class TestJobRunner(unittest.TestCase):
+    def test_progress_is_coalesced_per_frame(self):
+        logger.info("Testing progress coalescing.")
+        root = FakeRoot()
+        runner = JobRunner(root)
+        progress, outcome = [], []
+
+        def task(report, cancel_event, count):
+            for i in range(count):
+                report(i + 1, count)
+            for i in range(count):
+                report.output(i)
+            return 'finished'
+
+        outputs = []
+        runner.start(task, 500, on_progress=lambda done, total, message: progress.append(done),
+                     on_done=lambda result, cancelled: outcome.append((result, cancelled)), on_output=outputs.append)
+        runner.thread.join()
+        root.run_frames(runner)
+        self.assertEqual(progress, [500], "Updates queued within one frame should collapse into the latest")
+        self.assertEqual(outputs, list(range(500)), "Every output item should be delivered in order")
+        self.assertEqual(outcome, [('finished', False)])
+        self.assertFalse(runner.is_running())
+        logger.info("Progress coalescing test completed successfully.")
+
+    def test_cancel_and_error(self):
+        logger.info("Testing cancellation and errors.")
+        root = FakeRoot()
+        runner = JobRunner(root)
+        started = threading.Event()
+        outcome = []
+
+        def wait_for_cancel(report, cancel_event):
+            started.set()
+            cancel_event.wait(5)
+            return 'stopped'
+
+        runner.start(wait_for_cancel, on_done=lambda result, cancelled: outcome.append((result, cancelled)))
+        with self.assertRaises(RuntimeError):
+            runner.start(wait_for_cancel)
+        started.wait(5)
+        runner.cancel()
+        root.run_frames(runner)
+        self.assertEqual(outcome, [('stopped', True)])
+
+        errors = []
+        runner.start(lambda report, cancel_event: 1 / 0, on_error=errors.append)
+        root.run_frames(runner)
+        self.assertIsInstance(errors[0], ZeroDivisionError)
+        logger.info("Cancellation and error test completed successfully.")
+
+    def test_batch_task(self):
+        logger.info("Testing batch tasks on the job thread.")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_path = os.path.join(temp_dir, 'input.srt')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write("1\n00:00:01,000 --> 00:00:02,000\nHello, World!\n\n")
+            output_path = os.path.join(temp_dir, 'output')
+            os.makedirs(output_path)
+            root = FakeRoot()
+            runner = JobRunner(root)
+            outcome = []
+            runner.start(batch_task(remove_punctuation_job, [file_path], output_path),
+                         on_done=lambda results, cancelled: outcome.extend(results))
+            root.run_frames(runner)
+            self.assertEqual(outcome[0]['output_file_path'], os.path.join(output_path, 'input.srt'))
+            self.assertIsNone(outcome[0]['error'])
+        logger.info("Batch task test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,81 @@
+# test_mock_server.py
+
+import unittest
+from mock_server import MockServer, parse_latency, fake_translation
+from api_client import AsyncAPIClient
+from translator import Translator
+from translation_cache import TranslationCache
+from translation_memory import TranslationMemory
+import asyncio
+import json
+import logging
+import random
+import urllib.error
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+def make_translator(server, **kwargs):
+    return Translator(api_client=AsyncAPIClient(api_key='mock', base_url=server.url), cache=TranslationCache(':memory:'),
+                      memory=TranslationMemory(':memory:'), **kwargs)
+
+class TestMockServer(unittest.TestCase):
+    def test_latency_and_fake_translations(self):
+        logger.info("Testing mock server helpers.")
+        rng = random.Random(1)
+        self.assertEqual(parse_latency('fixed:0.25')(rng), 0.25)
+        self.assertTrue(all(0.1 <= parse_latency('uniform:0.1,0.2')(rng) <= 0.2 for _ in range(100)))
+        self.assertGreaterEqual(min(parse_latency('normal:0,1')(rng) for _ in range(100)), 0.0)
+        for spec in ('fixed', 'gamma:1,2', 'uniform:1'):
+            with self.assertRaises(ValueError):
+                parse_latency(spec)
+        system = {'role': 'system', 'content': "请将每条字幕翻译成de。"}
+        self.assertEqual(fake_translation([system, {'role': 'user', 'content': "1|Hi\n2|a<br>b"}]), "1|de:Hi\n2|de:a<br>b")
+        self.assertEqual(fake_translation([{'role': 'user', 'content': "Hi"}]), "xx:Hi")
+        logger.info("Mock server helper test completed successfully.")
+
+    def test_translation_through_the_mock(self):
+        logger.info("Testing streamed and whole replies from the mock server.")
+        texts = [f"line {i}" for i in range(30)]
+        with MockServer(latency='uniform:0.001,0.01') as server:
+            for streaming in (True, False):
+                translator = make_translator(server, batch_size=10)
+                translator.streaming = streaming
+                self.assertEqual(asyncio.run(translator.translate_texts_async(texts, 'fr')), [f"fr:{text}" for text in texts])
+            self.assertEqual(asyncio.run(translator.translate_text_async("Bonjour", 'en')), "en:Bonjour")
+            self.assertEqual(server.stats['requests'], 7)
+            self.assertEqual(server.stats['streamed'], 3)
+        logger.info("Mock server translation test completed successfully.")
+
+    def test_injected_errors_are_retried(self):
+        logger.info("Testing 429 and 500 injection.")
+        with MockServer(rate_429=1.0, retry_after=0.25) as server:
+            request = urllib.request.Request(server.url + '/chat/completions', method='POST',
+                                             data=json.dumps({'messages': [{'role': 'user', 'content': 'x'}]}).encode('utf-8'))
+            with self.assertRaises(urllib.error.HTTPError) as context:
+                urllib.request.urlopen(request)
+            self.assertEqual(context.exception.code, 429)
+            self.assertEqual(context.exception.headers['Retry-After'], '0.25')
+
+        with MockServer(rate_429=0.3, rate_500=0.2, retry_after=0.01, seed=3) as server:
+            translator = make_translator(server, batch_size=5)
+            translator.engine.base_delay = 0.01
+            texts = [f"cue {i}" for i in range(40)]
+            self.assertEqual(asyncio.run(translator.translate_texts_async(texts, 'en')), [f"en:{text}" for text in texts])
+            self.assertGreater(server.stats['rate_limited'] + server.stats['server_errors'], 0)
+            self.assertEqual(translator.engine.stats()['retries'], server.stats['rate_limited'] + server.stats['server_errors'])
+        logger.info("Error injection test completed successfully.")
+
+    def test_benchmark(self):
+        logger.info("Testing the throughput benchmark.")
+        from benchmark import run_benchmark
+        results = run_benchmark(cues=60, repeat=2, batch_size=20, latency='fixed:0.01', token_delay=0)
+        self.assertEqual([(result['scenario'], result['run']) for result in results],
+                         [('subtitles', 1), ('subtitles', 2), ('content', 1), ('content', 2)])
+        self.assertGreater(results[0]['requests'], 0)
+        self.assertEqual(results[1]['requests'], 0, "The second run should be served from the cache")
+        self.assertIsNotNone(results[2]['latency_p99'])
+        logger.info("Benchmark test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,64 @@
+# test_parse_cache.py
+
+import unittest
+from parse_cache import ParseCache, get_parse_cache
+from srt_handler import SRTHandler
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+def make_srt(count, text='Line'):
+    return ''.join(f"{i + 1}\n00:00:{i % 60:02d},000 --> 00:00:{i % 60:02d},800\n{text} {i + 1}\n\n" for i in range(count))
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_paths = []
+        for i in range(3):
+            file_path = os.path.join(self.temp_dir.name, f'episode{i}.srt')
+            with open(file_path, 'w', encoding='utf-8') as f:
+                f.write(make_srt(50))
+            self.file_paths.append(file_path)
+        get_parse_cache().invalidate()
+
+    def tearDown(self):
+        get_parse_cache().invalidate()
+        self.temp_dir.cleanup()
+
+    def test_hits_and_copies(self):
+        logger.info("Testing parse cache hits and isolation.")
+        cache = get_parse_cache()
+        hits = cache.hits
+        first = SRTHandler(self.file_paths[0]).get_subtitles()
+        first[0]['text'] = 'Edited'
+        second = SRTHandler(self.file_paths[0]).get_subtitles()
+        self.assertEqual(cache.hits, hits + 1)
+        self.assertEqual(second[0]['text'], 'Line 1', "Edits to a returned table must not reach the cache")
+        self.assertEqual(next(SRTHandler(self.file_paths[0], lazy=True).iter_subtitles())['text'], 'Line 1')
+        self.assertEqual(cache.hits, hits + 2, "Lazy handlers should reuse a cached parse")
+
+        SRTHandler(self.file_paths[0]).save_subtitles(self.file_paths[0], first)
+        self.assertEqual(SRTHandler(self.file_paths[0]).get_subtitles()[0]['text'], 'Edited', "A rewritten file must be parsed again")
+        logger.info("Parse cache hit test completed successfully.")
+
+    def test_memory_bound(self):
+        logger.info("Testing LRU eviction under the byte limit.")
+        table_bytes = SRTHandler(self.file_paths[0]).get_subtitles().nbytes()
+        cache = ParseCache(max_bytes=int(table_bytes * 2.5))
+        parse = SRTHandler._parse_file
+        for file_path in self.file_paths[:2]:
+            cache.get_or_parse(file_path, None, parse)
+        cache.get_or_parse(self.file_paths[0], None, parse)  # Now the most recently used
+        cache.get_or_parse(self.file_paths[2], None, parse)
+        self.assertLessEqual(cache.current_bytes, cache.max_bytes)
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.peek(self.file_paths[1]), "The least recently used file should be evicted")
+        self.assertIsNotNone(cache.peek(self.file_paths[0]))
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 3, "Peeks should not count as misses")
+        logger.info("LRU eviction test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+# test_pipeline.py
+
+import unittest
+from pipeline import Pipeline, load_pipeline, save_pipeline, load_pipelines
+from batch_jobs import remove_punctuation_job, adjust_timestamps_job, adjust_speech_rate_job, pipeline_job
+from srt_handler import SRTHandler
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+STAGES = [
+    {'stage': 'remove_punctuation'},
+    {'stage': 'adjust_timestamps', 'speech_rate': 2.0, 'shorten_intervals': True},
+    {'stage': 'speech_rate', 'speech_rate': 2},
+]
+
+class TestPipeline(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.temp_dir.name, 'episode.srt')
+        with open(self.file_path, 'w', encoding='utf-8') as f:
+            for i in range(50):
+                f.write(f"{i + 1}\n00:00:{i:02d},000 --> 00:00:{i:02d},900\n“你好，世界！” Hello, big world {i}!\n\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_fused_pass_matches_separate_operations(self):
+        logger.info("Testing the fused pipeline against the three separate operations.")
+        steps = []
+        current = self.file_path
+        for i, (job, args) in enumerate(((remove_punctuation_job, ()), (adjust_timestamps_job, (2.0, True)), (adjust_speech_rate_job, (2,)))):
+            output_path = os.path.join(self.temp_dir.name, f'step{i}')
+            os.makedirs(output_path)
+            current = job(current, output_path, *args)
+            steps.append(current)
+        fused_path = os.path.join(self.temp_dir.name, 'fused')
+        os.makedirs(fused_path)
+        fused = pipeline_job(self.file_path, fused_path, STAGES)
+        self.assertEqual(SRTHandler(fused).get_subtitles(), SRTHandler(steps[-1]).get_subtitles())
+        self.assertEqual(len(Pipeline(STAGES).steps), 3, "Stages of different kinds are kept apart")
+        self.assertEqual(len(Pipeline(STAGES[::2]).steps), 1, "Consecutive text stages are fused")
+        logger.info("Fused pipeline test completed successfully.")
+
+    def test_config_round_trip_and_validation(self):
+        logger.info("Testing pipeline storage and validation.")
+        config_file_path = os.path.join(self.temp_dir.name, 'config.toml')
+        with open(config_file_path, 'w', encoding='utf-8') as f:
+            f.write('[ui]\n# Interface language\nlanguage = "zh"\n\n[pipelines.dubbing]\nstages = []\n\n'
+                    '# Kept with the next table\n[cache]\nmax_megabytes = 256\n')
+        save_pipeline('dubbing', STAGES, config_file_path)
+        save_pipeline('clean', STAGES[:1], config_file_path)
+        self.assertEqual(load_pipeline('dubbing', config_file_path).stages, STAGES)
+        self.assertEqual(load_pipelines(config_file_path)['clean'], STAGES[:1])
+        with open(config_file_path, encoding='utf-8') as f:
+            content = f.read()
+        self.assertTrue(content.startswith('[ui]\n# Interface language\nlanguage = "zh"\n\n[pipelines.dubbing]\n'),
+                        "Only the saved pipeline's table should change")
+        self.assertIn('\n\n# Kept with the next table\n[cache]\nmax_megabytes = 256\n\n[pipelines.clean]\n', content)
+        with self.assertRaises(KeyError):
+            load_pipeline('missing', config_file_path)
+        with open(config_file_path, 'a', encoding='utf-8') as f:
+            f.write('\n[pipelines]\ninline = { stages = [] }\n')
+        with self.assertRaises(ValueError):
+            save_pipeline('inline', STAGES, config_file_path)
+        self.assertEqual(load_pipelines(config_file_path)['inline'], [], "A table it cannot replace is left alone")
+        for stages in ([], [{'stage': 'unknown'}], [{'stage': 'speech_rate'}], [{'stage': 'speech_rate', 'speech_rate': 0}]):
+            with self.assertRaises(ValueError):
+                Pipeline(stages)
+        logger.info("Pipeline storage test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,141 @@
+# test_srt_handler.py
+
+import unittest
+from srt_handler import SRTHandler, write_text_atomic
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_SRT = (
+    "1\n00:00:01,000 --> 00:00:02,000\nHello World\n\n"
+    "2\n00:00:02,500 --> 00:00:04,000\nSecond line\nwith a break\n\n"
+    "3\n00:00:05,000 --> 00:00:06,250\n最后一行\n"
+)
+
+class TestSRTHandler(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.test_file_path = os.path.join(self.temp_dir.name, 'test.srt')
+        with open(self.test_file_path, 'w', encoding='utf-8') as f:
+            f.write(SAMPLE_SRT)
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_parse_srt_file(self):
+        logger.info("Testing SRT parsing.")
+        subtitles = SRTHandler(self.test_file_path).get_subtitles()
+        self.assertEqual([subtitle['index'] for subtitle in subtitles], [1, 2, 3])
+        self.assertEqual(subtitles[1]['start_time'], '00:00:02,500')
+        self.assertEqual(subtitles[1]['text'], 'Second line\nwith a break')
+        self.assertEqual(subtitles[2]['text'], '最后一行')
+        logger.info("SRT parsing test completed successfully.")
+
+    def test_iter_cues_small_blocks(self):
+        logger.info("Testing streaming parser across block boundaries.")
+        expected = SRTHandler(self.test_file_path).get_subtitles()
+        for block_size in (1, 3, 7, 64):
+            self.assertEqual(list(SRTHandler.iter_cues(self.test_file_path, block_size=block_size)), expected)
+        logger.info("Streaming parser test completed successfully.")
+
+    def test_lazy_handler_streams_to_output(self):
+        logger.info("Testing streaming save from a lazy handler.")
+        srt_handler = SRTHandler(self.test_file_path, lazy=True)
+        self.assertEqual(srt_handler.get_subtitles(), [])
+        output_file_path = os.path.join(self.temp_dir.name, 'output.srt')
+        srt_handler.save_subtitles(output_file_path, srt_handler.iter_subtitles())
+        self.assertEqual(SRTHandler(output_file_path).get_subtitles(), SRTHandler(self.test_file_path).get_subtitles())
+        logger.info("Streaming save test completed successfully.")
+
+    def test_stream_onto_source_file(self):
+        logger.info("Testing streaming save onto the source file.")
+        srt_handler = SRTHandler(self.test_file_path, lazy=True)
+        expected = SRTHandler(self.test_file_path).get_subtitles()
+        srt_handler.save_subtitles(self.test_file_path, srt_handler.iter_subtitles())
+        self.assertEqual(SRTHandler(self.test_file_path).get_subtitles(), expected)
+        logger.info("Source file save test completed successfully.")
+
+    def test_adjust_timestamps(self):
+        logger.info("Testing timestamp adjustment.")
+        srt_handler = SRTHandler(self.test_file_path)
+        adjusted_subtitles = srt_handler.adjust_timestamps(2.0, True, preview=True)
+        self.assertEqual([subtitle['end_time'] for subtitle in adjusted_subtitles], ['00:00:01,500', '00:00:03,250', '00:00:05,625'])
+        streamed = list(SRTHandler(self.test_file_path, lazy=True).iter_adjusted_timestamps(2.0, True))
+        self.assertEqual(adjusted_subtitles, streamed)
+        logger.info("Timestamp adjustment test completed successfully.")
+
+    def test_encodings_and_line_endings(self):
+        logger.info("Testing BOM, CRLF and legacy encodings.")
+        expected = SRTHandler(self.test_file_path).get_subtitles()
+        crlf_content = SAMPLE_SRT.replace('\n', '\r\n')
+        variants = {
+            'utf-8-sig': ('utf-8-sig', crlf_content),
+            'gbk': ('gb18030', crlf_content),
+            'big5': ('cp950', SAMPLE_SRT.replace('最后一行', '最後一行')),
+            'utf-16': ('utf-16', crlf_content),
+        }
+        for encoding, (expected_encoding, content) in variants.items():
+            file_path = os.path.join(self.temp_dir.name, f'{encoding}.srt')
+            with open(file_path, 'w', encoding=encoding, newline='') as f:
+                f.write(content)
+            srt_handler = SRTHandler(file_path)
+            self.assertEqual(srt_handler.encoding, expected_encoding)
+            texts = [subtitle['text'] for subtitle in srt_handler.get_subtitles()]
+            self.assertEqual(texts[:2], [subtitle['text'] for subtitle in expected][:2], encoding)
+            self.assertIn(texts[2], ('最后一行', '最後一行'))
+            self.assertEqual(list(SRTHandler.iter_cues(file_path, block_size=5)), srt_handler.get_subtitles())
+        logger.info("Encoding test completed successfully.")
+
+    def test_save_subtitles_atomic(self):
+        logger.info("Testing atomic saving and unchanged-content skipping.")
+        srt_handler = SRTHandler(self.test_file_path)
+        output_file_path = os.path.join(self.temp_dir.name, 'output.srt')
+        self.assertTrue(srt_handler.save_subtitles(output_file_path))
+        self.assertFalse(srt_handler.save_subtitles(output_file_path, skip_unchanged=True))
+        srt_handler.get_subtitles()[0]['text'] = 'Changed'
+        self.assertTrue(srt_handler.save_subtitles(output_file_path, skip_unchanged=True))
+        self.assertEqual(SRTHandler(output_file_path).get_subtitles()[0]['text'], 'Changed')
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['output.srt', 'test.srt'], "No temporary files should be left behind")
+
+        def failing_subtitles():
+            yield {'index': 1, 'start_time': '00:00:01,000', 'end_time': '00:00:02,000', 'text': 'Partial'}
+            raise RuntimeError("interrupted")
+        with self.assertRaises(RuntimeError):
+            srt_handler.save_subtitles(output_file_path, failing_subtitles())
+        self.assertEqual(SRTHandler(output_file_path).get_subtitles()[0]['text'], 'Changed')
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['output.srt', 'test.srt'])
+        logger.info("Atomic saving test completed successfully.")
+
+    def test_write_text_atomic_compares_before_writing(self):
+        logger.info("Testing that unchanged content is detected without a temporary file.")
+        file_path = os.path.join(self.temp_dir.name, 'chunks.txt')
+        self.assertTrue(write_text_atomic(file_path, ['abc', 'def', 'ghi']))
+        # Created with the same permissions as any other new file, not mkstemp's 0600
+        self.assertEqual(os.stat(file_path).st_mode, os.stat(self.test_file_path).st_mode)
+
+        def chunks(*parts):
+            for part in parts:
+                self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['chunks.txt', 'test.srt'])
+                yield part
+        self.assertFalse(write_text_atomic(file_path, chunks('abcd', 'efgh', 'i'), skip_unchanged=True))
+        for parts, expected in ((['abc', 'def', 'gh'], 'abcdefgh'), (['abc', 'def', 'ghij'], 'abcdefghij'),
+                                (['abc', 'dXf', 'ghij'], 'abcdXfghij'), ([], '')):
+            self.assertTrue(write_text_atomic(file_path, parts, skip_unchanged=True))
+            with open(file_path, encoding='utf-8') as f:
+                self.assertEqual(f.read(), expected)
+        self.assertEqual(sorted(os.listdir(self.temp_dir.name)), ['chunks.txt', 'test.srt'])
+        logger.info("Compare-before-write test completed successfully.")
+
+    def test_adjust_timestamps_keeps_source(self):
+        logger.info("Testing that timestamp adjustment leaves the source file alone.")
+        with open(self.test_file_path, 'rb') as f:
+            original = f.read()
+        SRTHandler(self.test_file_path).adjust_timestamps(2.0, True)
+        with open(self.test_file_path, 'rb') as f:
+            self.assertEqual(f.read(), original)
+        logger.info("Source file test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
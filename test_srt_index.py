@@ -0,0 +1,78 @@
+# test_srt_index.py
+
+import unittest
+from srt_handler import SRTHandler
+from srt_index import INDEX_SUFFIX, index_cache_path
+from app_dirs import CACHE_DIR_ENV
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+def make_srt(count):
+    return ''.join(f"{i + 1}\r\n00:{i // 60:02d}:{i % 60:02d},000 --> 00:{i // 60:02d}:{i % 60:02d},800\r\nLine {i + 1}\r\n\r\n" for i in range(count))
+
+class TestMappedSRTReader(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        # Cue indexes go to a cache directory of the test's own
+        self.saved_cache_dir = os.environ.get(CACHE_DIR_ENV)
+        os.environ[CACHE_DIR_ENV] = os.path.join(self.temp_dir.name, 'cache')
+        self.test_file_path = os.path.join(self.temp_dir.name, 'test.srt')
+        with open(self.test_file_path, 'w', encoding='utf-8', newline='') as f:
+            f.write('﻿' + make_srt(300))
+
+    def tearDown(self):
+        if self.saved_cache_dir is None:
+            os.environ.pop(CACHE_DIR_ENV, None)
+        else:
+            os.environ[CACHE_DIR_ENV] = self.saved_cache_dir
+        self.temp_dir.cleanup()
+
+    def test_random_access(self):
+        logger.info("Testing random access by position and time.")
+        with SRTHandler.open_mapped(self.test_file_path) as reader:
+            self.assertEqual(len(reader), 300)
+            self.assertEqual(reader[0], {'index': 1, 'start_time': '00:00:00,000', 'end_time': '00:00:00,800', 'text': 'Line 1'})
+            self.assertEqual([cue['index'] for cue in reader.window(120, 3)], [121, 122, 123])
+            self.assertEqual(reader.position_at_time(61500), 61)
+            self.assertEqual([cue['text'] for cue in reader.cues_between(10000, 12000)], ['Line 11', 'Line 12'])
+        logger.info("Random access test completed successfully.")
+
+    def test_index_cache(self):
+        logger.info("Testing the cached cue index.")
+        with SRTHandler.open_mapped(self.test_file_path) as reader:
+            self.assertFalse(reader.index_loaded_from_cache)
+        self.assertTrue(os.path.exists(index_cache_path(self.test_file_path)))
+        self.assertFalse(os.path.exists(self.test_file_path + INDEX_SUFFIX), "Nothing should be written next to the user's file")
+        with SRTHandler.open_mapped(self.test_file_path) as reader:
+            self.assertTrue(reader.index_loaded_from_cache)
+            self.assertEqual(reader[-1]['text'], 'Line 300')
+
+        with open(self.test_file_path, 'a', encoding='utf-8', newline='') as f:
+            f.write("301\r\n00:05:00,000 --> 00:05:01,000\r\nLine 301\r\n")
+        with SRTHandler.open_mapped(self.test_file_path) as reader:
+            self.assertFalse(reader.index_loaded_from_cache, "A modified file must be re-indexed")
+            self.assertEqual(len(reader), 301)
+
+        # An index whose payload is shorter than its header promises is rebuilt, not mapped
+        with open(index_cache_path(self.test_file_path), 'r+b') as f:
+            f.truncate(os.path.getsize(index_cache_path(self.test_file_path)) - 8)
+        with SRTHandler.open_mapped(self.test_file_path) as reader:
+            self.assertFalse(reader.index_loaded_from_cache)
+            self.assertEqual(reader[-1]['text'], 'Line 301')
+        logger.info("Cached cue index test completed successfully.")
+
+    def test_empty_file(self):
+        logger.info("Testing an empty file.")
+        empty_file_path = os.path.join(self.temp_dir.name, 'empty.srt')
+        open(empty_file_path, 'w').close()
+        for _ in range(2):
+            with SRTHandler.open_mapped(empty_file_path) as reader:
+                self.assertEqual(len(reader), 0)
+                self.assertEqual(reader.window(0, 10), [])
+        logger.info("Empty file test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
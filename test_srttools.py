@@ -0,0 +1,109 @@
+# test_srttools.py
+
+import unittest
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def run_cli(*args):
+    completed = subprocess.run([sys.executable, '-m', 'srttools', *args], cwd=PROJECT_DIR, capture_output=True, text=True, encoding='utf-8')
+    events = [json.loads(line) for line in completed.stdout.splitlines() if line.strip()]
+    return completed.returncode, events
+
+class TestSRTToolsCLI(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.input_dir = os.path.join(self.temp_dir.name, 'season1')
+        self.output_dir = os.path.join(self.temp_dir.name, 'output')
+        os.makedirs(os.path.join(self.input_dir, 'extras'))
+        for name in ('e01.srt', 'e02.srt', os.path.join('extras', 'bonus.srt')):
+            with open(os.path.join(self.input_dir, name), 'w', encoding='utf-8') as f:
+                f.write("1\n00:00:01,000 --> 00:00:03,000\n你好，世界！\n\n")
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_process_directory(self):
+        logger.info("Testing the process command over a directory.")
+        returncode, events = run_cli('process', self.input_dir, '-o', self.output_dir, '--jobs', '2', '--chunk-size', '1')
+        self.assertEqual(returncode, 0)
+        self.assertEqual(events[0]['event'], 'start')
+        self.assertEqual(events[0]['total'], 3)
+        self.assertEqual(events[-1], {'event': 'finish', 'total': 3, 'succeeded': 3, 'failed': 0})
+        with open(os.path.join(self.output_dir, 'e01.srt'), encoding='utf-8') as f:
+            self.assertIn("你好 世界", f.read())
+        self.assertTrue(os.path.exists(os.path.join(self.output_dir, 'extras', 'bonus.srt')))
+
+        # Running again produces the same content, so the outputs are not rewritten
+        output_file_path = os.path.join(self.output_dir, 'e01.srt')
+        os.utime(output_file_path, ns=(10**18, 10**18))
+        returncode, events = run_cli('process', self.input_dir, '-o', self.output_dir, '--jobs', '1')
+        self.assertEqual(returncode, 0)
+        self.assertEqual(os.stat(output_file_path).st_mtime_ns, 10**18)
+        logger.info("Process command test completed successfully.")
+
+    def test_same_names_in_different_directories(self):
+        logger.info("Testing that same-named files from different directories do not overwrite each other.")
+        root = os.path.join(self.temp_dir.name, 'show')
+        for season, text in (('s1', "第一季"), ('s2', "第二季")):
+            os.makedirs(os.path.join(root, season))
+            with open(os.path.join(root, season, 'e01.srt'), 'w', encoding='utf-8') as f:
+                f.write(f"1\n00:00:01,000 --> 00:00:03,000\n{text}！\n\n")
+        returncode, events = run_cli('process', root, '-o', self.output_dir)
+        self.assertEqual(returncode, 0)
+        for season, text in (('s1', "第一季"), ('s2', "第二季")):
+            with open(os.path.join(self.output_dir, season, 'e01.srt'), encoding='utf-8') as f:
+                self.assertIn(text, f.read())
+
+        # Globs name outputs by base name only, so the second file is reported instead of overwriting the first
+        returncode, events = run_cli('process', os.path.join(root, '*', 'e01.srt'), '-o', self.output_dir)
+        self.assertEqual(returncode, 1)
+        self.assertEqual(events[-1], {'event': 'finish', 'total': 2, 'succeeded': 1, 'failed': 1})
+        with open(os.path.join(self.output_dir, 'e01.srt'), encoding='utf-8') as f:
+            self.assertIn("第一季", f.read())
+        logger.info("Same-name output test completed successfully.")
+
+    def test_failures_and_usage_errors(self):
+        logger.info("Testing CLI exit codes.")
+        blocked_output = os.path.join(self.temp_dir.name, 'blocked')
+        os.makedirs(os.path.join(blocked_output, 'e01.srt'))  # A directory where the output file should go
+        returncode, events = run_cli('process', os.path.join(self.input_dir, '*.srt'), '-o', blocked_output, '--jobs', '1')
+        self.assertEqual(returncode, 1)
+        self.assertEqual(events[-1]['failed'], 1)
+
+        returncode, events = run_cli('process', os.path.join(self.temp_dir.name, 'nothing', '*.srt'), '-o', self.output_dir)
+        self.assertEqual(returncode, 2)
+        self.assertEqual(events[0]['event'], 'error')
+        logger.info("CLI exit code test completed successfully.")
+
+    def test_pipeline(self):
+        logger.info("Testing a saved pipeline from the command line.")
+        config_file_path = os.path.join(self.temp_dir.name, 'config.toml')
+        with open(config_file_path, 'w', encoding='utf-8') as f:
+            f.write('[pipelines.dubbing]\nstages = [{stage = "remove_punctuation"}, {stage = "adjust_timestamps", speech_rate = 2.0}]\n')
+        returncode, events = run_cli('process', self.input_dir, '-o', self.output_dir, '--pipeline', 'dubbing', '--config', config_file_path)
+        self.assertEqual(returncode, 0)
+        self.assertEqual(events[0]['operation'], 'pipeline:dubbing')
+        with open(os.path.join(self.output_dir, 'e02.srt'), encoding='utf-8') as f:
+            self.assertEqual(f.read(), "1\n00:00:01,000 --> 00:00:02,000\n你好 世界\n\n")
+
+        returncode, events = run_cli('process', self.input_dir, '-o', self.output_dir, '--pipeline', 'missing', '--config', config_file_path)
+        self.assertEqual(returncode, 2)
+        logger.info("Pipeline command test completed successfully.")
+
+    def test_no_gui_or_api_imports(self):
+        logger.info("Testing that the CLI does not import tkinter or openai.")
+        code = "import sys, srttools; print(sorted(m for m in ('tkinter', 'openai') if m in sys.modules))"
+        output = subprocess.run([sys.executable, '-c', code], cwd=PROJECT_DIR, capture_output=True, text=True).stdout
+        self.assertEqual(output.strip(), '[]')
+        logger.info("CLI import test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+# test_startup_time.py
+
+import unittest
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cumulative import time allowed for main_app, in milliseconds
+STARTUP_IMPORT_BUDGET_MS = 250
+
+# Modules that must only be imported on demand
+DEFERRED_MODULES = ('openai', 'httpx', 'translator', 'api_client', 'subtitle_optimizer', 'timestamp_optimizer', 'config_ui')
+
+def import_main_app():
+    code = (
+        "import sys; sys.path.insert(0, sys.argv[1]); import main_app; "
+        "print(','.join(m for m in sys.argv[2:] if m in sys.modules))"
+    )
+    # Run from an empty directory so the log file does not end up in the project
+    with tempfile.TemporaryDirectory() as work_dir:
+        return subprocess.run([sys.executable, '-X', 'importtime', '-c', code, PROJECT_DIR, *DEFERRED_MODULES],
+                              cwd=work_dir, capture_output=True, text=True)
+
+class TestStartupTime(unittest.TestCase):
+    def test_import_time_budget(self):
+        logger.info("Testing the main_app import time budget.")
+        completed = import_main_app()
+        self.assertEqual(completed.returncode, 0, completed.stderr)
+        cumulative_us = None
+        for line in completed.stderr.splitlines():
+            # import time: self [us] | cumulative | imported package
+            if line.startswith('import time:') and line.rstrip().endswith('| main_app'):
+                cumulative_us = int(line.split('|')[1])
+        self.assertIsNotNone(cumulative_us, "main_app import time not reported")
+        logger.info(f"main_app imported in {cumulative_us / 1000:.1f} ms")
+        self.assertLess(cumulative_us / 1000, STARTUP_IMPORT_BUDGET_MS)
+        logger.info("Import time budget test completed successfully.")
+
+    def test_heavy_modules_deferred(self):
+        logger.info("Testing that heavy modules are not imported at startup.")
+        completed = import_main_app()
+        self.assertEqual(completed.stdout.strip(), '', f"Imported at startup: {completed.stdout.strip()}")
+        logger.info("Deferred import test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,58 @@
+# test_text_normalizer.py
+
+import unittest
+from text_normalizer import TextNormalizer, default_normalizer
+from cue_table import CueTable
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+def regex_process_text(text):
+    # The two-pass regex the tabs used before, for comparison
+    text = re.sub(r'^[^\w\s]+|[^\w\s]+$', '', text)
+    return re.sub(r'[^\w\s]', ' ', text)
+
+class TestTextNormalizer(unittest.TestCase):
+    def test_default_rules(self):
+        logger.info("Testing the default normalization rules.")
+        cases = {
+            'Hello, World!': 'Hello World',
+            '“你好，世界！”': '你好 世界',
+            '...Wait -- what?!': 'Wait what',
+            "It's 100% snake_case": 'It s 100 snake_case',
+            '第一行，\n　第二行。': '第一行\n第二行',
+            'Line one\n...\nLine two': 'Line one\nLine two',
+            '[音乐]': '音乐',
+            '': '',
+        }
+        for text, expected in cases.items():
+            self.assertEqual(default_normalizer.normalize(text), expected, text)
+        logger.info("Default rules test completed successfully.")
+
+    def test_matches_regex_up_to_spacing(self):
+        logger.info("Testing agreement with the old regex passes.")
+        texts = ['Hello, World!', '“引号”和（括号）', 'a.b.c', '¿Qué tal?', 'Ünïcödé — dash', '★ stars ★', 'emoji 😀 ok']
+        for text, normalized in zip(texts, default_normalizer.normalize_many(texts)):
+            self.assertEqual(normalized, ' '.join(regex_process_text(text).split()), text)
+        logger.info("Regex agreement test completed successfully.")
+
+    def test_rule_variants_and_batches(self):
+        logger.info("Testing rule variants and batch processing.")
+        self.assertEqual(TextNormalizer('remove').normalize('你好，世界！ a-b'), '你好世界 ab')
+        self.assertEqual(TextNormalizer('keep').normalize('a ,\t b  '), 'a , b')
+        self.assertEqual(TextNormalizer(collapse_spaces=False).normalize('a, b'), 'a  b')
+        self.assertEqual(default_normalizer.normalize_many(['a\x00b', 'c!']), ['ab', 'c'])
+        with self.assertRaises(ValueError):
+            TextNormalizer('drop')
+
+        subtitles = [{'index': i, 'start_time': '00:00:01,000', 'end_time': '00:00:02,000', 'text': f'Line, {i % 3}!'} for i in range(10)]
+        streamed = list(default_normalizer.iter_normalized([dict(subtitle) for subtitle in subtitles], batch_size=4))
+        self.assertEqual([subtitle['text'] for subtitle in streamed], [f'Line {i % 3}' for i in range(10)])
+        table = default_normalizer.normalize_table(CueTable.from_cues(subtitles))
+        self.assertEqual(table.get_texts(), [f'Line {i % 3}' for i in range(10)])
+        self.assertEqual(len(table.texts), 3)
+        logger.info("Rule variants test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+# test_timecode.py
+
+import unittest
+from array import array
+import logging
+import random
+import timecode
+from timecode import parse_ms, format_ms, retime, retime_cue
+
+logger = logging.getLogger(__name__)
+
+class TestTimecode(unittest.TestCase):
+    def test_parse_and_format(self):
+        logger.info("Testing millisecond timestamp conversion.")
+        self.assertEqual(parse_ms('00:00:01,500'), 1500)
+        self.assertEqual(parse_ms('00:00:01.500'), 1500)
+        self.assertEqual(parse_ms('100:00:00,001'), 360000001)
+        self.assertEqual(format_ms(3723004), '01:02:03,004')
+        self.assertEqual(format_ms(-5), '00:00:00,000')
+        for ms in (0, 999, 59999, 3599999, 359999999):
+            self.assertEqual(parse_ms(format_ms(ms)), ms)
+        logger.info("Timestamp conversion test completed successfully.")
+
+    def test_retime_matches_per_cue(self):
+        logger.info("Testing batch retiming against the per-cue path.")
+        rng = random.Random(42)
+        starts = array('q', sorted(rng.randrange(0, 7200000) for _ in range(1000)))
+        ends = array('q', (start + rng.randrange(-50, 8000) for start in starts))
+        options = dict(scale=1.001, shift=-250, speech_rate=1.7, min_duration=0)
+        new_starts, new_ends = retime(starts, ends, **options)
+        expected = [retime_cue(start, end, **options) for start, end in zip(starts, ends)]
+        self.assertEqual(list(zip(new_starts, new_ends)), expected)
+        self.assertTrue(all(end >= start >= 0 for start, end in expected))
+        logger.info("Batch retiming test completed successfully.")
+
+    def test_retime_without_numpy(self):
+        logger.info("Testing the pure Python retiming fallback.")
+        starts, ends = array('q', [0, 1000, 2500]), array('q', [1000, 1999, 4000])
+        expected = retime(starts, ends, speech_rate=2.0)
+        saved_np, timecode.np = timecode.np, None
+        try:
+            self.assertEqual(retime(starts, ends, speech_rate=2.0), expected)
+        finally:
+            timecode.np = saved_np
+        self.assertEqual(list(expected[1]), [500, 1500, 3250])
+        logger.info("Pure Python retiming test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
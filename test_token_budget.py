@@ -0,0 +1,39 @@
+# test_token_budget.py
+
+import unittest
+from token_budget import estimate_text_tokens, estimate_message_tokens, pack_batches, summarize_batches
+import logging
+
+logger = logging.getLogger(__name__)
+
+class TestTokenBudget(unittest.TestCase):
+    def test_estimates(self):
+        logger.info("Testing token estimates.")
+        self.assertEqual(estimate_text_tokens(''), 0)
+        self.assertEqual(estimate_text_tokens('Hello, world!'), 4)
+        self.assertEqual(estimate_text_tokens('我不知道'), 4)
+        self.assertEqual(estimate_text_tokens('Episode 2024'), 3)
+        self.assertGreater(estimate_text_tokens('internationalization'), estimate_text_tokens('nation'))
+        self.assertEqual(estimate_message_tokens([{'role': 'user', 'content': 'Hi'}]), 5)
+        logger.info("Token estimate test completed successfully.")
+
+    def test_packing_fills_budgets_evenly(self):
+        logger.info("Testing token budget packing.")
+        costs = [10] * 100
+        ranges = pack_batches(costs, max_input_tokens=300, max_output_tokens=10000)
+        self.assertEqual(len(ranges), 4, "Greedy packing needs four requests of at most 30 cues")
+        self.assertEqual([end - start for start, end in ranges], [25, 25, 25, 25], "Requests should be equally large")
+        self.assertEqual(ranges[-1][1], len(costs))
+        self.assertEqual(pack_batches([10, 400, 10], max_input_tokens=300), [(0, 1), (1, 2), (2, 3)],
+                         "A cue over the budget gets a request to itself")
+        self.assertEqual(len(pack_batches([10] * 10, 1000, 60, output_ratio=2.0)), 4, "Three cues of 20 output tokens per request")
+        self.assertEqual(len(pack_batches([10] * 10, 120, 1000, prompt_tokens=60)), 2, "The prompt counts against every request")
+        self.assertEqual(pack_batches([1] * 12, max_items=5), [(0, 4), (4, 8), (8, 12)])
+        self.assertEqual(pack_batches([]), [])
+
+        plan = summarize_batches([(0, 2), (2, 3)], [10, 20, 30], prompt_tokens=5, output_ratio=1.5)
+        self.assertEqual(plan, {'items': 3, 'requests': 2, 'input_tokens': 70, 'output_tokens': 90})
+        logger.info("Token budget packing test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# test_translation_cache.py
+
+import unittest
+from app_dirs import CACHE_DIR_ENV, resolve_data_path
+from translation_cache import TranslationCache, make_key
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+class TestTranslationCache(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.db_path = os.path.join(self.temp_dir.name, 'translations.sqlite3')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_keys(self):
+        logger.info("Testing translation cache keys.")
+        key = make_key('deepseek-chat', 2, 'English', '你好 \n世界')
+        self.assertEqual(key, make_key('deepseek-chat', 2, 'English', '\n你好\n世界  '), "Trailing whitespace should not matter")
+        self.assertNotEqual(key, make_key('deepseek-chat', 3, 'English', '你好\n世界'))
+        self.assertNotEqual(key, make_key('deepseek-chat', 2, 'Japanese', '你好\n世界'))
+        self.assertNotEqual(key, make_key('other-model', 2, 'English', '你好\n世界'))
+        self.assertNotEqual(key, make_key('deepseek-chat', 2, 'English', '你好，世界'))
+        logger.info("Translation cache key test completed successfully.")
+
+    def test_database_paths(self):
+        logger.info("Testing where the cache database is kept.")
+        config_file_path = os.path.join(self.temp_dir.name, 'settings', 'config.toml')
+        self.assertEqual(resolve_data_path('cache.sqlite3', 'default.sqlite3', config_file_path),
+                         os.path.join(self.temp_dir.name, 'settings', 'cache.sqlite3'), "Relative paths follow the config file")
+        self.assertEqual(resolve_data_path(self.db_path, 'default.sqlite3', config_file_path), self.db_path)
+        self.assertEqual(resolve_data_path(':memory:', 'default.sqlite3', config_file_path), ':memory:')
+        saved_cache_dir = os.environ.get(CACHE_DIR_ENV)
+        os.environ[CACHE_DIR_ENV] = os.path.join(self.temp_dir.name, 'cache')
+        try:
+            self.assertEqual(resolve_data_path(None, 'default.sqlite3', config_file_path),
+                             os.path.join(self.temp_dir.name, 'cache', 'default.sqlite3'))
+        finally:
+            if saved_cache_dir is None:
+                os.environ.pop(CACHE_DIR_ENV, None)
+            else:
+                os.environ[CACHE_DIR_ENV] = saved_cache_dir
+        logger.info("Cache database path test completed successfully.")
+
+    def test_persistence_and_eviction(self):
+        logger.info("Testing persistence and LRU eviction.")
+        cache = TranslationCache(self.db_path, max_entries=3, memory_entries=2)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, key.upper())
+        self.assertEqual(cache.get('a'), 'A')  # 'b' is now the least recently used
+        cache.put('d', 'D')
+        self.assertEqual(len(cache), 3)
+        self.assertEqual(cache.get_many(['a', 'b', 'c', 'd']), {'a': 'A', 'c': 'C', 'd': 'D'})
+        self.assertEqual(cache.stats()['misses'], 1)
+        cache.close()
+
+        reopened = TranslationCache(self.db_path, max_entries=3)
+        self.assertEqual(reopened.get_many(['a', 'c', 'd']), {'a': 'A', 'c': 'C', 'd': 'D'})
+        self.assertEqual(reopened.stats()['hits'], 3)
+        reopened.close()
+        logger.info("Persistence and eviction test completed successfully.")
+
+    def test_concurrent_writers(self):
+        logger.info("Testing concurrent use from several threads.")
+        cache = TranslationCache(self.db_path)
+
+        def worker(thread_id):
+            for i in range(50):
+                cache.put(f'{thread_id}-{i}', f'T{i}')
+                self.assertEqual(cache.get(f'{thread_id}-{i}'), f'T{i}')
+
+        threads = [threading.Thread(target=worker, args=(thread_id,)) for thread_id in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(cache), 200)
+        cache.close()
+        logger.info("Concurrent use test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+# test_translation_journal.py
+
+import unittest
+from translation_journal import TranslationJournal, journal_path
+from translation_cache import TranslationCache
+from translation_memory import TranslationMemory
+from translator import Translator
+from test_translator import FakeAPIClient
+import json
+import logging
+import os
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+class FailingAPIClient(FakeAPIClient):
+    """
+    Fails every request that contains fail_on, as if the API went away mid-job.
+    """
+
+    def __init__(self, fail_on):
+        super().__init__()
+        self.fail_on = fail_on
+
+    def create_chat_completion(self, model, messages):
+        if self.fail_on in messages[-1]['content']:
+            raise ValueError("Server went away")
+        return super().create_chat_completion(model, messages)
+
+class TestTranslationJournal(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = journal_path(self.temp_dir.name, 'en')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_records_survive_a_torn_write(self):
+        logger.info("Testing journal recovery after a crash.")
+        journal = TranslationJournal(self.path, sync_every=2)
+        journal.record([('a', 'A'), ('b', 'B'), ('c', None)], model='test')
+        journal.record([('a', 'A')])
+        journal.close()
+        with open(self.path, encoding='utf-8') as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([record['key'] for record in records], ['a', 'b'], "Unfinished and repeated cues are not journaled")
+        self.assertEqual(records[0]['model'], 'test')
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write('{"key": "c", "transl')  # The process died mid-write
+
+        journal = TranslationJournal(self.path, resume=True)
+        self.assertEqual(journal.get_many(['a', 'b', 'c']), {'a': 'A', 'b': 'B'})
+        journal.record([('c', 'C')])
+        journal.close()
+        self.assertEqual(TranslationJournal(self.path, resume=True).get_many(['c']), {'c': 'C'})
+
+        journal = TranslationJournal(self.path)
+        self.assertEqual(len(journal), 0, "Without resume a new journal is started")
+        journal.remove()
+        self.assertFalse(os.path.exists(self.path))
+        logger.info("Journal recovery test completed successfully.")
+
+    def test_journal_path(self):
+        logger.info("Testing journal file names.")
+        self.assertEqual(journal_path(self.temp_dir.name, 'en'), os.path.join(self.temp_dir.name, '.translate-en.journal.jsonl'))
+        paths = {journal_path(self.temp_dir.name, language) for language in ('../../etc/x', 'en/us', 'en_us', 'a:b*?"<>|', '简体中文')}
+        self.assertEqual(len(paths), 5, "Every language gets its own journal")
+        for path in paths:
+            self.assertEqual(os.path.dirname(path), self.temp_dir.name)
+            self.assertFalse(set(os.path.basename(path)) & set('/\\:*?"<>|'))
+        logger.info("Journal file name test completed successfully.")
+
+    def test_records_are_written_off_the_calling_thread(self):
+        logger.info("Testing that recording leaves the file I/O to the writer thread.")
+        journal = TranslationJournal(self.path, sync_interval=60)
+        writing_threads = []
+        writelines = journal._file.writelines
+        journal._file.writelines = lambda lines: (writing_threads.append(threading.current_thread().name), writelines(lines))
+        journal.record([('a', 'A')])
+        journal.sync()
+        with open(self.path, encoding='utf-8') as f:
+            self.assertEqual(json.loads(f.read())['key'], 'a', "sync() waits until the record is written")
+        journal.record([('b', 'B')])
+        journal.close()
+        self.assertEqual(writing_threads, ['translation-journal', 'translation-journal'])
+        self.assertEqual(TranslationJournal(self.path, resume=True).get_many(['a', 'b']), {'a': 'A', 'b': 'B'})
+        logger.info("Writer thread test completed successfully.")
+
+    def test_resume_only_sends_unfinished_cues(self):
+        logger.info("Testing a resumed translation job.")
+        texts = [f"line {i}" for i in range(40)]
+        journal = TranslationJournal(self.path)
+        api_client = FailingAPIClient(fail_on='line 25')
+        translator = Translator(api_client=api_client, batch_size=10, max_in_flight=1,
+                                cache=TranslationCache(':memory:'), memory=TranslationMemory(':memory:'))
+        with self.assertRaises(Exception):
+            list(translator.iter_translations(texts, 'en', journal=journal))
+        journal.close()
+
+        # A fresh process: nothing in the cache, only the journal on disk
+        journal = TranslationJournal(self.path, resume=True)
+        self.assertEqual(len(journal), 20)
+        api_client = FakeAPIClient()
+        translator = Translator(api_client=api_client, batch_size=10, max_in_flight=1,
+                                cache=TranslationCache(':memory:'), memory=TranslationMemory(':memory:'))
+        self.assertEqual(list(translator.iter_translations(texts, 'en', journal=journal)), [text.upper() for text in texts])
+        sent = [line.split('|')[-1] for request in api_client.requests for line in request.splitlines()]
+        self.assertEqual(sent, texts[20:])
+        self.assertEqual(len(journal), 40)
+        journal.close()
+        logger.info("Resumed translation test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+# test_translation_memory.py
+
+import unittest
+from translation_memory import TranslationMemory, patch_translation, match_form
+import logging
+import os
+import tempfile
+import time
+
+logger = logging.getLogger(__name__)
+
+class TestTranslationMemory(unittest.TestCase):
+    def setUp(self):
+        self.memory = TranslationMemory(':memory:')
+
+    def tearDown(self):
+        self.memory.close()
+
+    def test_lookup_finds_near_duplicates(self):
+        logger.info("Testing near-duplicate lookup.")
+        self.memory.add_many('en', [("I don't know what you're talking about.", '我不知道你在说什么'),
+                                    ("We have to leave before sunrise", '我们得在日出前离开')])
+        matches = self.memory.lookup('en', "I don't know what you are talking about")
+        self.assertEqual(len(matches), 1)
+        self.assertGreaterEqual(matches[0][0], self.memory.threshold)
+        self.assertEqual(matches[0][2], '我不知道你在说什么')
+        self.assertEqual(self.memory.lookup('en', "Nobody knows where the ship went"), [])
+        self.assertEqual(self.memory.lookup('ja', "We have to leave before sunrise"), [], "Scopes must not mix")
+        self.assertEqual(self.memory.lookup('en', "Okay"), [], "Lines this short are not matched")
+        logger.info("Near-duplicate lookup test completed successfully.")
+
+    def test_reuse_only_safe_patches(self):
+        logger.info("Testing translation patching.")
+        self.assertEqual(match_form("  Hello,   WORLD!! "), 'hello world')
+        self.assertEqual(patch_translation('Hello, world!', 'hello world', '你好 世界'), '你好 世界')
+        self.assertEqual(patch_translation('Chapter 12 begins', 'Chapter 11 begins', '第11章开始'), '第12章开始')
+        self.assertIsNone(patch_translation('Chapter 1 begins', 'Chapter 11 begins', '第11章 共11章'), "Ambiguous number")
+        self.assertIsNone(patch_translation('Chapter 11 ends', 'Chapter 11 begins', '第11章开始'), "Different words")
+
+        self.memory.add_many('zh', [('Episode 3: The beginning', '第3集 开始')])
+        self.assertEqual(self.memory.reuse('zh', 'episode 4 - the beginning'), '第4集 开始')
+        self.assertIsNone(self.memory.reuse('zh', 'Episode 3: The end'))
+        self.assertEqual(self.memory.reused, 1)
+        logger.info("Translation patching test completed successfully.")
+
+    def test_persistence_and_updates(self):
+        logger.info("Testing the translation memory database.")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = os.path.join(temp_dir, 'memory.sqlite3')
+            memory = TranslationMemory(db_path)
+            memory.add_many('en', [('The weather is nice today', 'old'), ('The weather is nice today', 'new')])
+            memory.close()
+            memory = TranslationMemory(db_path)
+            self.assertEqual(len(memory), 1)
+            self.assertEqual(memory.lookup('en', 'The weather is nice today!')[0][2], 'new')
+            memory.close()
+        logger.info("Translation memory database test completed successfully.")
+
+    def test_lookup_time_stays_flat(self):
+        logger.info("Testing lookup cost as the memory grows.")
+        # Every line shares most of its n-grams with the others, so the LSH buckets grow with the memory
+        self.memory.add_many('en', [(f"This is the subtitle line number {i} of the season", str(i)) for i in range(5000)])
+        start = time.perf_counter()
+        for i in range(200):
+            self.assertTrue(self.memory.lookup('en', f"This is the subtitle line number {i * 7} of the season"))
+        self.assertLess((time.perf_counter() - start) / 200, 0.01)
+        logger.info("Lookup cost test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,333 @@
+# test_translator.py
+
+import unittest
+import translator as translator_module
+from translator import Translator, encode_batch, parse_batch_response, BatchFormatError, BatchResponseParser
+from translation_cache import TranslationCache
+from translation_memory import TranslationMemory
+from batch_jobs import iter_translate_files
+from types import SimpleNamespace
+import asyncio
+import concurrent.futures
+import logging
+import os
+import tempfile
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+def make_response(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+class FakeAPIClient:
+    """
+    Translates numbered lines by upper-casing them. Batches of more than
+    drop_above cues come back with the last line missing.
+    """
+
+    def __init__(self, drop_above=None):
+        self.drop_above = drop_above
+        self.requests = []
+        self.lock = threading.Lock()
+
+    def create_chat_completion(self, model, messages):
+        content = messages[-1]['content']
+        with self.lock:
+            self.requests.append(content)
+        if '|' not in content:
+            return make_response(content.upper())
+        lines = [line.upper() for line in content.splitlines()]
+        if self.drop_above is not None and len(lines) > self.drop_above:
+            lines = lines[:-1]
+        return make_response("Here you go:\n" + '\n'.join(lines).replace('<BR>', '<br>'))
+
+class SlowFirstAPIClient(FakeAPIClient):
+    """
+    Holds the batch starting with 'cue 1' until release is set, so later batches finish first.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+
+    def create_chat_completion(self, model, messages):
+        if messages[-1]['content'].startswith('1|cue 1\n'):
+            self.release.wait(5)
+        return super().create_chat_completion(model, messages)
+
+class StreamingAPIClient:
+    """
+    Streams upper-cased numbered lines in small pieces, recording when each line is sent.
+    A reply to a batch of more than garble_above cues breaks off into an unnumbered line
+    after its second cue; one to a batch of more than reset_above cues loses its
+    connection there.
+    """
+
+    def __init__(self, garble_above=None, reset_above=None):
+        self.garble_above = garble_above
+        self.reset_above = reset_above
+        self.events = []
+        self.requests = []
+
+    async def stream_chat_completion(self, model, messages):
+        content = messages[-1]['content']
+        self.requests.append(content)
+        lines = [line.upper().replace('<BR>', '<br>') for line in content.splitlines()]
+        if self.garble_above is not None and len(lines) > self.garble_above:
+            lines = lines[:2] + ['Sorry, the rest is missing']
+        for number, line in enumerate(lines, 1):
+            if self.reset_above is not None and len(lines) > self.reset_above and number > 2:
+                raise ConnectionResetError("Connection reset by peer")
+            self.events.append(('sent', number))
+            for start in range(0, len(line) + 1, 3):
+                await asyncio.sleep(0.001)
+                piece = (line + '\n')[start:start + 3]
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+
+    async def create_chat_completion(self, model, messages):
+        return make_response(messages[-1]['content'].upper())
+
+class SlowAsyncAPIClient(FakeAPIClient):
+    async def create_chat_completion(self, model, messages):
+        await asyncio.sleep(0.05)
+        return FakeAPIClient.create_chat_completion(self, model, messages)
+
+class FailFirstAsyncAPIClient(SlowAsyncAPIClient):
+    async def create_chat_completion(self, model, messages):
+        if not self.requests:
+            self.requests.append(messages[-1]['content'])
+            raise ValueError("Bad request")
+        return await super().create_chat_completion(model, messages)
+
+class TestTranslator(unittest.TestCase):
+    def setUp(self):
+        self.cache = TranslationCache(':memory:')
+        self.memory = TranslationMemory(':memory:')
+
+    def tearDown(self):
+        self.cache.close()
+        self.memory.close()
+
+    def test_batch_format(self):
+        logger.info("Testing the numbered batch format.")
+        self.assertEqual(encode_batch(['Hello', 'two\nlines']), "1|Hello\n2|two<br>lines")
+        self.assertEqual(parse_batch_response("```\n1| Hallo\n2|zwei<br>Zeilen\n```", 2), ['Hallo', 'zwei\nZeilen'])
+        self.assertEqual(parse_batch_response("1|erste\nFortsetzung\n2｜zweite", 2), ['erste\nFortsetzung', 'zweite'])
+        for content in ("1|a", "1|a\n1|b", "1|a\n3|c"):
+            with self.assertRaises(BatchFormatError):
+                parse_batch_response(content, 2)
+        logger.info("Batch format test completed successfully.")
+
+    def test_batches_keep_cue_order(self):
+        logger.info("Testing batched translation.")
+        api_client = FakeAPIClient()
+        translator = Translator(api_client=api_client, batch_size=40, max_in_flight=2, cache=self.cache, memory=self.memory)
+        texts = [f"line {i}" for i in range(100)] + ["line 3", "two\nlines"]
+        progress = []
+        translations = translator.translate_texts(texts, 'en', progress_callback=lambda done, total: progress.append((done, total)))
+        self.assertEqual(translations, [text.upper() for text in texts])
+        self.assertEqual(len(api_client.requests), 3, "101 unique texts should need three requests")
+        self.assertEqual(progress[-1], (3, 3))
+
+        # A second run is served from the cache without any requests
+        self.assertEqual(translator.translate_texts(texts, 'en'), translations)
+        self.assertEqual(len(api_client.requests), 3)
+        logger.info("Batched translation test completed successfully.")
+
+    def test_malformed_batches_are_split(self):
+        logger.info("Testing the fallback to smaller batches.")
+        api_client = FakeAPIClient(drop_above=5)
+        translator = Translator(api_client=api_client, batch_size=20, max_in_flight=1, cache=self.cache, memory=self.memory)
+        texts = [f"cue {i}" for i in range(20)]
+        self.assertEqual(translator.translate_texts(texts, 'en'), [text.upper() for text in texts])
+        self.assertEqual(len(api_client.requests), 7, "20 -> 10+10 -> 5+5+5+5")
+
+        subtitles = [{'index': i + 1, 'start_time': '00:00:01,000', 'end_time': '00:00:02,000', 'text': text} for i, text in enumerate(texts)]
+        translated = Translator(api_client=FakeAPIClient(), batch_size=20, cache=TranslationCache(':memory:'),
+                                memory=TranslationMemory(':memory:')).translate_subtitles(subtitles, 'en')
+        self.assertEqual(translated[19]['text'], 'CUE 19')
+        self.assertEqual(translated[19]['start_time'], '00:00:01,000')
+        logger.info("Batch fallback test completed successfully.")
+
+    def test_streaming_keeps_source_order(self):
+        logger.info("Testing ordered streaming of translations.")
+        api_client = SlowFirstAPIClient()
+        translator = Translator(api_client=api_client, batch_size=2, max_in_flight=3, cache=self.cache, memory=self.memory)
+        translator.reorder_window = 3
+        texts = [f"cue {i}" for i in range(12)]
+        self.cache.put(translator.cache_key('cue 0', 'en'), 'CACHED 0')
+        stream = translator.iter_translations(texts, 'en')
+        self.assertEqual(next(stream), 'CACHED 0', "A cached prefix should come out before any request finishes")
+        # Batches behind the slow one finish, but only as far as the reorder window allows
+        time.sleep(0.2)
+        self.assertEqual(len(api_client.requests), 2)
+        api_client.release.set()
+        self.assertEqual(list(stream), [text.upper() for text in texts[1:]])
+        logger.info("Ordered streaming test completed successfully.")
+
+    def test_streamed_cues_are_released_per_line(self):
+        logger.info("Testing streamed batch responses.")
+        parser = BatchResponseParser(3)
+        self.assertEqual(parser.feed("Sure:\n1|Hal"), [])
+        self.assertEqual(parser.feed("lo\n2|a<br>b\n3|"), [(1, 'Hallo'), (2, 'a\nb')])
+        self.assertEqual(parser.feed("drei"), [])
+        self.assertEqual(parser.close(), [(3, 'drei')])
+        with self.assertRaises(BatchFormatError):
+            BatchResponseParser(2).feed("1|a\nnot numbered\n")
+        with self.assertRaises(BatchFormatError):
+            BatchResponseParser(2).close()
+
+        api_client = StreamingAPIClient()
+        translator = Translator(api_client=api_client, batch_size=10, cache=self.cache, memory=self.memory)
+        texts = [f"cue {i}" for i in range(10)]
+
+        def on_translated(start, translations):
+            api_client.events.append(('released', start))
+
+        translations = asyncio.run(translator.translate_texts_async(texts, 'en', on_translated=on_translated))
+        self.assertEqual(translations, [text.upper() for text in texts])
+        self.assertLess(api_client.events.index(('released', 0)), api_client.events.index(('sent', 10)),
+                        "The first cue should be released while the batch is still streaming")
+        self.assertEqual(len(api_client.requests), 1)
+        logger.info("Streamed response test completed successfully.")
+
+    def test_malformed_stream_keeps_finished_cues(self):
+        logger.info("Testing recovery from a malformed streamed batch.")
+        api_client = StreamingAPIClient(garble_above=4)
+        translator = Translator(api_client=api_client, batch_size=8, cache=self.cache, memory=self.memory)
+        texts = [f"cue {i}" for i in range(8)]
+        self.assertEqual(translator.translate_texts(texts, 'en'), [text.upper() for text in texts])
+        # 8 cues keep 2 and retry 6, which keeps 2 and retries 4, which streams correctly
+        self.assertEqual(len(api_client.requests), 3)
+        logger.info("Malformed stream test completed successfully.")
+
+    def test_interrupted_stream_keeps_finished_cues(self):
+        logger.info("Testing recovery from a connection lost mid-stream.")
+        api_client = StreamingAPIClient(reset_above=4)
+        translator = Translator(api_client=api_client, batch_size=8, cache=self.cache, memory=self.memory)
+        texts = [f"cue {i}" for i in range(8)]
+        self.assertEqual(asyncio.run(translator.translate_texts_async(texts, 'en')), [text.upper() for text in texts])
+        # Like a malformed reply: 8 cues keep 2 and retry 6, which keeps 2 and retries 4
+        self.assertEqual(len(api_client.requests), 3)
+        logger.info("Interrupted stream test completed successfully.")
+
+    def test_duplicates_are_sent_once(self):
+        logger.info("Testing deduplication and request coalescing.")
+        api_client = SlowAsyncAPIClient()
+        translator = Translator(api_client=api_client, batch_size=10, cache=self.cache, memory=self.memory)
+
+        async def translate_concurrently():
+            first = translator.translate_texts_async(['Hello', 'credits', 'Hello '], 'en')
+            second = translator.translate_texts_async(['credits', 'World'], 'en')
+            return await asyncio.gather(first, second)
+
+        self.assertEqual(asyncio.run(translate_concurrently()), [['HELLO', 'CREDITS', 'HELLO'], ['CREDITS', 'WORLD']])
+        sent = [line for request in api_client.requests for line in request.splitlines()]
+        self.assertEqual(sorted(line.split('|')[-1] for line in sent), ['Hello', 'World', 'credits'])
+        logger.info("Deduplication test completed successfully.")
+
+    def test_lines_shared_across_files(self):
+        logger.info("Testing one translation pass over several files.")
+        with tempfile.TemporaryDirectory() as temp_dir:
+            file_paths = []
+            for episode in range(3):
+                file_path = os.path.join(temp_dir, f'episode{episode}.srt')
+                with open(file_path, 'w', encoding='utf-8') as f:
+                    f.write(f"1\n00:00:01,000 --> 00:00:02,000\nOpening song\n\n2\n00:00:03,000 --> 00:00:04,000\nEpisode {episode}\n\n")
+                file_paths.append(file_path)
+            output_path = os.path.join(temp_dir, 'output')
+            os.makedirs(output_path)
+            api_client = FakeAPIClient()
+            translator = Translator(api_client=api_client, batch_size=10, cache=self.cache, memory=self.memory)
+            broken_path = os.path.join(temp_dir, 'notes.srt')
+            with open(broken_path, 'w', encoding='utf-8') as f:
+                f.write("Not a subtitle file\n")
+            missing_path = os.path.join(temp_dir, 'missing.srt')
+            results = list(iter_translate_files(file_paths + [broken_path, missing_path], output_path, 'en', translator=translator))
+            failed = [result['file_path'] for result in results if result['error']]
+            self.assertEqual(failed, [broken_path, missing_path], "Unreadable inputs fail instead of becoming empty outputs")
+            self.assertFalse(os.path.exists(os.path.join(output_path, 'notes.srt')))
+            self.assertEqual([result['output_file_path'] for result in results if not result['error']],
+                             [os.path.join(output_path, f'episode{i}.srt') for i in range(3)])
+            with open(os.path.join(output_path, 'episode2.srt'), encoding='utf-8') as f:
+                self.assertIn("00:00:03,000 --> 00:00:04,000\nEPISODE 2", f.read())
+            self.assertEqual(len(api_client.requests), 1)
+            self.assertEqual(api_client.requests[0].count('Opening song'), 1)
+        logger.info("Shared translation pass test completed successfully.")
+
+    def test_cancelled_run_ends_the_iterator(self):
+        logger.info("Testing that a cancelled translation run ends iter_translations.")
+        translator = Translator(api_client=FakeAPIClient(), cache=self.cache, memory=self.memory)
+
+        class CancellingLoopThread:
+            def submit(self, coroutine):
+                coroutine.close()
+                future = concurrent.futures.Future()
+                future.cancel()
+                return future
+
+        original = translator_module.get_loop_thread
+        translator_module.get_loop_thread = CancellingLoopThread
+        try:
+            results = []
+            thread = threading.Thread(target=lambda: results.append(list(translator.iter_translations(['cue'], 'en'))), daemon=True)
+            thread.start()
+            thread.join(5)
+        finally:
+            translator_module.get_loop_thread = original
+        self.assertEqual(results, [[]], "The iterator should end instead of waiting forever")
+        logger.info("Cancelled run test completed successfully.")
+
+    def test_failed_batch_stops_the_other_workers(self):
+        logger.info("Testing that a failed batch stops the job.")
+        api_client = FailFirstAsyncAPIClient()
+        translator = Translator(api_client=api_client, batch_size=2, max_in_flight=2, cache=self.cache, memory=self.memory)
+        translator.streaming = False
+        texts = [f"cue {i}" for i in range(20)]
+
+        async def translate_and_wait():
+            with self.assertRaises(Exception):
+                await translator.translate_texts_async(texts, 'en')
+            sent = len(api_client.requests)
+            await asyncio.sleep(0.3)
+            return sent, [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+        sent, leftover_tasks = asyncio.run(translate_and_wait())
+        self.assertEqual(len(api_client.requests), sent, "No request should be sent after the failure")
+        self.assertLessEqual(sent, 2)
+        self.assertEqual(leftover_tasks, [])
+        logger.info("Failed batch test completed successfully.")
+
+    def test_requests_are_packed_by_tokens(self):
+        logger.info("Testing token budget packing of batches.")
+        api_client = FakeAPIClient()
+        translator = Translator(api_client=api_client, batch_size=100, cache=self.cache, memory=self.memory)
+        translator.max_output_tokens = 300
+        texts = [f"short {i}" for i in range(40)] + [' '.join(['word'] * 30) + f" {i}" for i in range(6)]
+        plans = []
+        translations = translator.translate_texts_async(texts, 'en', on_plan=plans.append)
+        self.assertEqual(asyncio.run(translations), [text.upper() for text in texts])
+        self.assertEqual(len(plans), 1)
+        self.assertEqual(plans[0]['items'], len(texts))
+        self.assertEqual(plans[0]['requests'], len(api_client.requests))
+        self.assertGreater(len(api_client.requests), 1, "The long lines should not fit in one request")
+        sizes = [len(request.splitlines()) for request in api_client.requests]
+        self.assertGreater(max(sizes), min(sizes), "Requests of short lines should hold more cues")
+        logger.info("Token budget packing test completed successfully.")
+
+    def test_near_duplicates_reuse_the_memory(self):
+        logger.info("Testing reuse of near-duplicate translations.")
+        api_client = FakeAPIClient()
+        translator = Translator(api_client=api_client, batch_size=10, cache=self.cache, memory=self.memory)
+        translator.translate_texts(['Previously on the show', 'Welcome back to episode 3'], 'en')
+        translations = translator.translate_texts(['Previously, on the show...', 'Welcome back to episode 4', 'Something new'], 'en')
+        self.assertEqual(translations, ['PREVIOUSLY ON THE SHOW', 'WELCOME BACK TO EPISODE 4', 'SOMETHING NEW'])
+        self.assertEqual(api_client.requests[-1], 'Something new', "Only the new line should be sent")
+        reused_key = translator.cache_key('Welcome back to episode 4', 'en')
+        self.assertEqual(self.cache.get_many([reused_key]), {}, "Adapted translations stay out of the exact cache")
+        self.assertEqual(self.memory.reused, 2)
+        logger.info("Near-duplicate reuse test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
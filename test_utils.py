@@ -0,0 +1,40 @@
+# test_utils.py
+
+import unittest
+from utils import load_config_section
+import logging
+import os
+import tempfile
+
+logger = logging.getLogger(__name__)
+
+class TestLoadConfigSection(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.config_file_path = os.path.join(self.temp_dir.name, 'config.toml')
+
+    def tearDown(self):
+        self.temp_dir.cleanup()
+
+    def test_sections(self):
+        logger.info("Testing configuration section loading.")
+        self.assertEqual(load_config_section('batch', self.config_file_path), {}, "A missing file gives no settings")
+        with open(self.config_file_path, 'w', encoding='utf-8') as f:
+            f.write('[batch]\nmax_workers = 2\n')
+        settings = load_config_section('batch', self.config_file_path)
+        self.assertEqual(settings, {'max_workers': 2})
+        settings['max_workers'] = 8
+        self.assertEqual(load_config_section('batch', self.config_file_path), {'max_workers': 2}, "Callers get copies")
+        self.assertEqual(load_config_section('http', self.config_file_path), {})
+
+        with open(self.config_file_path, 'w', encoding='utf-8') as f:
+            f.write('[batch]\nmax_workers = 4\nchunk_size = 1\n')
+        self.assertEqual(load_config_section('batch', self.config_file_path), {'max_workers': 4, 'chunk_size': 1},
+                         "A changed file is parsed again")
+        with open(self.config_file_path, 'w', encoding='utf-8') as f:
+            f.write('[batch\n')
+        self.assertEqual(load_config_section('batch', self.config_file_path), {})
+        logger.info("Configuration section test completed successfully.")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+# text_normalizer.py
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Joins the cues of a batch so a whole file goes through str.translate in one call.
+# NUL does not occur in subtitle text and is neither a space nor punctuation here.
+CUE_SEPARATOR = '\x00'
+
+# Cues normalized per call when streaming, enough to amortize the join and split
+BATCH_SIZE = 2048
+
+# ASCII, general punctuation, CJK symbols and punctuation, and half/full-width forms
+PRECOMPUTED_RANGES = ((0x0000, 0x007F), (0x2000, 0x206F), (0x3000, 0x303F), (0xFF00, 0xFFEF))
+
+class CharacterTable(dict):
+    """
+    str.translate table that classifies a character the first time it is seen.
+
+    Word characters (letters, digits and underscore, as matched by \\w), line breaks and
+    the cue separator are kept. Other whitespace becomes a plain space, and punctuation
+    and symbols are mapped to punctuation_value (None deletes them). That covers ASCII
+    and full-width CJK punctuation alike without listing either.
+
+    :param keep_punctuation: Leave punctuation alone and only normalize whitespace
+    """
+
+    def __init__(self, punctuation_value=' ', keep_punctuation=False):
+        super().__init__()
+        self.punctuation_value = punctuation_value
+        self.keep_punctuation = keep_punctuation
+        # Classify ASCII and the CJK and full-width punctuation blocks up front
+        for first, last in PRECOMPUTED_RANGES:
+            for codepoint in range(first, last + 1):
+                self[codepoint]
+
+    def __missing__(self, codepoint):
+        char = chr(codepoint)
+        if char.isalnum() or char == '_' or char == '\n' or char == CUE_SEPARATOR:
+            value = char
+        elif char.isspace():
+            value = ' '
+        elif self.keep_punctuation:
+            value = char
+        else:
+            value = self.punctuation_value
+        self[codepoint] = value
+        return value
+
+class TextNormalizer:
+    """
+    Compiled punctuation and whitespace rules for cue text.
+
+    A rule set is turned into a single translate table. The texts of a whole batch are
+    joined and translated in one call, then spaces are collapsed with str.split, so no
+    regular expression runs over the text at all.
+
+    :param punctuation: 'space' replaces punctuation with a space, 'remove' deletes it,
+        'keep' leaves it alone
+    :param collapse_spaces: Collapse runs of spaces and trim spaces at the start and end
+        of every line
+    """
+
+    def __init__(self, punctuation='space', collapse_spaces=True):
+        if punctuation not in ('space', 'remove', 'keep'):
+            raise ValueError(f"Unknown punctuation rule: {punctuation}")
+        self.punctuation = punctuation
+        self.collapse_spaces = collapse_spaces
+        self.table = CharacterTable(' ' if punctuation == 'space' else None, keep_punctuation=punctuation == 'keep')
+
+    def normalize(self, text):
+        return self.normalize_many([text])[0]
+
+    def normalize_many(self, texts):
+        """
+        Normalizes a list of texts in one batch and returns the results in the same order.
+        """
+        if not texts:
+            return []
+        results = CUE_SEPARATOR.join(texts).translate(self.table).split(CUE_SEPARATOR)
+        if len(results) != len(texts):
+            # A text contained the separator itself; drop it and go one text at a time
+            return [self.normalize_many([text.replace(CUE_SEPARATOR, '')])[0] for text in texts]
+        if self.collapse_spaces:
+            # After translation the only whitespace left is ' ' and '\n', so split() both
+            # collapses and trims. Lines left empty are dropped, since a blank line would end the cue.
+            results = [_collapse_lines(text) if '\n' in text else ' '.join(text.split()) for text in results]
+        return results
+
+    def iter_normalized(self, subtitles, batch_size=BATCH_SIZE):
+        """
+        Normalizes the text of streamed subtitles in batches, yielding them in order.
+        """
+        batch = []
+        for subtitle in subtitles:
+            batch.append(subtitle)
+            if len(batch) >= batch_size:
+                yield from self._normalize_batch(batch)
+                batch = []
+        if batch:
+            yield from self._normalize_batch(batch)
+
+    def _normalize_batch(self, subtitles):
+        for subtitle, text in zip(subtitles, self.normalize_many([subtitle['text'] for subtitle in subtitles])):
+            subtitle['text'] = text
+            yield subtitle
+
+    def normalize_table(self, table):
+        """
+        Normalizes the texts of a CueTable in place, once per unique text.
+        """
+        return table.map_text_pool(self.normalize_many)
+
+def _collapse_lines(text):
+    return '\n'.join(line for line in (' '.join(line.split()) for line in text.split('\n')) if line)
+
+# The rules used by every punctuation button: punctuation inside a line becomes a
+# space, punctuation at either end of a line disappears, and spaces are collapsed.
+default_normalizer = TextNormalizer()
@@ -0,0 +1,129 @@
+# timecode.py
+
+from array import array
+import logging
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, the batch API falls back to a Python loop
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Lookup tables for formatting: "00".."99", "000".."999" and every "MM:SS" in an hour
+_TWO_DIGITS = [f"{i:02d}" for i in range(100)]
+_THREE_DIGITS = [f"{i:03d}" for i in range(1000)]
+_MINUTES_SECONDS = [f"{m:02d}:{s:02d}" for m in range(60) for s in range(60)]
+
+def parse_ms(time_str):
+    """
+    Parses an SRT timestamp (HH:MM:SS,mmm) into integer milliseconds.
+
+    A period is accepted in place of the comma, and hours may have more than two digits.
+    """
+    if len(time_str) == 12 and time_str[2] == ':' and time_str[5] == ':' and time_str[8] in ',.':
+        return (int(time_str[0:2]) * 3600000 + int(time_str[3:5]) * 60000
+                + int(time_str[6:8]) * 1000 + int(time_str[9:12]))
+    hours, minutes, seconds = time_str.strip().split(':')
+    seconds, _, millis = seconds.replace('.', ',').partition(',')
+    return ((int(hours) * 60 + int(minutes)) * 60 + int(seconds)) * 1000 + int(millis.ljust(3, '0')[:3])
+
+def format_ms(ms):
+    """
+    Formats integer milliseconds as an SRT timestamp (HH:MM:SS,mmm). Negative values are clamped to zero.
+    """
+    ms = int(ms)
+    if ms < 0:
+        ms = 0
+    seconds, millis = divmod(ms, 1000)
+    hours, seconds = divmod(seconds, 3600)
+    if hours < 100:
+        return _TWO_DIGITS[hours] + ':' + _MINUTES_SECONDS[seconds] + ',' + _THREE_DIGITS[millis]
+    return f"{hours}:{_MINUTES_SECONDS[seconds]},{_THREE_DIGITS[millis]}"
+
+def parse_many(time_strs):
+    """
+    Parses an iterable of SRT timestamps into an array('q') of milliseconds.
+    """
+    return array('q', map(parse_ms, time_strs))
+
+def format_many(values):
+    """
+    Formats a sequence of millisecond values as SRT timestamps.
+    """
+    return list(map(format_ms, values))
+
+def retime_cue(start, end, scale=1.0, shift=0, speech_rate=1.0, min_ms=0, max_ms=None, min_duration=None):
+    """
+    Retimes a single cue. Uses exactly the same arithmetic as retime, so streaming and
+    batch results are identical.
+    """
+    duration = end - start
+    if scale != 1.0:
+        start = round(start * scale)
+        duration = duration * scale
+    start += shift
+    if speech_rate != 1.0:
+        duration = duration / speech_rate
+    duration = round(duration)
+    if min_duration is not None and duration < min_duration:
+        duration = min_duration
+    end = start + duration
+    if min_ms is not None:
+        start = max(start, min_ms)
+        end = max(end, min_ms)
+    if max_ms is not None:
+        start = min(start, max_ms)
+        end = min(end, max_ms)
+    return start, end
+
+def retime(starts, ends, scale=1.0, shift=0, speech_rate=1.0, min_ms=0, max_ms=None, min_duration=None):
+    """
+    Retimes whole start/end columns at once.
+
+    :param starts: Start times in milliseconds (array('q'), list or NumPy array)
+    :param ends: End times in milliseconds
+    :param scale: Factor applied to start times and durations (e.g. for frame-rate conversion)
+    :param shift: Offset in milliseconds added to every cue
+    :param speech_rate: Durations are divided by this value
+    :param min_ms: Lower clamp for all times, None to disable
+    :param max_ms: Upper clamp for all times, None to disable
+    :param min_duration: Minimum cue duration after retiming, None to disable
+    :return: Tuple of new (starts, ends) as array('q')
+    """
+    if len(starts) != len(ends):
+        raise ValueError("starts and ends must have the same length")
+    if np is None:
+        new_starts, new_ends = array('q'), array('q')
+        for start, end in zip(starts, ends):
+            start, end = retime_cue(start, end, scale, shift, speech_rate, min_ms, max_ms, min_duration)
+            new_starts.append(start)
+            new_ends.append(end)
+        return new_starts, new_ends
+
+    start_values = _as_int64(starts)
+    durations = _as_int64(ends) - start_values
+    if scale != 1.0:
+        start_values = np.rint(start_values * scale).astype(np.int64)
+        durations = durations * scale
+    start_values = start_values + shift
+    if speech_rate != 1.0:
+        durations = durations / speech_rate
+    durations = np.rint(durations).astype(np.int64)
+    if min_duration is not None:
+        durations = np.maximum(durations, min_duration)
+    end_values = start_values + durations
+    if min_ms is not None or max_ms is not None:
+        start_values = np.clip(start_values, min_ms, max_ms)
+        end_values = np.clip(end_values, min_ms, max_ms)
+    return _to_array(start_values), _to_array(end_values)
+
+def _as_int64(values):
+    if isinstance(values, array) and values.typecode == 'q':
+        return np.frombuffer(values, dtype=np.int64) if len(values) else np.zeros(0, dtype=np.int64)
+    return np.asarray(values, dtype=np.int64)
+
+def _to_array(values):
+    result = array('q')
+    result.frombytes(np.ascontiguousarray(values, dtype=np.int64).tobytes())
+    return result
@@ -3,8 +3,9 @@ from tkinter import filedialog, messagebox, ttk
 from localization import get_translation
 import logging
 from srt_handler import SRTHandler
-import os
-from utils import upload_files, select_output_path, show_error, adjust_speech_rate  # Import the adjust_speech_rate function
+from utils import upload_files, select_output_path, show_error, show_batch_summary
+from batch_jobs import adjust_timestamps_job
+from job_runner import JobRunner, batch_task
 
 logger = logging.getLogger(__name__)
 
@@ -17,6 +18,7 @@ class TimestampOptimizer:
         self.output_path = None
         self.speech_rate = 2  # Default speech rate in characters per second
         self.shorten_intervals = tk.BooleanVar(value=False)
+        self.job_runner = JobRunner(root)
 
         self.create_ui()
 
@@ -58,7 +60,10 @@ class TimestampOptimizer:
 
         # Progress bar
         self.progress = ttk.Progressbar(self.frame, orient="horizontal", length=400, mode="determinate")
-        self.progress.grid(row=4, column=0, columnspan=4, padx=5, pady=5)
+        self.progress.grid(row=4, column=0, columnspan=3, padx=5, pady=5)
+
+        self.cancel_button = tk.Button(self.frame, text=get_translation("Cancel", self.language), command=self.job_runner.cancel, state=tk.DISABLED)
+        self.cancel_button.grid(row=4, column=3, padx=5, pady=5)
 
         # Status label
         self.status_label = tk.Label(self.frame, text="", wraplength=400)
@@ -83,6 +88,9 @@ class TimestampOptimizer:
             logger.info(f"Output path selected: {output_path}")
 
     def process_files(self):
+        if self.job_runner.is_running():
+            return
+
         if not self.file_paths:
             show_error(get_translation("No files uploaded for processing.", self.language))
             logger.error("No files uploaded for processing.")
@@ -103,24 +111,32 @@ class TimestampOptimizer:
         self.progress["value"] = 0
         self.progress["maximum"] = len(self.file_paths)
         self.status_label.config(text="Processing files...")
-
-        for i, file_path in enumerate(self.file_paths):
-            try:
-                srt_handler = SRTHandler(file_path)
-                srt_handler.adjust_timestamps(self.speech_rate, self.shorten_intervals.get())
-                output_file_path = os.path.join(self.output_path, os.path.basename(file_path))
-                srt_handler.save_subtitles(output_file_path)
-                self.progress["value"] = i + 1
-                self.status_label.config(text=f"Processed {i + 1} of {len(self.file_paths)} files")
-                self.root.update_idletasks()
-                logger.info(f"Processed file: {file_path}")
-            except Exception as e:
-                logger.error(f"Error processing file: {file_path}. Error: {e}", exc_info=True)
-                show_error(f"{get_translation('An error occurred while processing the file', self.language)}: {file_path}. Error: {e}")
-
-        self.status_label.config(text="Processing completed successfully.")
-        messagebox.showinfo(get_translation("Processing Complete", self.language), get_translation("Processing completed successfully.", self.language))
-        logger.info("Processing completed successfully.")
+        self.set_running(True)
+        self.job_runner.start(batch_task(adjust_timestamps_job, self.file_paths, self.output_path, self.speech_rate, self.shorten_intervals.get()),
+                              on_progress=self.update_progress, on_done=self.on_batch_done, on_error=self.on_batch_error)
+
+    def set_running(self, running):
+        state = tk.DISABLED if running else tk.NORMAL
+        for button in (self.upload_button, self.process_button):
+            button.config(state=state)
+        self.cancel_button.config(state=tk.NORMAL if running else tk.DISABLED)
+
+    def update_progress(self, done, total, file_path):
+        self.progress["value"] = done
+        self.status_label.config(text=f"Processed {done} of {total} files")
+
+    def on_batch_done(self, results, cancelled):
+        self.set_running(False)
+        failed = sum(1 for result in results if result['error'])
+        status = f"Processed {len(results) - failed} of {len(self.file_paths)} files, {failed} failed"
+        self.status_label.config(text=f"{status} ({get_translation('Processing Cancelled', self.language)})" if cancelled else status)
+        show_batch_summary(results, self.language, cancelled=cancelled)
+        logger.info("Processing cancelled." if cancelled else "Processing completed.")
+
+    def on_batch_error(self, error):
+        self.set_running(False)
+        self.status_label.config(text="")
+        show_error(f"{get_translation('An error occurred while processing the file', self.language)}: {error}")
 
     def preview_timestamps(self):
         if not self.file_paths:
@@ -143,6 +159,7 @@ class TimestampOptimizer:
 
         for file_path in self.file_paths:
             try:
+                # Parsed through this process's cache, so previewing again (or processing inline) reuses it
                 srt_handler = SRTHandler(file_path)
                 adjusted_subtitles = srt_handler.adjust_timestamps(self.speech_rate, self.shorten_intervals.get(), preview=True)
                 preview_text.insert(tk.END, f"File: {file_path}\n")
@@ -0,0 +1,111 @@
+# token_budget.py
+
+import math
+import re
+
+# Defaults for the [translation] budgets of one batch request. The output budget stays
+# below the 4096-token reply limit many chat APIs apply when max_tokens is not set.
+DEFAULT_MAX_INPUT_TOKENS = 6000
+DEFAULT_MAX_OUTPUT_TOKENS = 3000
+
+# Expected reply tokens per source token. Translations between CJK and Latin scripts
+# can grow by about half, so replies are budgeted on the high side.
+DEFAULT_OUTPUT_RATIO = 1.5
+
+# Tokens a chat message costs beyond its content (role and separators)
+MESSAGE_OVERHEAD = 4
+
+# Tokens a numbered batch line costs beyond its text: the ID, the bar and the newline
+LINE_OVERHEAD = 3
+
+# One match per token-like piece: ASCII words, groups of up to three digits, single
+# CJK, kana or hangul characters, other words, and single symbols
+_PIECE_PATTERN = re.compile(
+    r'(?P<ascii>[A-Za-z]+)|(?P<digits>\d{1,3})'
+    '|(?P<cjk>[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff])'
+    r'|(?P<word>[^\W\d_]+)|(?P<symbol>[^\w\s]|_)')
+
+def estimate_text_tokens(text):
+    """
+    Estimates how many tokens a BPE tokenizer (cl100k, DeepSeek) splits text into.
+
+    Common ASCII words are one token and long ones one more per eight letters; every
+    CJK character, group of three digits and punctuation mark counts as one; words in
+    other scripts (accented Latin, Cyrillic, ...) take a token per two letters. Spaces
+    are merged into the following word. This errs on the high side for Chinese, which
+    DeepSeek encodes at well under one token per character.
+    """
+    tokens = 0
+    for match in _PIECE_PATTERN.finditer(text):
+        kind = match.lastgroup
+        if kind == 'ascii':
+            tokens += 1 + len(match.group()) // 8
+        elif kind == 'word':
+            tokens += (len(match.group()) + 1) // 2
+        else:
+            tokens += 1
+    return tokens
+
+def estimate_message_tokens(messages):
+    """
+    Estimates the prompt tokens of a list of chat messages.
+    """
+    return sum(estimate_text_tokens(message['content']) + MESSAGE_OVERHEAD for message in messages)
+
+def pack_batches(costs, max_input_tokens=DEFAULT_MAX_INPUT_TOKENS, max_output_tokens=DEFAULT_MAX_OUTPUT_TOKENS,
+                 max_items=None, prompt_tokens=0, output_ratio=DEFAULT_OUTPUT_RATIO):
+    """
+    Groups consecutive items into as few requests as the budgets allow, and makes those
+    requests about equally large.
+
+    An item is never split: one that does not fit the budgets on its own gets a request
+    to itself. Greedy packing gives the fewest requests; the budgets are then shrunk as
+    far as possible while keeping that count, so the last request is not left nearly
+    empty while the others are full.
+
+    :param costs: Input tokens of each item
+    :param prompt_tokens: Input tokens every request spends before the first item
+    :param max_items: Most items per request, or None for no limit
+    :returns: List of (start, end) ranges into costs
+    """
+    if not costs:
+        return []
+    input_budget = max(max_input_tokens - prompt_tokens, 1)
+    ranges = _greedy_ranges(costs, 1.0, input_budget, max_output_tokens, max_items, output_ratio)
+    if len(ranges) == 1:
+        return ranges
+    # Fewest requests is monotonic in the budgets, so bisect for the smallest scale that keeps the count
+    low, high = 0.0, 1.0
+    for _ in range(20):
+        middle = (low + high) / 2
+        if len(_greedy_ranges(costs, middle, input_budget, max_output_tokens, max_items, output_ratio)) <= len(ranges):
+            high = middle
+        else:
+            low = middle
+    return _greedy_ranges(costs, high, input_budget, max_output_tokens, max_items, output_ratio)
+
+def _greedy_ranges(costs, scale, input_budget, output_budget, max_items, output_ratio):
+    input_budget, output_budget = input_budget * scale, output_budget * scale
+    item_budget = max_items * scale if max_items else None
+    ranges = []
+    start = 0
+    input_tokens = output_tokens = 0
+    for end, cost in enumerate(costs):
+        output_cost = cost * output_ratio
+        full = ((item_budget is not None and end - start + 1 > item_budget) or input_tokens + cost > input_budget
+                or output_tokens + output_cost > output_budget)
+        if end > start and full:
+            ranges.append((start, end))
+            start, input_tokens, output_tokens = end, 0, 0
+        input_tokens += cost
+        output_tokens += output_cost
+    ranges.append((start, len(costs)))
+    return ranges
+
+def summarize_batches(ranges, costs, prompt_tokens=0, output_ratio=DEFAULT_OUTPUT_RATIO):
+    """
+    Returns the plan of packed requests: {'items', 'requests', 'input_tokens', 'output_tokens'}.
+    """
+    input_tokens = sum(costs) + prompt_tokens * len(ranges)
+    return {'items': len(costs), 'requests': len(ranges), 'input_tokens': input_tokens,
+            'output_tokens': math.ceil(sum(costs) * output_ratio)}
@@ -0,0 +1,189 @@
+# translation_cache.py
+
+from app_dirs import resolve_data_path
+from collections import OrderedDict
+import hashlib
+import logging
+import sqlite3
+import threading
+import unicodedata
+from utils import load_config_section
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the [cache] translation_* settings
+DEFAULT_DB_PATH = 'translation_cache.sqlite3'
+DEFAULT_MAX_ENTRIES = 200000
+DEFAULT_MEMORY_ENTRIES = 4096
+
+# SQLite limits bound parameters per statement, so keys are looked up in chunks
+LOOKUP_CHUNK_SIZE = 500
+
+def normalize_source(text):
+    """
+    Normalizes source text for cache keys: Unicode NFC, trailing whitespace per line and
+    blank lines at either end removed. Punctuation is left alone, since it changes meaning.
+    """
+    return '\n'.join(line.rstrip() for line in unicodedata.normalize('NFC', text).strip().split('\n'))
+
+def make_key(model, prompt_version, target_language, text):
+    """
+    Hashes everything a translation depends on into a fixed-size cache key.
+    """
+    parts = (model, str(prompt_version), target_language, normalize_source(text))
+    return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+class TranslationCache:
+    """
+    Persistent translation cache in an SQLite database, with an in-memory LRU in front.
+
+    The database runs in WAL mode so several processes (the GUI and srttools, or
+    batch workers) can read while one writes. Each row records when it was last used,
+    and the least recently used rows are deleted once there are more than max_entries.
+    One connection is shared by all threads and guarded by a lock.
+
+    :param db_path: Database file, or ':memory:' for a cache that is not persisted
+    :param max_entries: Rows kept on disk
+    :param memory_entries: Translations kept in the in-memory tier
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, max_entries=DEFAULT_MAX_ENTRIES, memory_entries=DEFAULT_MEMORY_ENTRIES):
+        self.db_path = db_path
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.hits = 0
+        self.memory_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._clock = 0
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS translations ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, last_used INTEGER NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS translations_last_used ON translations (last_used)")
+            self._clock = self._connection.execute("SELECT COALESCE(MAX(last_used), 0) FROM translations").fetchone()[0]
+            self._count = self._connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+
+    def get(self, key):
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys):
+        """
+        Looks up several keys at once and returns a dict of the ones that were found.
+        """
+        found = {}
+        with self._lock:
+            missing = []
+            for key in dict.fromkeys(keys):
+                if key in self._memory:
+                    self._memory.move_to_end(key)
+                    found[key] = self._memory[key]
+                    self.memory_hits += 1
+                else:
+                    missing.append(key)
+            for start in range(0, len(missing), LOOKUP_CHUNK_SIZE):
+                chunk = missing[start:start + LOOKUP_CHUNK_SIZE]
+                rows = self._connection.execute(
+                    f"SELECT key, translation FROM translations WHERE key IN ({','.join('?' * len(chunk))})", chunk).fetchall()
+                for key, translation in rows:
+                    found[key] = translation
+                    self._remember(key, translation)
+                self.hits += len(rows)
+                self.misses += len(chunk) - len(rows)
+                if rows:
+                    self._touch([key for key, _ in rows])
+        return found
+
+    def put(self, key, translation):
+        self.put_many([(key, translation)])
+
+    def put_many(self, items):
+        """
+        Stores (key, translation) pairs in one transaction, evicting old rows if needed.
+        """
+        items = list(items)
+        if not items:
+            return
+        with self._lock:
+            for key, translation in items:
+                self._remember(key, translation)
+            self._clock += 1
+            try:
+                with self._connection:
+                    before = self._connection.total_changes
+                    self._connection.executemany(
+                        "INSERT INTO translations (key, translation, last_used) VALUES (?, ?, ?) "
+                        "ON CONFLICT(key) DO UPDATE SET translation = excluded.translation, last_used = excluded.last_used",
+                        [(key, translation, self._clock) for key, translation in items])
+                    self._count += self._connection.total_changes - before
+                    if self._count > self.max_entries:
+                        self._evict()
+            except sqlite3.Error as e:
+                # The memory tier still has the translations; losing the disk copy only costs a re-translation
+                logger.error(f"Failed to write to the translation cache: {e}", exc_info=True)
+
+    def _remember(self, key, translation):
+        self._memory[key] = translation
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, keys):
+        self._clock += 1
+        try:
+            with self._connection:
+                self._connection.executemany("UPDATE translations SET last_used = ? WHERE key = ?",
+                                             [(self._clock, key) for key in keys])
+        except sqlite3.Error as e:
+            logger.warning(f"Failed to update translation cache usage: {e}")
+
+    def _evict(self):
+        # _count over-counts updates of existing rows, so recount before deleting anything
+        self._count = self._connection.execute("SELECT COUNT(*) FROM translations").fetchone()[0]
+        excess = self._count - self.max_entries
+        if excess > 0:
+            self._connection.execute(
+                "DELETE FROM translations WHERE key IN (SELECT key FROM translations ORDER BY last_used LIMIT ?)", (excess,))
+            self._count -= excess
+            logger.info(f"Evicted {excess} entries from the translation cache")
+
+    def clear(self):
+        with self._lock, self._connection:
+            self._memory.clear()
+            self._connection.execute("DELETE FROM translations")
+            self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+    def __len__(self):
+        return self._count
+
+    def stats(self):
+        return {'entries': len(self), 'max_entries': self.max_entries, 'memory_entries': len(self._memory),
+                'hits': self.hits + self.memory_hits, 'memory_hits': self.memory_hits, 'misses': self.misses}
+
+_translation_cache = None
+_translation_cache_lock = threading.Lock()
+
+def get_translation_cache():
+    """
+    Returns the process-wide TranslationCache, configured from [cache] translation_db,
+    translation_max_entries and translation_memory_entries on first use. Without
+    translation_db the database is kept in the user cache directory.
+    """
+    global _translation_cache
+    if _translation_cache is None:
+        with _translation_cache_lock:
+            if _translation_cache is None:
+                settings = load_config_section('cache')
+                _translation_cache = TranslationCache(
+                    db_path=resolve_data_path(settings.get('translation_db'), DEFAULT_DB_PATH),
+                    max_entries=settings.get('translation_max_entries', DEFAULT_MAX_ENTRIES),
+                    memory_entries=settings.get('translation_memory_entries', DEFAULT_MEMORY_ENTRIES))
+    return _translation_cache
@@ -0,0 +1,181 @@
+# translation_journal.py
+
+import hashlib
+import json
+import logging
+import os
+import queue
+import re
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Journal of a translate run, kept in its output directory until the run succeeds
+JOURNAL_FILE_NAME = '.translate-{target_language}.journal.jsonl'
+
+# Records are written through to the OS by a writer thread as soon as they are handed
+# over, so a crashed process loses at most the cues of its last moment. They are forced
+# to disk (fsync) only this often, or once this many are pending, which bounds what a
+# power failure can lose without paying for an fsync per cue
+DEFAULT_SYNC_INTERVAL = 1.0
+DEFAULT_SYNC_EVERY = 500
+
+# Characters kept from the target language in the journal's file name
+_UNSAFE_NAME_PATTERN = re.compile(r'[^\w-]+')
+MAX_NAME_LENGTH = 40
+
+def journal_path(output_path, target_language):
+    """
+    Returns the journal path for a run into output_path. The target language is free
+    text, so anything in it but letters, digits, '_' and '-' is replaced, and a hash of
+    the original is appended, which keeps separators and characters Windows rejects out
+    of the name and still gives every language its own journal.
+    """
+    name = _UNSAFE_NAME_PATTERN.sub('_', target_language)[:MAX_NAME_LENGTH]
+    if name != target_language:
+        name += '-' + hashlib.blake2b(target_language.encode('utf-8'), digest_size=4).hexdigest()
+    return os.path.join(output_path, JOURNAL_FILE_NAME.format(target_language=name))
+
+class TranslationJournal:
+    """
+    Append-only record of the cues a translation job has finished, one JSON object per
+    line: {"key", "translation", "model", "time"}, where key is the translator's cache key
+    (a hash of the model, prompt version, target language and source text).
+
+    A job that dies halfway can be started again with resume=True: the finished cues are
+    read back and only the rest is sent. Unlike the translation cache, the journal is
+    never evicted while the job is unfinished. A line cut short by a crash is skipped.
+
+    record() only queues the lines; a writer thread does the file I/O, so recording from
+    the shared event loop never waits on the disk.
+
+    :param resume: Keep and load an existing journal instead of starting a new one
+    """
+
+    def __init__(self, path, resume=False, sync_interval=DEFAULT_SYNC_INTERVAL, sync_every=DEFAULT_SYNC_EVERY):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.sync_every = sync_every
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pending = 0
+        self._synced = time.monotonic()
+        needs_newline = False
+        if resume and os.path.exists(path):
+            needs_newline = self._load()
+            logger.info(f"Resuming from {len(self.entries)} journaled translations in {path}")
+        self._file = open(path, 'a' if resume else 'w', encoding='utf-8')
+        if needs_newline:
+            self._file.write('\n')
+        self._writer = threading.Thread(target=self._write_loop, name='translation-journal', daemon=True)
+        self._writer.start()
+
+    def _load(self):
+        """
+        Reads the existing records and returns True if the file ends in a partial line.
+        """
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        skipped = 0
+        for line in content.decode('utf-8', errors='replace').splitlines():
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+                self.entries[record['key']] = record['translation']
+            except (ValueError, KeyError, TypeError):
+                skipped += 1
+        if skipped:
+            logger.warning(f"Skipped {skipped} unreadable lines in {self.path}")
+        return bool(content) and not content.endswith(b'\n')
+
+    def get_many(self, keys):
+        """
+        Returns {key: translation} for the keys the journal has finished.
+        """
+        return {key: self.entries[key] for key in keys if key in self.entries}
+
+    def record(self, items, model=None):
+        """
+        Appends (key, translation) pairs that are not journaled yet.
+        """
+        lines = []
+        with self._lock:
+            now = round(time.time(), 3)
+            for key, translation in items:
+                if translation is None or self.entries.get(key) == translation:
+                    continue
+                self.entries[key] = translation
+                lines.append(json.dumps({'key': key, 'translation': translation, 'model': model, 'time': now},
+                                        ensure_ascii=False) + '\n')
+        if lines:
+            self._queue.put(lines)
+
+    def sync(self):
+        """
+        Waits until everything recorded so far is on disk.
+        """
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def _write_loop(self):
+        while True:
+            try:
+                # Wake up after sync_interval even without new records, so pending ones still get synced
+                items = [self._queue.get(timeout=self.sync_interval if self._pending else None)]
+            except queue.Empty:
+                items = []
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            waiters = [item for item in items if isinstance(item, threading.Event)]
+            stop = None in items
+            try:
+                for item in items:
+                    if isinstance(item, list):
+                        self._file.writelines(item)
+                        self._pending += len(item)
+                self._file.flush()
+                if self._pending and (waiters or stop or self._pending >= self.sync_every
+                                      or time.monotonic() - self._synced >= self.sync_interval):
+                    self._sync()
+            except (OSError, ValueError) as e:
+                logger.error(f"Failed to write the translation journal {self.path}: {e}", exc_info=True)
+            for waiter in waiters:
+                waiter.set()
+            if stop:
+                self._file.close()
+                return
+
+    def _sync(self):
+        os.fsync(self._file.fileno())
+        self._pending = 0
+        self._synced = time.monotonic()
+
+    def close(self):
+        """
+        Writes and syncs the queued records and closes the file.
+        """
+        with self._lock:
+            if not self._writer.is_alive():
+                return
+            self._queue.put(None)
+        self._writer.join()
+
+    def remove(self):
+        """
+        Closes and deletes the journal, once the job it records has finished.
+        """
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError as e:
+            logger.warning(f"Failed to remove the translation journal {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,240 @@
+# translation_memory.py
+
+from app_dirs import resolve_data_path
+import collections
+import hashlib
+import logging
+import random
+import re
+import sqlite3
+import struct
+import threading
+from utils import load_config_section
+import zlib
+from text_normalizer import TextNormalizer
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional, signatures fall back to a Python loop
+    np = None
+
+logger = logging.getLogger(__name__)
+
+# Defaults for the [translation_memory] settings
+DEFAULT_DB_PATH = 'translation_memory.sqlite3'
+DEFAULT_THRESHOLD = 0.7
+
+# Character n-grams per shingle, and the MinHash signature split into BANDS bands of
+# ROWS rows for locality-sensitive hashing. Two lines with Jaccard similarity 0.7 share
+# a band with probability 1 - (1 - 0.7**4)**16 > 0.98; at 0.3 only about 12%.
+NGRAM = 3
+BANDS = 16
+ROWS = 4
+NUM_PERM = BANDS * ROWS
+
+# Lines this short have too few n-grams for a meaningful similarity
+MIN_LENGTH = 4
+
+# Entries read per bucket, and candidates verified per lookup (those sharing the most
+# buckets with the query). Both keep lookups flat however large a bucket grows.
+BUCKET_LIMIT = 16
+MAX_CANDIDATES = 32
+
+_PRIME = (1 << 31) - 1
+_random = random.Random(20240601)  # Fixed seed: signatures must be stable across runs
+_PERMUTATIONS = [(_random.randrange(1, _PRIME), _random.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+if np is not None:
+    _A = np.array([a for a, _ in _PERMUTATIONS], dtype=np.uint64)[:, None]
+    _B = np.array([b for _, b in _PERMUTATIONS], dtype=np.uint64)[:, None]
+
+# One bounded read per band, newest entries first
+_CANDIDATES_QUERY = ' UNION ALL '.join(
+    f"SELECT * FROM (SELECT entry_id FROM buckets WHERE bucket = ? ORDER BY entry_id DESC LIMIT {BUCKET_LIMIT})"
+    for _ in range(BANDS))
+
+_match_normalizer = TextNormalizer('space')
+_NUMBER_PATTERN = re.compile(r'\d+')
+
+def match_form(text):
+    """
+    The form lines are compared in: case-folded, punctuation and extra whitespace removed.
+    """
+    return _match_normalizer.normalize(text.casefold()).replace('\n', ' ')
+
+def shingles(text):
+    form = match_form(text)
+    if len(form) <= NGRAM:
+        return {form} if form else set()
+    return {form[i:i + NGRAM] for i in range(len(form) - NGRAM + 1)}
+
+def jaccard(first, second):
+    if not first or not second:
+        return 0.0
+    return len(first & second) / len(first | second)
+
+def minhash(shingle_set):
+    """
+    Returns the MinHash signature of a set of shingles as a list of NUM_PERM integers.
+    """
+    values = [zlib.crc32(shingle.encode('utf-8')) for shingle in shingle_set]
+    if np is not None:
+        hashes = (_A * np.array(values, dtype=np.uint64)[None, :] + _B) % _PRIME
+        return hashes.min(axis=1).tolist()
+    return [min((a * value + b) % _PRIME for value in values) for a, b in _PERMUTATIONS]
+
+def band_keys(scope, signature):
+    """
+    Hashes each band of a signature, together with the scope, into a 64-bit bucket key.
+    """
+    prefix = scope.encode('utf-8') + b'\x1f'
+    keys = []
+    for band in range(BANDS):
+        rows = signature[band * ROWS:(band + 1) * ROWS]
+        digest = hashlib.blake2b(prefix + struct.pack(f'<{ROWS + 1}I', band, *rows), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'little', signed=True))
+    return keys
+
+def patch_translation(text, source, translation):
+    """
+    Adapts the translation of source to text when the two lines differ only in ways that
+    can be carried over without the model, or returns None.
+
+    Lines that match apart from punctuation, case and spacing reuse the translation as
+    is. Lines that differ only in their numbers ("Episode 3" and "Episode 4") reuse it
+    with the numbers replaced, provided each old number appears in the translation once.
+    """
+    text_form, source_form = match_form(text), match_form(source)
+    if text_form == source_form:
+        return translation
+    if _NUMBER_PATTERN.sub('#', text_form) != _NUMBER_PATTERN.sub('#', source_form):
+        return None
+    old_numbers, new_numbers = _NUMBER_PATTERN.findall(source_form), _NUMBER_PATTERN.findall(text_form)
+    if len(set(old_numbers)) != len(old_numbers):
+        return None
+    replacements = {}
+    for old, new in zip(old_numbers, new_numbers):
+        if old != new:
+            if len(re.findall(rf'(?<!\d){old}(?!\d)', translation)) != 1:
+                return None
+            replacements[old] = new
+    return re.sub(r'\d+', lambda match: replacements.get(match.group(0), match.group(0)), translation)
+
+class TranslationMemory:
+    """
+    Fuzzy translation memory over previously translated source lines.
+
+    Every line is stored with the MinHash signature of its character n-grams, indexed by
+    LSH bucket keys in an SQLite table. A lookup hashes the query the same way, reads a
+    bounded number of entries from each of its buckets, and verifies the ones sharing the
+    most buckets with the exact Jaccard similarity of their n-grams. Every step is capped
+    (BUCKET_LIMIT, MAX_CANDIDATES), so the cost does not grow with the memory.
+
+    Entries are partitioned by scope (model, prompt version and target language), so a
+    line is only ever matched against translations made the same way.
+
+    :param db_path: Database file, or ':memory:' for a memory that is not persisted
+    :param threshold: Minimum Jaccard similarity of returned candidates
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, threshold=DEFAULT_THRESHOLD):
+        self.db_path = db_path
+        self.threshold = threshold
+        self.reused = 0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute("PRAGMA synchronous=NORMAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS entries (id INTEGER PRIMARY KEY, scope TEXT NOT NULL, "
+                "source TEXT NOT NULL, translation TEXT NOT NULL, UNIQUE (scope, source))")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS buckets (bucket INTEGER NOT NULL, entry_id INTEGER NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS buckets_bucket ON buckets (bucket, entry_id)")
+
+    def add_many(self, scope, pairs):
+        """
+        Stores (source, translation) pairs. A source already in the memory gets the new translation.
+        """
+        rows = [(source, translation) for source, translation in pairs if len(match_form(source)) >= MIN_LENGTH]
+        if not rows:
+            return
+        prepared = [(source, translation, band_keys(scope, minhash(shingles(source)))) for source, translation in rows]
+        with self._lock:
+            try:
+                with self._connection:
+                    for source, translation, keys in prepared:
+                        existing = self._connection.execute(
+                            "SELECT id FROM entries WHERE scope = ? AND source = ?", (scope, source)).fetchone()
+                        if existing:
+                            self._connection.execute("UPDATE entries SET translation = ? WHERE id = ?", (translation, existing[0]))
+                            continue
+                        entry_id = self._connection.execute(
+                            "INSERT INTO entries (scope, source, translation) VALUES (?, ?, ?)", (scope, source, translation)).lastrowid
+                        self._connection.executemany("INSERT INTO buckets (bucket, entry_id) VALUES (?, ?)",
+                                                     [(key, entry_id) for key in keys])
+            except sqlite3.Error as e:
+                logger.error(f"Failed to write to the translation memory: {e}", exc_info=True)
+
+    def lookup(self, scope, text, threshold=None):
+        """
+        Returns [(similarity, source, translation)] for stored lines at least threshold
+        similar to text, most similar first.
+        """
+        threshold = self.threshold if threshold is None else threshold
+        if len(match_form(text)) < MIN_LENGTH:
+            return []
+        query = shingles(text)
+        keys = band_keys(scope, minhash(query))
+        with self._lock:
+            shared_buckets = collections.Counter(
+                entry_id for entry_id, in self._connection.execute(_CANDIDATES_QUERY, keys))
+            candidates = [entry_id for entry_id, _ in shared_buckets.most_common(MAX_CANDIDATES)]
+            rows = self._connection.execute(
+                f"SELECT scope, source, translation FROM entries WHERE id IN ({','.join('?' * len(candidates))})",
+                candidates).fetchall()
+        # Bucket keys already include the scope, this only guards against hash collisions
+        matches = [(jaccard(query, shingles(source)), source, translation)
+                   for entry_scope, source, translation in rows if entry_scope == scope]
+        return sorted((match for match in matches if match[0] >= threshold), reverse=True)
+
+    def reuse(self, scope, text):
+        """
+        Returns a translation for text adapted from a near-duplicate line, or None.
+        """
+        for _, source, translation in self.lookup(scope, text):
+            patched = patch_translation(text, source, translation)
+            if patched is not None:
+                with self._lock:
+                    self.reused += 1
+                return patched
+        return None
+
+    def __len__(self):
+        with self._lock:
+            return self._connection.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+_translation_memory = None
+_translation_memory_loaded = False
+_translation_memory_lock = threading.Lock()
+
+def get_translation_memory():
+    """
+    Returns the process-wide TranslationMemory configured from [translation_memory], or
+    None if it is disabled there. Without a db setting the database is kept in the user
+    cache directory.
+    """
+    global _translation_memory, _translation_memory_loaded
+    if not _translation_memory_loaded:
+        with _translation_memory_lock:
+            if not _translation_memory_loaded:
+                settings = load_config_section('translation_memory')
+                if settings.get('enabled', True):
+                    _translation_memory = TranslationMemory(db_path=resolve_data_path(settings.get('db'), DEFAULT_DB_PATH),
+                                                            threshold=settings.get('threshold', DEFAULT_THRESHOLD))
+                _translation_memory_loaded = True
+    return _translation_memory
@@ -1,8 +1,10 @@
+import copy
 import logging
 from logging.handlers import RotatingFileHandler
-from tkinter import filedialog, messagebox
 import toml
 import os
+import threading
+from subtitle_text import adjust_speech_rate  # Re-exported for existing imports
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -11,7 +13,8 @@ def setup_logging():
     logger.setLevel(logging.INFO)
 
     # Create a file handler that logs even debug messages
-    file_handler = RotatingFileHandler('app.log', maxBytes=100000, backupCount=10)
+    # Delayed so that headless users of load_config_section do not create app.log in their working directory
+    file_handler = RotatingFileHandler('app.log', maxBytes=100000, backupCount=10, delay=True)
     file_handler.setLevel(logging.INFO)
 
     # Create a console handler with a higher log level
@@ -47,6 +50,7 @@ def upload_files(file_paths):
         raise
 
 def select_output_path():
+    from tkinter import filedialog  # Deferred: utils is also imported by headless code
     output_path = filedialog.askdirectory()
     if output_path:
         logger.info(f"Output path selected: {output_path}")
@@ -54,30 +58,40 @@ def select_output_path():
     return None
 
 def show_error(message):
+    from tkinter import messagebox
     messagebox.showerror("错误", message)
 
-def adjust_speech_rate(content, speech_rate):
-    logger.info("Adjusting speech rate")
-    lines = content.split('\n')
-    adjusted_lines = []
-    for line in lines:
-        words = line.split()
-        adjusted_words = []
-        for word in words:
-            adjusted_words.append(word)
-            if len(adjusted_words) >= speech_rate:
-                adjusted_lines.append(' '.join(adjusted_words))
-                adjusted_words = []
-        if adjusted_words:
-            adjusted_lines.append(' '.join(adjusted_words))
-    logger.info("Speech rate adjustment completed")
-    return '\n'.join(adjusted_lines)
+def show_batch_summary(results, language='en', max_listed=10, cancelled=False):
+    """
+    Shows a single dialog summarising a batch run instead of one dialog per failed file.
+
+    :param results: Result dicts from BatchExecutor ({'file_path', 'output_file_path', 'error'})
+    :param cancelled: True if the batch was cancelled before every file was processed
+    """
+    from localization import get_translation
+    from tkinter import messagebox
+    failed = [result for result in results if result['error']]
+    if not failed:
+        if cancelled:
+            messagebox.showinfo(get_translation("Processing Cancelled", language),
+                                f"{get_translation('Processing Cancelled', language)}: {len(results)}")
+        else:
+            messagebox.showinfo(get_translation("Processing Complete", language), get_translation("Processing completed successfully.", language))
+        return
+    lines = [f"{os.path.basename(result['file_path'])}: {result['error']}" for result in failed[:max_listed]]
+    if len(failed) > max_listed:
+        lines.append(f"... (+{len(failed) - max_listed})")
+    summary = f"{get_translation('An error occurred while processing the file', language)}: {len(failed)}/{len(results)}"
+    if cancelled:
+        summary = f"{get_translation('Processing Cancelled', language)}\n{summary}"
+    messagebox.showerror(get_translation("Error", language), summary + "\n\n" + "\n".join(lines))
 
 def load_config():
     logger.info("Loading configuration from TOML file")
     config_file_path = 'config.toml'
     if not os.path.exists(config_file_path):
         logger.error(f"Configuration file '{config_file_path}' not found.")
+        from tkinter import messagebox
         messagebox.showerror("错误", "配置文件未找到，请检查文件路径。")
         raise FileNotFoundError(f"Configuration file '{config_file_path}' not found.")
 
@@ -89,6 +103,32 @@ def load_config():
         logger.error(f"Failed to load configuration: {e}", exc_info=True)
         raise
 
+_config_sections = {}  # abspath -> ((mtime_ns, size), parsed config)
+_config_sections_lock = threading.Lock()
+
+def load_config_section(name, config_file_path='config.toml'):
+    """
+    Returns a copy of the [name] section of the configuration file, or an empty dict if
+    the file or the section is missing or unreadable.
+
+    The parsed file is kept until it changes on disk, so the modules reading their own
+    section (batch, cache, translation, http, ...) do not each parse it again.
+    """
+    try:
+        stat = os.stat(config_file_path)
+    except OSError:
+        return {}
+    key, signature = os.path.abspath(config_file_path), (stat.st_mtime_ns, stat.st_size)
+    with _config_sections_lock:
+        cached = _config_sections.get(key)
+        if cached is None or cached[0] != signature:
+            try:
+                cached = _config_sections[key] = (signature, toml.load(config_file_path))
+            except Exception as e:
+                logger.error(f"Failed to load the [{name}] settings: {e}", exc_info=True)
+                return {}
+        return copy.deepcopy(cached[1].get(name, {}))
+
 def save_config(config_data):
     logger.info("Saving configuration to TOML file")
     config_file_path = 'config.toml'